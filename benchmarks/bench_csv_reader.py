@@ -0,0 +1,84 @@
+"""
+Microbenchmarks for reading CSV files.
+
+Compares csv.DictReader over a text file with MappedCsvReader, which also
+tracks the byte offset of every row, for a plain file and for one where every
+tenth row has a quoted field containing a comma.
+
+Usage:
+    python benchmarks/bench_csv_reader.py [rows]
+"""
+
+import os
+import sys
+import csv
+import time
+import tempfile
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_reader import MappedCsvReader
+
+# ============================================================================
+# Benchmark Cases
+# ============================================================================
+
+def write_file(path: str, rows: int, quoted: bool) -> None:
+    """
+    Writes a users file with the given number of rows.
+    
+    Args:
+        path: File to write
+        rows: Number of data rows
+        quoted: Quote the name of every tenth row
+    """
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["email", "name", "role"])
+        for i in range(rows):
+            name = f"Example, User {i}" if quoted and i % 10 == 0 else f"User {i}"
+            writer.writerow([f"user{i}@example.com", name, "admin" if i % 50 == 0 else "user"])
+
+def read_dict_reader(path: str) -> int:
+    with open(path, newline="") as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+def read_mapped(path: str) -> int:
+    with MappedCsvReader(path) as reader:
+        return sum(1 for _ in reader)
+
+def bench(func, path: str, repeat: int = 3) -> float:
+    """
+    Times a reader function.
+    
+    Args:
+        func: Function called with the file path, returning the row count
+        path: File to read
+        repeat: Number of runs, the fastest is reported
+    
+    Returns:
+        Best time in seconds
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(path)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main() -> None:
+    """
+    Runs every benchmark case and prints the rows per second of each reader.
+    """
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300000
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for label, quoted in (("plain", False), ("quoted", True)):
+            path = os.path.join(temp_dir, f"{label}.csv")
+            write_file(path, rows, quoted)
+            for name, func in (("csv.DictReader", read_dict_reader), ("MappedCsvReader", read_mapped)):
+                elapsed = bench(func, path)
+                print(f"{label:<7} {name:<16} {elapsed:8.3f}s {rows / elapsed:12.0f} rows/sec")
+
+if __name__ == "__main__":
+    main()
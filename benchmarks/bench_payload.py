@@ -0,0 +1,63 @@
+"""
+Microbenchmarks for request payload encoding.
+
+Compares the generic json.dumps of a whole CSV row, as done by
+requests.post(json=...), with a PayloadBuilder that sends a fixed field list,
+for a narrow row and for a wide export with many unused columns.
+
+Usage:
+    python benchmarks/bench_payload.py [iterations]
+"""
+
+import os
+import sys
+import json
+import timeit
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.payload import PayloadBuilder
+
+# ============================================================================
+# Benchmark Cases
+# ============================================================================
+
+NARROW_ROW = {"email": "alice@example.com", "name": "Alice Example", "role": "admin"}
+
+WIDE_ROW = dict(NARROW_ROW, **{f"column_{i}": f"value of unused column {i}" for i in range(40)})
+
+FIELDS = ["email", "name", "role"]
+
+def bench(func, row: dict, iterations: int) -> float:
+    """
+    Times an encoding function.
+    
+    Args:
+        func: Function called with the row
+        row: Row to encode
+        iterations: Number of calls
+        
+    Returns:
+        Average time per row in nanoseconds
+    """
+    return timeit.timeit(lambda: func(row), number=iterations) / iterations * 1e9
+
+def main() -> None:
+    """
+    Runs every benchmark case and prints the per-row cost and body size.
+    """
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    for label, row in (("narrow", NARROW_ROW), ("wide", WIDE_ROW)):
+        cases = {
+            "json.dumps": lambda data: json.dumps(data).encode(),
+            "builder": PayloadBuilder(FIELDS, compress=False).encode,
+            "builder all": PayloadBuilder(list(row), compress=False).encode,
+            "builder gzip": lambda data, builder=PayloadBuilder(list(row), compress=True, compress_min_bytes=0): builder.build(data)[0],
+        }
+        for name, func in cases.items():
+            size = len(func(row))
+            print(f"{label:<7} {name:<13} {bench(func, row, iterations):9.1f} ns/row {size:6d} bytes")
+
+if __name__ == "__main__":
+    main()
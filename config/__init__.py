@@ -9,28 +9,64 @@ This package provides configuration settings for the user account management sys
 # =============================================================================
 from .settings import (
     # API settings
-    API_URL, MAX_RETRIES,
+    API_URL, MAX_RETRIES, CONCURRENCY, SHUTDOWN_TIMEOUT, SHARD_DIR, SHARD_LOCK_TIMEOUT, SHARD_CHECKPOINT_INTERVAL,
+    RETRY_BACKOFF, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    CONNECT_TIMEOUT, READ_TIMEOUT, REQUEST_DEADLINE, HEDGE_AFTER, ERROR_BODY_LIMIT,
+    PAYLOAD_FIELDS, PAYLOAD_GZIP, PAYLOAD_GZIP_MIN_BYTES, PAYLOAD_GZIP_LEVEL,
     
     # Logging settings
-    LOG_FILE, LOG_LEVEL, LOG_FORMAT_TYPE, LOG_FORMAT_STR,
+    LOG_FILE, LOG_LEVEL, LOG_FORMAT_TYPE, LOG_FORMAT_STR, PROGRESS_INTERVAL, REPORT_FORMAT,
+    PROFILE_TOP, PROFILE_HOOKS,
+    LOG_ROTATION, LOG_MAX_BYTES, LOG_ROTATE_WHEN, LOG_BACKUP_COUNT, LOG_COMPRESS,
+    LOG_BUFFER_CAPACITY, LOG_FLUSH_INTERVAL, LOG_FLUSH_LEVEL, LOG_FLUSH_BURST,
     
     # Directory settings
     LOGS_DIR, DATA_DIR,
     
+    # Outcome store settings
+    OUTCOME_DB, OUTCOME_BATCH_SIZE,
+    
+    # Scheduling settings
+    PRIORITY_RULES, PRIORITY_DEFAULT, SEND_QUEUE_SIZE,
+    
+    # Load test settings
+    LOAD_TEST_WINDOW, LOAD_TEST_MAX_IN_FLIGHT,
+    
     # Validation settings
-    REQUIRED_FIELDS
+    REQUIRED_FIELDS, VALIDATION_RULES,
+    
+    # Dry run settings
+    REJECTS_FILE, DRY_RUN_WORKERS, DRY_RUN_CHUNK_SIZE
 )
 
 __all__ = [
     # API settings
-    'API_URL', 'MAX_RETRIES',
+    'API_URL', 'MAX_RETRIES', 'CONCURRENCY', 'SHUTDOWN_TIMEOUT', 'SHARD_DIR', 'SHARD_LOCK_TIMEOUT', 'SHARD_CHECKPOINT_INTERVAL',
+    'RETRY_BACKOFF', 'RETRY_BASE_DELAY', 'RETRY_MAX_DELAY',
+    'CONNECT_TIMEOUT', 'READ_TIMEOUT', 'REQUEST_DEADLINE', 'HEDGE_AFTER', 'ERROR_BODY_LIMIT',
+    'PAYLOAD_FIELDS', 'PAYLOAD_GZIP', 'PAYLOAD_GZIP_MIN_BYTES', 'PAYLOAD_GZIP_LEVEL',
     
     # Logging settings
-    'LOG_FILE', 'LOG_LEVEL', 'LOG_FORMAT_TYPE', 'LOG_FORMAT_STR',
+    'LOG_FILE', 'LOG_LEVEL', 'LOG_FORMAT_TYPE', 'LOG_FORMAT_STR', 'PROGRESS_INTERVAL', 'REPORT_FORMAT',
+    'PROFILE_TOP', 'PROFILE_HOOKS',
+    'LOG_ROTATION', 'LOG_MAX_BYTES', 'LOG_ROTATE_WHEN', 'LOG_BACKUP_COUNT', 'LOG_COMPRESS',
+    'LOG_BUFFER_CAPACITY', 'LOG_FLUSH_INTERVAL', 'LOG_FLUSH_LEVEL', 'LOG_FLUSH_BURST',
     
     # Directory settings
     'LOGS_DIR', 'DATA_DIR',
     
+    # Outcome store settings
+    'OUTCOME_DB', 'OUTCOME_BATCH_SIZE',
+    
+    # Scheduling settings
+    'PRIORITY_RULES', 'PRIORITY_DEFAULT', 'SEND_QUEUE_SIZE',
+    
+    # Load test settings
+    'LOAD_TEST_WINDOW', 'LOAD_TEST_MAX_IN_FLIGHT',
+    
     # Validation settings
-    'REQUIRED_FIELDS'
+    'REQUIRED_FIELDS', 'VALIDATION_RULES',
+    
+    # Dry run settings
+    'REJECTS_FILE', 'DRY_RUN_WORKERS', 'DRY_RUN_CHUNK_SIZE'
 ]
@@ -2,6 +2,7 @@
 Configuration settings for the user account creation system
 """
 import os
+import json
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -38,10 +39,59 @@ if not os.path.exists(DATA_DIR):
 API_URL = os.getenv("API_URL", "http://localhost:5000/api/create_user")
 MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
 
+# Retry backoff: "exponential" (base, 2x base, 4x base, ...) or "decorrelated" (jittered)
+RETRY_BACKOFF = os.getenv("RETRY_BACKOFF", "exponential").lower()
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "2"))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "30"))
+
+# Per-attempt timeouts, total deadline per row (0 = none) and hedging delay (0 = disabled)
+CONNECT_TIMEOUT = float(os.getenv("CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("READ_TIMEOUT", "27"))
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "0"))
+HEDGE_AFTER = float(os.getenv("HEDGE_AFTER", "0"))
+
+# Maximum number of bytes read from an error response body
+ERROR_BODY_LIMIT = int(os.getenv("ERROR_BODY_LIMIT", "4096"))
+
+# Comma-separated CSV columns sent to the API (empty sends every column)
+PAYLOAD_FIELDS = [field.strip() for field in os.getenv("PAYLOAD_FIELDS", "").split(",") if field.strip()]
+
+# Gzip request bodies of at least PAYLOAD_GZIP_MIN_BYTES (the API must accept Content-Encoding: gzip)
+PAYLOAD_GZIP = os.getenv("PAYLOAD_GZIP", "false").lower() in ("1", "true", "yes")
+PAYLOAD_GZIP_MIN_BYTES = int(os.getenv("PAYLOAD_GZIP_MIN_BYTES", "1024"))
+PAYLOAD_GZIP_LEVEL = int(os.getenv("PAYLOAD_GZIP_LEVEL", "6"))
+
+# Number of create_user requests in flight at once
+CONCURRENCY = int(os.getenv("CONCURRENCY", "1"))
+
+# Seconds in-flight requests are given to finish after SIGINT/SIGTERM
+SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "30"))
+
+# Shared directory used to coordinate sharded imports
+SHARD_DIR = os.getenv("SHARD_DIR", os.path.join(DATA_DIR, "shards"))
+
+# Seconds after which a shard lock no longer refreshed by its worker is considered stale
+SHARD_LOCK_TIMEOUT = float(os.getenv("SHARD_LOCK_TIMEOUT", "60"))
+
+# Minimum seconds between checkpoint writes of a shard being processed
+SHARD_CHECKPOINT_INTERVAL = float(os.getenv("SHARD_CHECKPOINT_INTERVAL", "1"))
+
 # ============================================================================
 # Logging Configuration
 # ============================================================================
 
+# Seconds between progress reports during an import (0 disables progress reporting)
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", "2"))
+
+# Format of the run report printed at the end of an import (text or json)
+REPORT_FORMAT = os.getenv("REPORT_FORMAT", "text").lower()
+
+# Number of functions listed in the --profile summary
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "30"))
+
+# Record call timings of the validation and API utilities (read at import time)
+PROFILE_HOOKS = os.getenv("PROFILE_HOOKS", "false").lower() in ("1", "true", "yes")
+
 # Log file path
 LOG_FILE = os.path.join(LOGS_DIR, os.getenv("LOG_FILE", "error_log.txt"))
 
@@ -55,7 +105,82 @@ LOG_FORMAT_TYPE = os.getenv("LOG_FORMAT", "text").lower()
 # Always define LOG_FORMAT_STR, even for JSON format (will be used for text format only)
 LOG_FORMAT_STR = "%(asctime)s:%(levelname)s:%(message)s" if LOG_FORMAT_TYPE != "json" else ""  # Empty string for JSON format
 
+# Error log rotation: "size" (LOG_MAX_BYTES per file), "time" (every LOG_ROTATE_WHEN) or "none"
+LOG_ROTATION = os.getenv("LOG_ROTATION", "size").lower()
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")
+
+# Number of rotated error log files kept
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+
+# Compress rotated error log files with gzip
+LOG_COMPRESS = os.getenv("LOG_COMPRESS", "false").lower() in ("1", "true", "yes")
+
+# Error log records buffered before they are written in one batch (0 writes every record immediately)
+LOG_BUFFER_CAPACITY = int(os.getenv("LOG_BUFFER_CAPACITY", "100"))
+
+# Maximum seconds a buffered record waits before it is written (0 waits for the buffer to fill)
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL", "5"))
+
+# The buffer is also written as soon as this many ERROR records are waiting (0 disables it). The error
+# log only buffers ERROR records, so a value below LOG_BUFFER_CAPACITY becomes its batch size
+LOG_FLUSH_BURST = int(os.getenv("LOG_FLUSH_BURST", "0"))
+
+# Records at or above this level are written immediately along with the buffer
+LOG_FLUSH_LEVEL = getattr(logging, os.getenv("LOG_FLUSH_LEVEL", "CRITICAL").upper(), logging.CRITICAL)
+
+# ============================================================================
+# Outcome Store Configuration
+# ============================================================================
+
+# SQLite database every row outcome is recorded in (empty disables the store)
+OUTCOME_DB = os.getenv("OUTCOME_DB", os.path.join(DATA_DIR, "outcomes.db"))
+
+# Number of outcomes written per transaction
+OUTCOME_BATCH_SIZE = int(os.getenv("OUTCOME_BATCH_SIZE", "500"))
+
+# ============================================================================
+# Scheduling Configuration
+# ============================================================================
+
+# Priority classes as a JSON object mapping field names to values and their class;
+# lower classes are sent first. Example: {"role": {"admin": 0, "executive": 0, "manager": 1}}
+PRIORITY_RULES = json.loads(os.getenv("PRIORITY_RULES", "{}"))
+
+# Priority class of rows matching no rule
+PRIORITY_DEFAULT = int(os.getenv("PRIORITY_DEFAULT", "10"))
+
+# Number of validated rows held for scheduling; a higher class row is sent ahead of
+# at most this many rows before it
+SEND_QUEUE_SIZE = int(os.getenv("SEND_QUEUE_SIZE", "10000"))
+
+# ============================================================================
+# Load Test Configuration
+# ============================================================================
+
+# Length in seconds of the windows load test results are reported in
+LOAD_TEST_WINDOW = float(os.getenv("LOAD_TEST_WINDOW", "10"))
+
+# Number of load test requests in flight at once; later requests wait for a free worker
+LOAD_TEST_MAX_IN_FLIGHT = int(os.getenv("LOAD_TEST_MAX_IN_FLIGHT", "100"))
+
 # ============================================================================
 # Data Validation Configuration
 # ============================================================================
 REQUIRED_FIELDS = os.getenv("REQUIRED_FIELDS", "email,name,role").split(",")
+
+# Per-field validation rules as a JSON object mapping field names to rules.
+# Supported rules: choices, min_length, max_length, pattern, unique. Example:
+# {"role": {"choices": ["admin", "user"]}, "name": {"max_length": 100}, "email": {"unique": true}}
+VALIDATION_RULES = json.loads(os.getenv("VALIDATION_RULES", "{}"))
+
+# ============================================================================
+# Dry Run Configuration
+# ============================================================================
+
+# File that rows rejected during a dry run are written to
+REJECTS_FILE = os.path.join(LOGS_DIR, os.getenv("REJECTS_FILE", "rejects.csv"))
+
+# Number of processes and rows per batch used for dry-run validation
+DRY_RUN_WORKERS = int(os.getenv("DRY_RUN_WORKERS", str(os.cpu_count() or 1)))
+DRY_RUN_CHUNK_SIZE = int(os.getenv("DRY_RUN_CHUNK_SIZE", "5000"))
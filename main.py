@@ -6,125 +6,706 @@ the data to an API endpoint. It validates the data, skips invalid entries,
 and logs errors.
 """
 
+import argparse
 import csv
+import json
+import itertools
 import os
 import sys
 import time
 import logging
-from typing import Dict
+import multiprocessing
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor, wait, ALL_COMPLETED, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Set, Tuple, Iterable, Callable
 
-from utils import setup_logging, validate_user_data, validate_email_address, create_user
-from config import REQUIRED_FIELDS, DATA_DIR
+from utils import setup_logging, worker_log_file, validate_user_data, validate_email_address, create_user, compile_validator, dry_run_file, ProgressReporter, ShutdownCoordinator
+from utils import split_file, run_worker, run_local_workers, merge_results, load_manifest
+from utils import RunReport, classify_rule_error, Profiler, PayloadBuilder, OutcomeStore, SendQueue, compile_priority
+from utils import MappedCsvReader, LoadProfile, run_load_test, synthetic_rows, exit_process, ShardCheckpoint
+from utils.report import ERROR_FILE, ERROR_MISSING_FIELD, ERROR_INVALID_EMAIL, ERROR_UNFINISHED
+from utils.outcomes import OUTCOME_CREATED, OUTCOME_FAILED, OUTCOME_SKIPPED, OUTCOME_UNFINISHED
+from config import REQUIRED_FIELDS, DATA_DIR, REJECTS_FILE, DRY_RUN_WORKERS, PROGRESS_INTERVAL, CONCURRENCY, SHARD_DIR, REPORT_FORMAT, OUTCOME_DB, PRIORITY_RULES
+from config import LOAD_TEST_WINDOW, LOAD_TEST_MAX_IN_FLIGHT
 
 
 
 # Configure logging
 setup_logging()
 
-def create_users(file_path: str) -> Dict[str, int]:
+def check_row(row: Dict[str, Any], validate_rules: Callable[[Dict[str, Any]], Optional[str]]) -> Optional[Tuple[str, str, str]]:
+    """
+    Runs the validation steps of an import on a row and normalizes its email address in place.
+    
+    Args:
+        row: Row read from the CSV file
+        validate_rules: Validator returned by compile_validator
+        
+    Returns:
+        None if the row is valid, otherwise a tuple containing (error class,
+        reason written to the rejects file, detail for the log)
+    """
+    # Validate user data (including required fields and email format)
+    is_valid, validation_error = validate_user_data(row)
+    if not is_valid:
+        return ERROR_MISSING_FIELD, validation_error, validation_error
+    
+    # Validate and normalize email address if present
+    if 'email' in row and row['email']:
+        valid_email, email_error = validate_email_address(row['email'])
+        if not valid_email:
+            return ERROR_INVALID_EMAIL, f"Invalid email format: {email_error}", f"invalid email format: {row['email']}"
+        # Update with normalized email address
+        row['email'] = valid_email
+    
+    # Apply the configured per-field rules (role whitelist, lengths, patterns, uniqueness)
+    rule_error = validate_rules(row)
+    if rule_error:
+        return classify_rule_error(rule_error), rule_error, rule_error
+    return None
+
+def create_users(file_path: str, progress: Optional[ProgressReporter] = None,
+                 shutdown: Optional[ShutdownCoordinator] = None, concurrency: int = CONCURRENCY,
+                 rejects_file: Optional[str] = None, outcome_store: Optional[OutcomeStore] = None,
+                 send_queue: Optional[SendQueue] = None, checkpoint: Optional[ShardCheckpoint] = None) -> RunReport:
     """
     Reads user data from a CSV file and creates users.
     Logs errors and skips rows with missing required fields.
     
+    Rows are validated in file order and up to concurrency create_user calls
+    run at the same time. When PRIORITY_RULES are configured, validated rows
+    pass through a send queue and higher priority rows are sent first. When
+    shutdown is requested no further rows are read, in-flight calls get until
+    the coordinator's deadline to finish, and the report covers everything
+    that completed. With a checkpoint, rows are numbered from its row number,
+    reading resumes at its saved position, rows it lists as finished are left
+    out, and the position is saved as rows finish.
+    
     Args:
         file_path: Path to the CSV file containing user data
+        progress: Optional progress reporter whose counters are updated as rows are processed
+        shutdown: Optional coordinator that signals when to stop reading rows
+        concurrency: Maximum number of create_user calls in flight
+        rejects_file: Optional CSV file that skipped and failed rows are written to
+        outcome_store: Optional store the outcome of every row is recorded in, as a new run
+        send_queue: Optional queue that schedules validated rows by priority; defaults to a
+            SEND_QUEUE_SIZE queue if PRIORITY_RULES are configured, and to file order otherwise
+        checkpoint: Optional shard checkpoint to resume from and save progress to, which also
+            sets the number of the first row; when it is resuming, rejects are appended to rejects_file
         
     Returns:
-        Dictionary containing summary statistics:
-        - success_count: Number of successfully created users
-        - error_count: Number of errors during user creation
-        - skipped_count: Number of rows skipped due to validation errors
+        RunReport with the success, errors, skipped and unfinished counts, whether
+        the run was interrupted, counts per error class and HTTP status, retries,
+        create_user latencies and the elapsed time
     """
+    report = RunReport()
+    started = time.perf_counter()
+    
     if not os.path.exists(file_path):
         error_msg = f"File not found: {file_path}"
         logging.error(error_msg)
-        return {"success": 0, "errors": 1, "skipped": 0}
+        report.record_error(ERROR_FILE)
+        return report
+    
+    on_retry = progress.on_retry if progress is not None else None
+    if send_queue is None:
+        # Without priority rules a one-row queue sends rows in file order as they are validated
+        send_queue = SendQueue() if PRIORITY_RULES else SendQueue(capacity=1)
+    
+    # Futures of in-flight create_user calls, mapped to their row number and row
+    pending: Dict[Future, Tuple[int, Dict[str, Any]]] = {}
+    rejects_writer = None
+    
+    def reject(row_num: int, reason: str, row: Dict[str, Any]) -> None:
+        if rejects_writer is not None:
+            rejects_writer.writerow([row_num, reason] + [row.get(field) or "" for field in reader.fieldnames])
+    
+    def skip(row_num: int, error_class: str, reason: str, row: Dict[str, Any]) -> None:
+        report.record_skip(error_class)
+        if checkpoint is not None:
+            checkpoint.finish(row_num)
+        reject(row_num, reason, row)
+        if outcome_store is not None:
+            outcome_store.record(row_num, row.get('email'), OUTCOME_SKIPPED, error_class, message=reason)
+    
+    def handle_done(done: Iterable[Future]) -> None:
+        for future in done:
+            row_num, row = pending.pop(future)
+            result = future.result()
+            error_class = report.record_result(result)
+            if checkpoint is not None:
+                checkpoint.finish(row_num)
+            if result.success:
+                logging.info(f"Successfully created user: {row['email']}")
+            else:
+                error_msg = f"Row {row_num}: Error creating user {row['email']}: {result.message}"
+                logging.error(error_msg)
+                reject(row_num, result.message, row)
+            if outcome_store is not None:
+                outcome_store.record(row_num, row['email'], OUTCOME_CREATED if result.success else OUTCOME_FAILED,
+                                     error_class, result.status_code, result.message)
+        if progress is not None:
+            progress.in_flight = len(pending)
+            progress.success, progress.errors = report.success, report.errors
+    
+    def stopping() -> bool:
+        return shutdown is not None and shutdown.requested
+    
+    def wait_for(futures: Iterable[Future], return_when: str = ALL_COMPLETED) -> Set[Future]:
+        # Returns early when a shutdown is requested, so a signal is not held up by slow requests
+        if shutdown is None:
+            return wait(futures, return_when=return_when).done
+        return shutdown.wait_for(futures, return_when)[0]
+    
+    def send(row_num: int, row: Dict[str, Any]) -> None:
+        # Wait for a free slot once concurrency calls are in flight
+        if len(pending) >= concurrency:
+            handle_done(wait_for(pending, FIRST_COMPLETED))
+            if len(pending) >= concurrency:
+                # Shutdown was requested while waiting, so the row is not sent
+                unfinished(row_num, row, "Row was not sent before shutdown")
+                return
+        future = executor.submit(create_user, row, **request_options)
+        pending[future] = (row_num, row)
+        if progress is not None:
+            progress.in_flight = len(pending)
     
-    success_count = 0
-    error_count = 0
-    skipped_count = 0
+    def save_checkpoint(force: bool = False) -> None:
+        if checkpoint is not None and (force or checkpoint.due):
+            # Rejects of the rows the checkpoint counts as finished must be on disk first
+            if rejects_handle is not None:
+                rejects_handle.flush()
+            checkpoint.save(report, force)
     
+    def unfinished(row_num: int, row: Dict[str, Any], reason: str) -> None:
+        report.record_unfinished()
+        reject(row_num, reason, row)
+        if outcome_store is not None:
+            outcome_store.record(row_num, row['email'], OUTCOME_UNFINISHED, ERROR_UNFINISHED, message=reason)
+    
+    def finish_after_error(send_queued: bool) -> None:
+        # Reading stopped early, but every row already read keeps its result or is reported unfinished
+        report.record_error(ERROR_FILE)
+        while send_queued and send_queue and not stopping():
+            send(*send_queue.pop())
+        reason = "Row was not sent before shutdown" if send_queued else "Row was not sent after an error"
+        for row_num, row in send_queue.drain():
+            unfinished(row_num, row, reason)
+        done = wait_for(set(pending))
+        if stopping():
+            report.interrupted = True
+            done, _ = shutdown.drain(set(pending))
+        handle_done(done)
+        for row_num, row in list(pending.values()):
+            unfinished(row_num, row, "Request did not finish before shutdown")
+        pending.clear()
+    
+    resuming = checkpoint is not None and checkpoint.resuming
+    rejects_handle = None
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="create-user")
     try:
-        with open(file_path, 'r') as f:
-            reader = csv.DictReader(f)
+        with MappedCsvReader(file_path) as reader, \
+             (open(rejects_file, 'a' if resuming else 'w', newline='') if rejects_file else nullcontext()) as rejects_handle:
+            # Rows are read through a memory map rather than loaded up front, so memory stays flat on large files
             if not reader.fieldnames or not all(field in reader.fieldnames for field in REQUIRED_FIELDS):
                 error_msg = f"CSV file missing required headers: {', '.join(REQUIRED_FIELDS)}"
                 logging.error(error_msg)
-                return {"success": 0, "errors": 1, "skipped": 0}
+                report.record_error(ERROR_FILE)
+                return report
             
-            # Store rows to process to make KeyboardInterrupt handling cleaner
-            rows = list(reader)
+            if rejects_handle is not None:
+                rejects_writer = csv.writer(rejects_handle)
+                if rejects_handle.tell() == 0:
+                    rejects_writer.writerow(["row", "reason"] + reader.fieldnames)
+            if outcome_store is not None:
+                outcome_store.start_run(file_path)
+            
+            # Compile the configured per-field rules, priority classes and the payload schema once for this run
+            validate_rules = compile_validator()
+            priority = compile_priority(PRIORITY_RULES)
+            request_options = {"payload_builder": PayloadBuilder.from_header(reader.fieldnames)}
+            if on_retry is not None:
+                request_options["on_retry"] = on_retry
                 
             try:
-                for row_num, row in enumerate(rows, start=2):  # Start from 2 to account for header row
-                    # Validate user data (including required fields and email format)
-                    is_valid, validation_error = validate_user_data(row)
-                    if not is_valid:
-                        error_msg = f"Row {row_num}: Skipping user creation due to {validation_error}."
-                        logging.error(error_msg)
-                        skipped_count += 1
-                        continue
-                    
-                    # Validate and normalize email address if present
-                    if 'email' in row and row['email']:
-                        valid_email, email_error = validate_email_address(row['email'])
-                        if not valid_email:
-                            error_msg = f"Row {row_num}: Skipping user creation due to invalid email format: {row['email']}."
-                            logging.error(error_msg)
-                            skipped_count += 1
+                records = reader.records(checkpoint.offset, checkpoint.row_num) if checkpoint is not None else reader
+                for record in records:  # Row numbers start from 2 to account for header row
+                    row_num, row = record.row_num, record.row
+                    if stopping():
+                        report.interrupted = True
+                        break
+                    if progress is not None:
+                        progress.rows += 1
+                        progress.bytes_read = record.end
+                        progress.skipped = report.skipped
+                    if checkpoint is not None:
+                        checkpoint.start(row_num, record.offset, record.end)
+                        if row_num in checkpoint.done:
+                            # Finished by the interrupted run this one resumes
+                            checkpoint.finish(row_num)
                             continue
-                        else:
-                            # Update with normalized email address
-                            row['email'] = valid_email
+                        save_checkpoint()
                     
-                    # Create user
-                    success, error_message = create_user(row)
-                    if success:
-                        success_count += 1
-                        logging.info(f"Successfully created user: {row['email']}")
-                    else:
-                        error_count += 1
-                        error_msg = f"Row {row_num}: Error creating user {row['email']}: {error_message}"
+                    # Validate the row and normalize its email address
+                    rejection = check_row(row, validate_rules)
+                    if rejection is not None:
+                        error_class, reason, detail = rejection
+                        error_msg = f"Row {row_num}: Skipping user creation due to {detail}."
                         logging.error(error_msg)
+                        skip(row_num, error_class, reason, row)
+                        continue
+                    
+                    # Queue the row and create the most urgent queued user once the queue is full
+                    send_queue.push(priority(row), (row_num, row), source=file_path)
+                    if send_queue.full:
+                        send(*send_queue.pop())
+                
+                # Send the rows still queued at the end of the file
+                while send_queue and not stopping():
+                    send(*send_queue.pop())
+                if not stopping():
+                    handle_done(wait_for(set(pending)))
+                
+                if stopping():
+                    report.interrupted = True
+                    logging.warning(f"Shutdown requested, waiting for {len(pending)} in-flight requests, "
+                                    f"{len(send_queue)} queued rows are not sent")
+                    # Queued rows were accepted but not sent, so they are reported like unfinished requests
+                    for row_num, row in send_queue.drain():
+                        unfinished(row_num, row, "Row was not sent before shutdown")
+                    done, not_done = shutdown.drain(set(pending))
+                    handle_done(done)
+                    for future in not_done:
+                        row_num, row = pending.pop(future)
+                        logging.error(f"Row {row_num}: Request for user {row['email']} did not finish before shutdown")
+                        unfinished(row_num, row, "Request did not finish before shutdown")
+            except csv.Error as e:
+                # Also raised for rows that are not valid UTF-8. Rows before the error have already
+                # been validated, so send the queued ones and keep their results
+                logging.error(f"CSV parsing error: {str(e)}")
+                finish_after_error(send_queued=True)
             except KeyboardInterrupt:
-                logging.warning(f"User creation process interrupted by user after processing {success_count + error_count + skipped_count} rows")
+                report.interrupted = True
+                logging.warning(f"User creation process interrupted by user after processing {report.rows} rows")
                 # Re-raise to let the main handler deal with it
                 raise
+            except Exception as e:
+                logging.error(f"Unexpected error processing file: {str(e)}")
+                finish_after_error(send_queued=False)
+            save_checkpoint(force=True)
     except csv.Error as e:
         error_msg = f"CSV parsing error: {str(e)}"
         logging.error(error_msg)
-        return {"success": 0, "errors": 1, "skipped": 0}
+        report.record_error(ERROR_FILE)
     except Exception as e:
         error_msg = f"Unexpected error processing file: {str(e)}"
         logging.error(error_msg)
+        report.record_error(ERROR_FILE)
+    finally:
+        executor.shutdown(wait=not report.interrupted, cancel_futures=True)
+        report.elapsed = time.perf_counter() - started
+        if outcome_store is not None:
+            outcome_store.finish_run(report)
+    
+    if progress is not None:
+        progress.in_flight = len(pending)
+        progress.success, progress.errors, progress.skipped = report.success, report.errors, report.skipped
+    
+    return report
+
+def run_shard_worker(shard_dir: str, concurrency: int = CONCURRENCY) -> List[int]:
+    """
+    Runs create_users on shards claimed from a shard directory until none are left.
+    
+    Used both as the target of local worker processes and by --worker on other nodes.
+    SIGINT/SIGTERM stop the current shard gracefully and release it for another worker.
+    
+    Args:
+        shard_dir: Shared shard directory
+        concurrency: Maximum number of create_user calls in flight per shard
+        
+    Returns:
+        Indexes of the shards this worker finished
+    """
+    shutdown = ShutdownCoordinator().install()
+    outcome_store = OutcomeStore() if OUTCOME_DB else None
+    try:
+        return run_worker(
+            shard_dir,
+            lambda path, rejects, checkpoint: create_users(path, shutdown=shutdown, concurrency=concurrency,
+                                                           rejects_file=rejects, outcome_store=outcome_store,
+                                                           checkpoint=checkpoint),
+            should_stop=lambda: shutdown.requested
+        )
+    finally:
+        shutdown.restore()
+        if outcome_store is not None:
+            outcome_store.close()
+        # Worker processes exit without logging.shutdown(), so write out buffered records here
+        shutdown.flush_logs()
+
+def run_shard_worker_process(shard_dir: str, concurrency: int = CONCURRENCY) -> None:
+    """
+    Entry point of a local worker process started by run_sharded.
+    
+    Logs errors to a file of its own, since rotation of one file is not
+    coordinated between processes, runs run_shard_worker, then exits without
+    waiting for requests abandoned at the shutdown deadline.
+    
+    Args:
+        shard_dir: Shared shard directory
+        concurrency: Maximum number of create_user calls in flight per shard
+    """
+    setup_logging(worker_log_file(multiprocessing.current_process().name))
+    run_shard_worker(shard_dir, concurrency)
+    exit_process(0)
+
+def run_sharded(args: argparse.Namespace) -> int:
+    """
+    Runs a sharded import: splits the input (or resumes an existing split),
+    processes the shards with local worker processes, and merges the results.
+    With --worker only the shards of an existing shard directory are processed.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Exit code (0 for success, 1 for errors or unfinished shards, 128 + signal number if stopped by a signal)
+    """
+    manifest_path = os.path.join(args.shard_dir, "manifest.json")
+    if not args.worker:
+        if os.path.exists(manifest_path):
+            if load_manifest(args.shard_dir)["source"] != os.path.abspath(args.file_path):
+                logging.error(f"Shard directory '{args.shard_dir}' belongs to a different input file")
+                return 1
+            logging.info(f"Resuming sharded import from {args.shard_dir}")
+        else:
+            try:
+                split_file(args.file_path, args.shard_dir, args.shards, args.shard_by)
+            except FileNotFoundError:
+                logging.error(f"File not found: {args.file_path}")
+                return 1
+            except (OSError, ValueError, csv.Error) as e:
+                logging.error(f"Could not split {args.file_path} into shards: {str(e)}")
+                return 1
+    elif not os.path.exists(manifest_path):
+        logging.error(f"No shard manifest found in '{args.shard_dir}'")
+        return 1
+    
+    # Workers handle signals themselves; the coordinator just waits for them and merges
+    shutdown = ShutdownCoordinator().install()
+    try:
+        if args.worker:
+            run_shard_worker(args.shard_dir, args.concurrency)
+        else:
+            processes = args.processes or args.shards or len(load_manifest(args.shard_dir)["shards"])
+            run_local_workers(args.shard_dir, processes, run_shard_worker_process, (args.concurrency,))
+    finally:
+        shutdown.restore()
+    
+    started = time.perf_counter()
+    merged = merge_results(args.shard_dir, rejects_file=args.rejects or REJECTS_FILE)
+    report = merged["report"]
+    report.elapsed = max(report.elapsed, time.perf_counter() - started)
+    print_summary(report, args.report_format, shards=(merged["completed"], merged["shards"]))
     
-    # Create summary dictionary
-    summary = {
-        "success": success_count,
-        "errors": error_count,
-        "skipped": skipped_count
-    }
+    if shutdown.requested:
+        shutdown.flush_logs()
+        return shutdown.exit_code()
+    return 0 if report.errors == 0 and not report.interrupted else 1
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line arguments.
     
-    return summary
+    Args:
+        argv: Arguments to parse, defaults to sys.argv[1:]
+        
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(description="Create user accounts from a CSV file.")
+    parser.add_argument("file_path", nargs="?", default=os.path.join(DATA_DIR, "users.csv"),
+                        help="Path to the CSV file with user data (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY,
+                        help="Number of create_user requests in flight at once (default: %(default)s)")
+    parser.add_argument("--progress-interval", type=float, default=PROGRESS_INTERVAL,
+                        help="Seconds between progress reports, 0 to disable (default: %(default)s)")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="Split the input into this many shards and import them in parallel processes")
+    parser.add_argument("--shard-by", choices=("bytes", "email"), default="bytes",
+                        help="Split by contiguous byte ranges or by a hash of the email (default: %(default)s)")
+    parser.add_argument("--shard-dir", default=SHARD_DIR,
+                        help="Shared directory used to coordinate shards (default: %(default)s)")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="Number of local worker processes for a sharded import (default: one per shard)")
+    parser.add_argument("--worker", action="store_true",
+                        help="Process shards of an existing shard directory, e.g. from another node")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Validate the file and report skipped rows without calling the API")
+    parser.add_argument("--rejects", default=None,
+                        help="CSV file rejected rows are written to (dry runs and sharded imports default to REJECTS_FILE)")
+    parser.add_argument("--report-format", choices=("text", "json"), default=REPORT_FORMAT,
+                        help="Format of the run report printed at the end (default: %(default)s)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Profile the import and write the profile and a hot function summary to LOGS_DIR")
+    parser.add_argument("--workers", type=int, default=DRY_RUN_WORKERS,
+                        help="Dry run only: number of validation processes (default: %(default)s)")
+    parser.add_argument("--load-test", action="store_true",
+                        help="Replay the file's valid rows against the API at a fixed rate and report latency per window")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="Load test only: send generated rows with unique emails instead of the file's rows")
+    parser.add_argument("--rate", type=float, default=10,
+                        help="Load test only: requests per second, at the start of a ramp (default: %(default)s)")
+    parser.add_argument("--ramp-to", type=float, default=None,
+                        help="Load test only: ramp the rate linearly up or down to this many requests per second")
+    parser.add_argument("--duration", type=float, default=60,
+                        help="Load test only: length of the test in seconds (default: %(default)s)")
+    parser.add_argument("--window", type=float, default=LOAD_TEST_WINDOW,
+                        help="Load test only: seconds per reporting window (default: %(default)s)")
+    parser.add_argument("--max-in-flight", type=int, default=LOAD_TEST_MAX_IN_FLIGHT,
+                        help="Load test only: requests in flight at once (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.load_test and (args.rate < 0 or (args.ramp_to or 0) < 0 or args.duration <= 0 or args.window <= 0):
+        parser.error("--rate and --ramp-to must not be negative, --duration and --window must be positive")
+    return args
 
-def main() -> int:
+def print_summary(report: RunReport, output_format: str = "text", shards: Optional[Tuple[int, int]] = None) -> None:
+    """
+    Prints the report of a user creation run.
+    
+    Args:
+        report: RunReport returned by create_users or merged from shards
+        output_format: "text" or "json"
+        shards: Optional (completed, total) shard counts of a sharded import
+    """
+    if output_format == "json":
+        data = report.to_dict()
+        if shards is not None:
+            data["shards_completed"], data["shards"] = shards
+        print(json.dumps(data, indent=2))
+        return
+    print("\n" + report.format_text())
+    if shards is not None:
+        print(f"  Shards completed: {shards[0]}/{shards[1]}")
+
+def parse_status_args(argv: List[str]) -> argparse.Namespace:
+    """
+    Parses the arguments of the status command.
+    
+    Args:
+        argv: Arguments after "status"
+        
+    Returns:
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="main.py status",
+                                     description="Look up recorded outcomes of users, or list recent runs.")
+    parser.add_argument("emails", nargs="*",
+                        help="Email addresses to look up; without any, recent runs are listed")
+    parser.add_argument("--runs", type=int, default=10,
+                        help="Number of recent runs listed (default: %(default)s)")
+    parser.add_argument("--db", default=OUTCOME_DB,
+                        help="Outcome database (default: %(default)s)")
+    parser.add_argument("--format", choices=("text", "json"), default=REPORT_FORMAT,
+                        help="Output format (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def _format_time(timestamp: Optional[float]) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp)) if timestamp else "-"
+
+def run_status(argv: List[str]) -> int:
+    """
+    Prints the recorded outcomes of email addresses, or the outcome counts of recent runs.
+    
+    Args:
+        argv: Arguments after "status"
+        
+    Returns:
+        Exit code (0 if every email given was created in some run, 1 otherwise or if there is no store)
+    """
+    args = parse_status_args(argv)
+    if not args.db or not os.path.exists(args.db):
+        print(f"No outcome store found at '{args.db}'")
+        return 1
+    
+    with OutcomeStore(args.db) as store:
+        if not args.emails:
+            runs = store.run_counts(args.runs)
+            if args.format == "json":
+                print(json.dumps(runs, indent=2))
+                return 0
+            print(f"{'Run':>5}  {'Started':<19}  {'Created':>8}  {'Failed':>8}  {'Skipped':>8}  {'Unfinished':>10}  Source")
+            for run in runs:
+                note = " (interrupted)" if run["interrupted"] else "" if run["finished"] else " (running or crashed)"
+                print(f"{run['id']:>5}  {_format_time(run['started']):<19}  {run['created']:>8}  {run['failed']:>8}  "
+                      f"{run['skipped']:>8}  {run['unfinished']:>10}  {run['source']}{note}")
+            return 0
+        
+        # Outcomes are stored under the normalized address
+        results = {email: store.lookup(validate_email_address(email)[0] or email.strip()) for email in args.emails}
+    
+    created = all(any(entry["outcome"] == OUTCOME_CREATED for entry in entries) for entries in results.values())
+    if args.format == "json":
+        print(json.dumps(results, indent=2))
+        return 0 if created else 1
+    for email, entries in results.items():
+        created_in = [entry["run_id"] for entry in entries if entry["outcome"] == OUTCOME_CREATED]
+        if created_in:
+            print(f"{email}: created in run {created_in[0]}")
+        elif entries:
+            print(f"{email}: not created")
+        else:
+            print(f"{email}: no recorded outcome")
+        for entry in entries:
+            detail = entry["outcome"]
+            if entry["error_class"]:
+                detail += f" ({entry['error_class']}{' ' + str(entry['status_code']) if entry['status_code'] else ''})"
+            if entry["message"]:
+                detail += f": {entry['message']}"
+            print(f"  {_format_time(entry['started'])}  run {entry['run_id']}  row {entry['row_num']}  {detail}  [{entry['source']}]")
+    return 0 if created else 1
+
+def load_test_rows(file_path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Reads the rows of a CSV file that an import would send.
+    
+    Args:
+        file_path: Path to the CSV file containing user data
+        
+    Returns:
+        Tuple containing (valid rows with normalized emails, header fields)
+        
+    Raises:
+        ValueError: If the file lacks a required header
+    """
+    validate_rules = compile_validator()
+    with MappedCsvReader(file_path) as reader:
+        if not reader.fieldnames or not all(field in reader.fieldnames for field in REQUIRED_FIELDS):
+            raise ValueError(f"CSV file missing required headers: {', '.join(REQUIRED_FIELDS)}")
+        rows = [record.row for record in reader if check_row(record.row, validate_rules) is None]
+        return rows, reader.fieldnames
+
+def run_load(args: argparse.Namespace) -> int:
+    """
+    Runs a load test with the rate, ramp and windows given on the command line.
+    
+    Rows are sent once each, without retries, so the API sees exactly the
+    offered rate. Real rows are replayed from the start when the file runs out.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Exit code (0 if the test ran, 1 if there were no rows to send, 128 + signal number if stopped by a signal)
+    """
+    if args.synthetic:
+        rows, fieldnames = synthetic_rows(), REQUIRED_FIELDS
+    else:
+        try:
+            valid_rows, fieldnames = load_test_rows(args.file_path)
+        except (OSError, ValueError, csv.Error) as e:
+            logging.error(f"Cannot load test with {args.file_path}: {str(e)}")
+            return 1
+        if not valid_rows:
+            logging.error(f"No valid rows to load test with in {args.file_path}")
+            return 1
+        rows = itertools.cycle(valid_rows)
+    
+    profile = LoadProfile(args.rate, args.duration, args.ramp_to)
+    logging.info(f"Starting load test at {args.rate:g}"
+                 f"{f' to {args.ramp_to:g}' if args.ramp_to is not None else ''} requests/sec for {args.duration:g}s")
+    with ShutdownCoordinator() as shutdown:
+        report = run_load_test(rows, profile, window=args.window, max_in_flight=args.max_in_flight, shutdown=shutdown,
+                               payload_builder=PayloadBuilder.from_header(fieldnames), max_retries=0)
+    
+    if args.report_format == "json":
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print("\n" + report.format_text())
+    if report.interrupted:
+        shutdown.flush_logs()
+        return shutdown.exit_code()
+    return 0
+
+def print_dry_run_report(report: Dict[str, Any]) -> None:
+    """
+    Prints the result of a dry run, including a histogram of rejection reasons.
+    
+    Args:
+        report: Dictionary returned by dry_run_file
+    """
+    print(f"\nDry run summary:\n  Rows: {report['rows']}\n  Valid: {report['valid']}"
+          f"\n  Skipped: {report['skipped']}"
+          f"\n  Duplicate emails: {report['duplicates']} (included in valid; add a unique rule for email to skip them)"
+          f"\n  Elapsed: {report['elapsed']:.2f}s ({report['rows_per_sec']:,.0f} rows/sec)")
+    if report["reasons"]:
+        print("\nRejection reasons:")
+        width = max(len(reason) for reason in report["reasons"])
+        for reason, count in report["reasons"].most_common():
+            print(f"  {reason:<{width}}  {count}")
+
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Main function that runs the user creation process.
     
+    Args:
+        argv: Command line arguments, defaults to sys.argv[1:]
+    
     Returns:
-        Exit code (0 for success, 1 for error)
+        Exit code (0 for success, 1 for error, 128 + signal number if stopped by a signal)
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    # "status" is a subcommand; checked first since the optional file path would take it otherwise
+    if argv and argv[0] == "status":
+        return run_status(argv[1:])
+    
+    args = parse_args(argv)
+    
+    if args.dry_run:
+        logging.info("Starting dry run")
+        report = dry_run_file(args.file_path, rejects_file=args.rejects or REJECTS_FILE, workers=args.workers)
+        print_dry_run_report(report)
+        return 0 if report["errors"] == 0 else 1
+    
+    if args.load_test:
+        return run_load(args)
+    
+    if args.shards or args.worker:
+        return run_sharded(args)
+    
     # Log start of process
     logging.info("Starting user creation process")
     start_time = time.time()
     
+    progress = None
+    if args.progress_interval > 0:
+        total_bytes = os.path.getsize(args.file_path) if os.path.isfile(args.file_path) else 0
+        progress = ProgressReporter(total_bytes=total_bytes, interval=args.progress_interval).start()
+    
+    # Stop reading rows on SIGINT/SIGTERM and let in-flight requests finish
+    shutdown = ShutdownCoordinator().install()
+    
+    # Profile the import itself, including its worker threads, with --profile
+    profiler = Profiler() if args.profile else None
+    outcome_store = OutcomeStore() if OUTCOME_DB else None
+    
     try:
-        # Get file path from command line arguments or use default
-        default_file = os.path.join(DATA_DIR, "users.csv")
-        file_path = sys.argv[1] if len(sys.argv) > 1 else default_file
-        
-        # Create users and get summary
-        summary = create_users(file_path)
+        # Create users and get the run report
+        try:
+            with profiler if profiler is not None else nullcontext():
+                report = create_users(args.file_path, progress=progress, shutdown=shutdown,
+                                      concurrency=args.concurrency, rejects_file=args.rejects,
+                                      outcome_store=outcome_store)
+        finally:
+            shutdown.restore()
+            if outcome_store is not None:
+                outcome_store.close()
+            if progress is not None:
+                progress.stop()
+            if profiler is not None:
+                profiler.write()
         
         # Log completion
         elapsed = time.time() - start_time
@@ -135,8 +716,14 @@ def main() -> int:
         logging.error(f"Error in user creation process after {elapsed:.2f}s: {str(e)}")
         return 1  # Error
     
+    print_summary(report, args.report_format)
+    
+    if report.interrupted:
+        shutdown.flush_logs()
+        return shutdown.exit_code()
+    
     # Return exit code based on whether there were errors
-    return 0 if summary["errors"] == 0 else 1
+    return 0 if report.errors == 0 else 1
 
 def handle_keyboard_interrupt():
     """
@@ -148,16 +735,9 @@ def handle_keyboard_interrupt():
 
 if __name__ == "__main__":
     try:
-        # Run main function and get exit code
+        # Run main function and exit with its exit code
         exit_code = main()
-        
-        # Get the summary from create_users for display
-        # This is only done when running as a script, not during imports/tests
-        file_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(DATA_DIR, "users.csv")
-        summary = create_users(file_path)
-        print(f"\nSummary:\n  Success: {summary['success']}\n  Errors: {summary['errors']}\n  Skipped: {summary['skipped']}")
-
-        
-        sys.exit(exit_code)
     except KeyboardInterrupt:
-        sys.exit(handle_keyboard_interrupt())
\ No newline at end of file
+        exit_code = handle_keyboard_interrupt()
+    # Requests abandoned at the shutdown deadline must not hold the process open
+    exit_process(exit_code)
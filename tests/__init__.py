@@ -13,3 +13,15 @@ including tests for validation, API communication, configuration, and logging.
 # test_config.py - Tests for configuration settings
 # test_logging_utils.py - Tests for logging utilities
 # test_main.py - Tests for the main script functionality
+# test_dry_run.py - Tests for dry-run validation
+# test_progress.py - Tests for progress reporting
+# test_shutdown.py - Tests for graceful shutdown
+# test_sharding.py - Tests for sharded imports
+# test_policies.py - Tests for retry and timeout policies
+# test_report.py - Tests for run reports
+# test_profiling.py - Tests for profiling support
+# test_payload.py - Tests for request payload encoding
+# test_outcomes.py - Tests for the outcome store
+# test_scheduling.py - Tests for send scheduling
+# test_csv_reader.py - Tests for the memory-mapped CSV reader
+# test_load_test.py - Tests for load testing
@@ -2,12 +2,27 @@ import unittest
 from unittest.mock import patch, MagicMock
 import os
 import sys
+import time
+import json
+import threading
+import gzip
 import requests
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.api import create_user
+from utils.api import create_user, parse_error_body, RESULT_HTTP_STATUS, RESULT_CONNECTION, RESULT_DEADLINE
+from utils.api import _get_hedge_executor
+from utils.policies import RetryPolicy, TimeoutPolicy
+from utils.payload import PayloadBuilder
+
+
+def make_response(status_code, body=b"", content_type="application/json"):
+    """Builds a mock streamed response with the given body"""
+    response = MagicMock(status_code=status_code, headers={"Content-Type": content_type})
+    response.iter_content.return_value = [body] if body else []
+    return response
 
 
 class TestAPI(unittest.TestCase):
@@ -17,40 +32,43 @@ class TestAPI(unittest.TestCase):
     def test_successful_user_creation(self, mock_post):
         """Test successful user creation"""
         # Setup mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 201
-        mock_response.json.return_value = {"success": True, "message": "User created successfully"}
+        mock_response = make_response(201, json.dumps({"success": True, "message": "User created successfully"}).encode())
         mock_post.return_value = mock_response
         
         # Test data
         user_data = {"email": "test@example.com", "name": "Test User", "role": "user"}
         
         # Call function
-        success, message = create_user(user_data)
+        result = create_user(user_data)
         
         # Assertions
-        self.assertTrue(success)
-        self.assertEqual(message, "")
+        self.assertTrue(result.success)
+        self.assertEqual(result.message, "")
         mock_post.assert_called_once()
+        # The body is sent pre-encoded as compact JSON
+        self.assertEqual(json.loads(mock_post.call_args.kwargs["data"]), user_data)
+        self.assertEqual(mock_post.call_args.kwargs["headers"]["Content-Type"], "application/json")
+        # Success bodies are never read
+        mock_response.iter_content.assert_not_called()
     
     @patch('utils.api.requests.post')
     def test_api_error_response(self, mock_post):
         """Test API error response handling"""
         # Setup mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 400
-        mock_response.json.return_value = {"success": False, "message": "Email already exists"}
+        mock_response = make_response(400, json.dumps({"success": False, "message": "Email already exists"}).encode())
         mock_post.return_value = mock_response
         
         # Test data
         user_data = {"email": "existing@example.com", "name": "Existing User", "role": "user"}
         
         # Call function
-        success, message = create_user(user_data)
+        result = create_user(user_data)
         
         # Assertions
-        self.assertFalse(success)
-        self.assertIn("Email already exists", message)
+        self.assertFalse(result.success)
+        self.assertIn("Email already exists", result.message)
+        self.assertEqual(result.kind, RESULT_HTTP_STATUS)
+        self.assertEqual(result.status_code, 400)
     
     @patch('utils.api.requests.post')
     def test_connection_error_with_retry(self, mock_post):
@@ -58,20 +76,48 @@ class TestAPI(unittest.TestCase):
         # Setup mock to raise ConnectionError on first call, then succeed
         mock_post.side_effect = [
             requests.exceptions.ConnectionError("Connection refused"),
-            MagicMock(status_code=201, json=lambda: {"success": True, "message": "User created successfully"})
+            make_response(201)
         ]
         
         # Test data
         user_data = {"email": "test@example.com", "name": "Test User", "role": "user"}
         
         # Call function with max_retries=1 to make test faster
-        success, message = create_user(user_data, max_retries=1)
+        result = create_user(user_data, max_retries=1)
         
         # Assertions
-        self.assertTrue(success)
-        self.assertEqual(message, "")
+        self.assertTrue(result.success)
+        self.assertEqual(result.message, "")
+        self.assertEqual(result.retries, 1)
         self.assertEqual(mock_post.call_count, 2)  # Should be called twice due to retry
     
+    @patch('utils.api.time.sleep')
+    @patch('utils.api.requests.post')
+    def test_payload_builder_body_reused_on_retry(self, mock_post, mock_sleep):
+        """Test a payload builder encodes the row once and every attempt sends the same gzipped bytes"""
+        mock_post.side_effect = [requests.exceptions.ConnectionError("Connection refused"), make_response(201)]
+        builder = PayloadBuilder(["email"], compress=True, compress_min_bytes=0)
+        
+        result = create_user({"email": "test@example.com", "unused": "x"}, max_retries=1, payload_builder=builder)
+        
+        self.assertTrue(result.success)
+        bodies = [call.kwargs["data"] for call in mock_post.call_args_list]
+        self.assertIs(bodies[0], bodies[1])
+        self.assertEqual(json.loads(gzip.decompress(bodies[0])), {"email": "test@example.com"})
+        self.assertEqual(mock_post.call_args.kwargs["headers"]["Content-Encoding"], "gzip")
+    
+    @patch('utils.api.time.sleep')
+    @patch('utils.api.requests.post')
+    def test_on_retry_callback(self, mock_post, mock_sleep):
+        """Test on_retry is called once per retry"""
+        mock_post.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        retries = []
+        
+        result = create_user({"email": "test@example.com"}, max_retries=2, on_retry=lambda: retries.append(1))
+        
+        self.assertFalse(result.success)
+        self.assertEqual(len(retries), 2)
+    
     @patch('utils.api.requests.post')
     def test_max_retries_exceeded(self, mock_post):
         """Test max retries exceeded"""
@@ -82,13 +128,152 @@ class TestAPI(unittest.TestCase):
         user_data = {"email": "test@example.com", "name": "Test User", "role": "user"}
         
         # Call function with max_retries=2 to make test faster
-        success, message = create_user(user_data, max_retries=2)
+        result = create_user(user_data, max_retries=2)
         
         # Assertions
-        self.assertFalse(success)
-        self.assertIn("Request failed after 2 retries", message)
+        self.assertFalse(result.success)
+        self.assertIn("Request failed after 2 retries", result.message)
+        self.assertEqual(result.kind, RESULT_CONNECTION)
         self.assertEqual(mock_post.call_count, 3)  # Initial attempt + 2 retries
 
+    
+    @patch('utils.api.time.sleep')
+    @patch('utils.api.requests.post')
+    def test_policy_timeouts_passed_to_request(self, mock_post, mock_sleep):
+        """Test per-attempt timeouts come from the timeout policy"""
+        mock_post.return_value = make_response(201)
+        
+        create_user({"email": "test@example.com"}, timeout_policy=TimeoutPolicy(connect=1, read=2))
+        
+        self.assertEqual(mock_post.call_args.kwargs["timeout"], (1, 2))
+    
+    @patch('utils.api.time.sleep')
+    @patch('utils.api.requests.post')
+    def test_deadline_stops_retries(self, mock_post, mock_sleep):
+        """Test no retry is attempted when its backoff would pass the row deadline"""
+        mock_post.side_effect = requests.exceptions.ConnectionError("Connection refused")
+        
+        result = create_user(
+            {"email": "test@example.com"},
+            retry_policy=RetryPolicy(max_retries=5, backoff="exponential", base_delay=10, max_delay=10),
+            timeout_policy=TimeoutPolicy(connect=1, read=1, deadline=5)
+        )
+        
+        self.assertFalse(result.success)
+        self.assertIn("deadline of 5s exceeded", result.message)
+        self.assertEqual(result.kind, RESULT_DEADLINE)
+        self.assertEqual(mock_post.call_count, 1)
+        mock_sleep.assert_not_called()
+    
+    @patch('utils.api.requests.post')
+    def test_hedged_request_returns_first_success(self, mock_post):
+        """Test a slow request is hedged and the faster copy's success is used"""
+        calls = []
+        
+        def post(*args, **kwargs):
+            calls.append(time.monotonic())
+            # The first copy hangs, the hedge answers immediately
+            if len(calls) == 1:
+                time.sleep(0.5)
+                return make_response(500, b'{"message": "slow"}')
+            return make_response(201)
+        mock_post.side_effect = post
+        
+        start = time.monotonic()
+        result = create_user({"email": "test@example.com"}, timeout_policy=TimeoutPolicy(hedge_after=0.05))
+        
+        self.assertTrue(result.success)
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertLess(time.monotonic() - start, 0.4)
+    
+    @patch('utils.api.requests.post')
+    def test_hedged_request_waits_for_other_copy_after_failure(self, mock_post):
+        """Test a fast failure (e.g. 409 from the duplicate) does not hide the other copy's success"""
+        calls = []
+        
+        def post(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.2)
+                return make_response(201)
+            return make_response(409, b'{"message": "Email already exists"}')
+        mock_post.side_effect = post
+        
+        result = create_user({"email": "test@example.com"}, timeout_policy=TimeoutPolicy(hedge_after=0.05))
+        
+        self.assertTrue(result.success)
+    
+    @patch('utils.api.requests.post')
+    def test_hedge_timer_starts_when_request_is_sent(self, mock_post):
+        """Test a request waiting for a free hedging thread is not hedged because of the wait"""
+        mock_post.return_value = make_response(201)
+        executor = ThreadPoolExecutor(max_workers=1)
+        release = threading.Event()
+        # Keep the only thread busy for longer than hedge_after
+        executor.submit(release.wait, 5)
+        threading.Timer(0.2, release.set).start()
+        try:
+            with patch('utils.api._hedge_executor', executor):
+                result = create_user({"email": "test@example.com"}, timeout_policy=TimeoutPolicy(hedge_after=0.05))
+        finally:
+            executor.shutdown()
+        
+        self.assertTrue(result.success)
+        self.assertEqual(mock_post.call_count, 1)
+    
+    @patch('utils.api.CONCURRENCY', 8)
+    @patch('utils.api._hedge_executor', None)
+    def test_hedge_executor_created_once(self):
+        """Test concurrent first hedged requests share one executor sized for CONCURRENCY"""
+        barrier = threading.Barrier(8)
+        executors = []
+        
+        def get():
+            barrier.wait()
+            executors.append(_get_hedge_executor())
+        threads = [threading.Thread(target=get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(len({id(executor) for executor in executors}), 1)
+        self.assertEqual(executors[0]._max_workers, 16)
+        executors[0].shutdown()
+    
+    @patch('utils.api.ERROR_BODY_LIMIT', 64)
+    @patch('utils.api.requests.post')
+    def test_error_body_read_is_bounded(self, mock_post):
+        """Test at most ERROR_BODY_LIMIT bytes of a large error page are read"""
+        page = b"<html><head><title>502 Bad Gateway</title></head><body>" + b"x" * 100000 + b"</body></html>"
+        chunks = [page[i:i + 8192] for i in range(0, len(page), 8192)]
+        response = make_response(502, content_type="text/html")
+        response.iter_content.return_value = iter(chunks)
+        mock_post.return_value = response
+        
+        result = create_user({"email": "test@example.com"})
+        
+        self.assertFalse(result.success)
+        self.assertEqual(result.message, "API returned status code 502: 502 Bad Gateway")
+        self.assertEqual(response.iter_content.call_args.kwargs["chunk_size"], 65)
+        response.close.assert_called_once()
+    
+    def test_parse_structured_json_error(self):
+        """Test error codes and messages are extracted from JSON bodies"""
+        body = json.dumps({"error": {"code": "EMAIL_TAKEN", "message": "Email already exists"}}).encode()
+        
+        self.assertEqual(parse_error_body(body, "application/json"), ("EMAIL_TAKEN", "Email already exists"))
+        self.assertEqual(parse_error_body(b'{"code": 42}', "application/json; charset=utf-8"), ("42", '{"code":42}'))
+    
+    def test_parse_text_error_is_truncated(self):
+        """Test plain text bodies are collapsed and cut to a short snippet"""
+        code, detail = parse_error_body(b"line one\n\n   line two " + b"y" * 500, "text/plain")
+        
+        self.assertIsNone(code)
+        self.assertTrue(detail.startswith("line one line two"))
+        self.assertTrue(detail.endswith("..."))
+        self.assertLessEqual(len(detail), 203)
+
 
 if __name__ == "__main__":
     unittest.main()
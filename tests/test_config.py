@@ -65,6 +65,7 @@ class TestConfig(unittest.TestCase):
         self.assertEqual(config.settings.MAX_RETRIES, 3)
         self.assertEqual(config.settings.LOGS_DIR, "logs")
         self.assertEqual(config.settings.DATA_DIR, "data")
+        self.assertEqual(config.settings.VALIDATION_RULES, {})
     
     @patch('os.getenv')
     @patch('os.path.exists')
@@ -0,0 +1,124 @@
+import unittest
+from unittest.mock import patch
+import csv
+import io
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.csv_reader import MappedCsvReader
+
+CSV_DATA = (
+    'email,name,role\r\n'
+    'alice@example.com,"Smith, ""Al""",admin\r\n'
+    '\r\n'
+    'bob@example.com,"Bob\non two lines",user\r\n'
+    'carol@exämple.com\r\n'
+    'dave@example.com,Dave,user,extra\r\n'
+    'erin@example.com,Erin,"user"'
+)
+
+
+class TestMappedCsvReader(unittest.TestCase):
+    """Test cases for the memory-mapped CSV reader"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write_csv(self, csv_data):
+        path = os.path.join(self.temp_dir.name, "users.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(csv_data)
+        return path
+    
+    def test_rows_match_dict_reader(self):
+        """Test rows equal csv.DictReader's, including quotes, quoted newlines, short and long rows"""
+        expected = list(csv.DictReader(io.StringIO(CSV_DATA, newline="")))
+        
+        # A tiny block size makes records and lines straddle block boundaries
+        for block_size in (1024 * 1024, 7):
+            with patch('utils.csv_reader._BLOCK_SIZE', block_size), MappedCsvReader(self.write_csv(CSV_DATA)) as reader:
+                records = list(reader)
+            
+            self.assertEqual([record.row for record in records], expected)
+            self.assertEqual([record.row_num for record in records], [2, 3, 4, 5, 6])
+    
+    def test_offsets_cover_records(self):
+        """Test each record's byte range holds exactly that record"""
+        data = CSV_DATA.encode()
+        with MappedCsvReader(self.write_csv(CSV_DATA)) as reader:
+            records = list(reader)
+            header = data[:reader.data_start]
+        
+        self.assertEqual(header, b"email,name,role\r\n")
+        self.assertEqual(records[-1].end, len(data))
+        for record in records:
+            rows = list(csv.DictReader(io.StringIO((header + data[record.offset:record.end]).decode(), newline="")))
+            self.assertEqual(rows, [record.row])
+        # Offsets are in bytes, not characters
+        self.assertEqual(records[2].end - records[2].offset, len("carol@exämple.com\r\n".encode()))
+    
+    def test_start_mid_file(self):
+        """Test reading resumes at a record boundary found from an arbitrary offset"""
+        with MappedCsvReader(self.write_csv(CSV_DATA)) as reader:
+            records = list(reader)
+            # An offset inside bob's quoted newline moves on to carol's record
+            inside_quotes = CSV_DATA.encode().index(b"on two lines")
+            start = reader.record_boundary(inside_quotes)
+            resumed = list(reader.records(start=start, row_num=records[2].row_num))
+            
+            self.assertEqual(start, records[2].offset)
+            self.assertEqual(resumed, records[2:])
+            self.assertEqual(reader.record_boundary(records[1].offset), records[1].offset)
+            self.assertEqual(reader.record_boundary(0), reader.data_start)
+    
+    def test_quote_inside_unquoted_field(self):
+        """Test a quote that does not start a field is an ordinary character, as for csv.DictReader"""
+        csv_data = (
+            'email,name,role\n'
+            'a@example.com,Bob 5\'10" tall,user\n'
+            'b@example.com,"Carol ""C""\nSmith",user\n'
+            'c@example.com,Dave,admin\n'
+        )
+        expected = list(csv.DictReader(io.StringIO(csv_data, newline="")))
+        with MappedCsvReader(self.write_csv(csv_data)) as reader:
+            records = list(reader)
+            # The odd quote before the offset does not make the next newline part of a field
+            start = reader.record_boundary(records[1].offset - 1)
+        
+        self.assertEqual(len(expected), 3)
+        self.assertEqual([record.row for record in records], expected)
+        self.assertEqual(start, records[1].offset)
+    
+    def test_invalid_bytes_name_their_row(self):
+        """Test rows before an undecodable row are read and the error gives its row number"""
+        csv_data = b'email,name,role\na@example.com,Al,user\nb@example.com,"B\n\xe9",user\nc@example.com,C,user\n'
+        bad_byte = csv_data.index(b"\xe9")
+        path = os.path.join(self.temp_dir.name, "users.csv")
+        with open(path, "wb") as f:
+            f.write(csv_data)
+        
+        for block_size in (1024 * 1024, 7):
+            rows = []
+            with patch('utils.csv_reader._BLOCK_SIZE', block_size), MappedCsvReader(path) as reader:
+                with self.assertRaisesRegex(csv.Error, f"Row 3: invalid utf-8 data at byte {bad_byte}"):
+                    for record in reader:
+                        rows.append(record.row["email"])
+            
+            self.assertEqual(rows, ["a@example.com"])
+    
+    def test_empty_file(self):
+        """Test an empty file has no header and no rows"""
+        with MappedCsvReader(self.write_csv("")) as reader:
+            self.assertIsNone(reader.fieldnames)
+            self.assertEqual(list(reader), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
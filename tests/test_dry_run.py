@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import patch
+import csv
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.dry_run import dry_run_file
+
+
+class TestDryRun(unittest.TestCase):
+    """Test cases for the dry-run module"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.csv_path = os.path.join(self.temp_dir.name, "users.csv")
+        self.rejects_path = os.path.join(self.temp_dir.name, "rejects.csv")
+        with open(self.csv_path, "w", newline="") as f:
+            f.write(
+                "name,email,role\n"
+                "Alice,alice@example.com,admin\n"
+                "Bob,,user\n"
+                "Eve,not-an-email,user\n"
+                "Alice Again,alice@Example.com,user\n"
+                "Frank,frank@example.com\n"
+            )
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    @patch('logging.error')
+    def test_dry_run_counts_and_reasons(self, mock_error):
+        """Test dry run counts, reasons and rejects file"""
+        report = dry_run_file(self.csv_path, rejects_file=self.rejects_path, workers=1, chunk_size=2)
+        
+        self.assertEqual(report["rows"], 5)
+        self.assertEqual(report["valid"], 2)
+        self.assertEqual(report["skipped"], 3)
+        self.assertEqual(report["duplicates"], 1)
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(report["reasons"]["Missing required field: email"], 1)
+        self.assertEqual(report["reasons"]["Missing required field: role"], 1)
+        self.assertEqual(report["reasons"]["Invalid email format"], 1)
+        self.assertNotIn("Duplicate email", report["reasons"])
+        
+        with open(self.rejects_path, newline="") as f:
+            rejects = list(csv.reader(f))
+        self.assertEqual(rejects[0], ["row", "reason", "name", "email", "role"])
+        self.assertEqual([row[0] for row in rejects[1:]], ["3", "4", "6"])
+    
+    def test_dry_run_skips_blank_lines(self):
+        """Test blank lines are neither counted nor numbered, as in the import"""
+        with open(self.csv_path, "w", newline="") as f:
+            f.write("name,email,role\n\nAlice,alice@example.com,admin\n\nBob,,user\n")
+        report = dry_run_file(self.csv_path, rejects_file=self.rejects_path, workers=1, chunk_size=2)
+        
+        self.assertEqual(report["rows"], 2)
+        self.assertEqual(report["valid"], 1)
+        self.assertEqual(report["skipped"], 1)
+        with open(self.rejects_path, newline="") as f:
+            rejects = list(csv.reader(f))
+        self.assertEqual([row[0] for row in rejects[1:]], ["3"])
+    
+    @patch('utils.dry_run.VALIDATION_RULES', {"email": {"unique": True}})
+    def test_dry_run_unique_rule_skips_duplicates(self):
+        """Test repeated emails are skipped only when a unique rule is configured"""
+        report = dry_run_file(self.csv_path, rejects_file=None, workers=1)
+        
+        self.assertEqual(report["valid"], 1)
+        self.assertEqual(report["skipped"], 4)
+        self.assertEqual(report["duplicates"], 0)
+    
+    @patch('utils.dry_run.VALIDATION_RULES', {"role": {"choices": ["user"]}})
+    def test_dry_run_applies_rules(self):
+        """Test dry run applies the configured validation rules"""
+        report = dry_run_file(self.csv_path, rejects_file=None, workers=1)
+        
+        self.assertEqual(report["valid"], 1)
+        self.assertEqual(report["duplicates"], 0)
+        self.assertEqual(report["reasons"]["Invalid value for field role"], 1)
+    
+    def test_dry_run_parallel_matches_serial(self):
+        """Test dry run gives the same result with a process pool"""
+        serial = dry_run_file(self.csv_path, rejects_file=None, workers=1, chunk_size=1)
+        parallel = dry_run_file(self.csv_path, rejects_file=None, workers=2, chunk_size=1)
+        
+        for key in ("rows", "valid", "skipped", "duplicates", "reasons"):
+            self.assertEqual(serial[key], parallel[key])
+    
+    @patch('logging.error')
+    def test_dry_run_missing_file(self, mock_error):
+        """Test dry run with a file that does not exist"""
+        report = dry_run_file(os.path.join(self.temp_dir.name, "missing.csv"), rejects_file=None)
+        
+        self.assertEqual(report["errors"], 1)
+        mock_error.assert_called_once()
+
+    
+    @patch('logging.error')
+    def test_dry_run_unwritable_rejects_file(self, mock_error):
+        """Test a rejects file that cannot be created is reported by its own path"""
+        rejects_path = os.path.join(self.temp_dir.name, "missing-dir", "rejects.csv")
+        report = dry_run_file(self.csv_path, rejects_file=rejects_path)
+        
+        self.assertEqual(report["errors"], 1)
+        self.assertIn(f"Cannot write rejects file {rejects_path}", mock_error.call_args[0][0])
+    
+    @patch('logging.error')
+    def test_dry_run_reads_utf8(self, mock_error):
+        """Test the file is decoded as UTF-8 like the import, and invalid bytes are a file error"""
+        with open(self.csv_path, "wb") as f:
+            f.write("name,email,role\nJosé,jose@example.com,user\n".encode("utf-8"))
+        report = dry_run_file(self.csv_path, rejects_file=None)
+        
+        self.assertEqual((report["valid"], report["errors"]), (1, 0))
+        
+        with open(self.csv_path, "wb") as f:
+            f.write(b"name,email,role\nJos\xe9,jose@example.com,user\n")
+        report = dry_run_file(self.csv_path, rejects_file=None)
+        
+        self.assertEqual(report["errors"], 1)
+        self.assertIn("not valid UTF-8", mock_error.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import unittest
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.load_test import LoadProfile, run_load_test, synthetic_rows
+from utils.shutdown import ShutdownCoordinator
+from utils.validation import validate_user_data
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Create-user stand-in: rejects every fifth email with a 500, waits `delay` seconds before answering"""
+    
+    delay = 0.0
+    
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.delay)
+        index = int(body["email"].split("@")[0].rsplit("-", 1)[1])
+        self.send_response(500 if index % 5 == 4 else 201)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+    
+    def log_message(self, format, *args):
+        pass
+
+
+class TestLoadProfile(unittest.TestCase):
+    """Test cases for load profiles"""
+    
+    def test_constant_rate(self):
+        """Test a constant profile schedules rate * duration evenly spaced requests"""
+        profile = LoadProfile(rate=10, duration=2)
+        times = [profile.send_time(index) for index in range(21)]
+        
+        self.assertEqual(times[:3], [0.0, 0.1, 0.2])
+        self.assertAlmostEqual(times[19], 1.9)
+        self.assertIsNone(times[20])
+    
+    def test_ramp(self):
+        """Test a ramp schedules the integral of the rate and sends faster towards the end"""
+        profile = LoadProfile(rate=0, duration=10, end_rate=20)
+        times = []
+        while profile.send_time(len(times)) is not None:
+            times.append(profile.send_time(len(times)))
+        
+        self.assertEqual(len(times), 100)
+        self.assertAlmostEqual(profile.sent_by(5), 25)
+        self.assertGreater(times[1] - times[0], times[99] - times[98])
+        self.assertEqual(profile.rate_at(5), 10)
+    
+    def test_synthetic_rows(self):
+        """Test synthetic rows are valid and have unique emails"""
+        rows = [row for row, _ in zip(synthetic_rows("t1"), range(100))]
+        
+        self.assertEqual(len({row["email"] for row in rows}), 100)
+        self.assertTrue(all(validate_user_data(row)[0] for row in rows))
+
+
+class TestRunLoadTest(unittest.TestCase):
+    """End-to-end load tests against a local stand-in server"""
+    
+    def setUp(self):
+        StandInHandler.delay = 0.0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.api_url = f"http://127.0.0.1:{self.server.server_address[1]}/api/create_user"
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+    
+    def test_windows_report_rates_errors_and_latency(self):
+        """Test requests are sent on schedule and reported per window with error rates and percentiles"""
+        start = time.monotonic()
+        report = run_load_test(synthetic_rows("e2e"), LoadProfile(rate=100, duration=1), window=0.5,
+                               api_url=self.api_url, max_retries=0)
+        
+        self.assertGreaterEqual(time.monotonic() - start, 0.99)
+        self.assertEqual(report.sent, 100)
+        windows = report.window_rows()
+        self.assertEqual([window["sent"] for window in windows], [50, 50])
+        self.assertEqual([window["offered_rps"] for window in windows], [100, 100])
+        self.assertEqual([window["error_rate"] for window in windows], [0.2, 0.2])
+        self.assertEqual(windows[0]["error_classes"], {"http_status": 10})
+        self.assertEqual(windows[0]["latency"]["count"], 50)
+        total = report.total
+        self.assertEqual((total.success, total.errors, total.status_codes[500]), (80, 20, 20))
+        self.assertIn("Load test:", report.format_text())
+        self.assertEqual(report.to_dict()["total"]["success"], 80)
+    
+    def test_open_loop_with_slow_server(self):
+        """Test a slow server does not slow the schedule down and requests left at the end count as unfinished"""
+        StandInHandler.delay = 1.0
+        shutdown = ShutdownCoordinator(drain_timeout=0.1)
+        
+        start = time.monotonic()
+        report = run_load_test(synthetic_rows("slow"), LoadProfile(rate=20, duration=0.5), window=0.5, shutdown=shutdown,
+                               api_url=self.api_url, max_retries=0)
+        
+        self.assertLess(time.monotonic() - start, 0.9)
+        self.assertEqual(report.sent, 10)
+        self.assertEqual(report.total.unfinished, 10)
+        self.assertEqual(report.window_rows()[0]["error_rate"], 1.0)
+        self.assertFalse(report.interrupted)
+    
+    def test_shutdown_while_draining(self):
+        """Test a shutdown requested after the last request was sent marks the test interrupted"""
+        StandInHandler.delay = 1.0
+        shutdown = ShutdownCoordinator(drain_timeout=0.5)
+        threading.Timer(0.3, shutdown.request).start()
+        
+        report = run_load_test(synthetic_rows("drain"), LoadProfile(rate=20, duration=0.2), shutdown=shutdown,
+                               api_url=self.api_url, max_retries=0)
+        
+        self.assertTrue(report.interrupted)
+        self.assertEqual(report.sent, 4)
+        self.assertEqual(report.total.unfinished, 4)
+    
+    def test_shutdown_stops_sending(self):
+        """Test a shutdown request stops the test early"""
+        shutdown = ShutdownCoordinator()
+        threading.Timer(0.2, shutdown.request).start()
+        
+        report = run_load_test(synthetic_rows("stop"), LoadProfile(rate=50, duration=10), shutdown=shutdown,
+                               api_url=self.api_url, max_retries=0)
+        
+        self.assertTrue(report.interrupted)
+        self.assertLess(report.sent, 50)
+        self.assertEqual(report.total.rows, report.sent)
+
+
+if __name__ == "__main__":
+    unittest.main()
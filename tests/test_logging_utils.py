@@ -4,12 +4,16 @@ import os
 import sys
 import logging
 import json
+import gzip
+import tempfile
+import time
 from io import StringIO
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.logging_utils import setup_logging, JsonFormatter
+from utils.logging_utils import setup_logging, JsonFormatter, BufferedHandler, create_file_handler, worker_log_file
+from config import LOG_MAX_BYTES, LOG_BACKUP_COUNT
 
 
 class TestLoggingUtils(unittest.TestCase):
@@ -41,7 +45,7 @@ class TestLoggingUtils(unittest.TestCase):
         log_buffer = StringIO()
         
         # Mock logging handlers
-        with patch('logging.FileHandler') as mock_file_handler, \
+        with patch('utils.logging_utils.SizeRotatingFileHandler') as mock_file_handler, \
              patch('logging.StreamHandler') as mock_stream_handler:
             
             # Setup mock handlers
@@ -53,7 +57,7 @@ class TestLoggingUtils(unittest.TestCase):
             setup_logging('test_log.txt')
             
             # Verify handlers were created
-            mock_file_handler.assert_called_once_with('test_log.txt')
+            mock_file_handler.assert_called_once_with('test_log.txt', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT)
             mock_stream_handler.assert_called_once()
             
             # Verify formatter was set correctly
@@ -64,7 +68,7 @@ class TestLoggingUtils(unittest.TestCase):
     def test_setup_logging_json_format(self):
         """Test setup_logging with JSON format"""
         # Mock logging handlers
-        with patch('logging.FileHandler') as mock_file_handler, \
+        with patch('utils.logging_utils.SizeRotatingFileHandler') as mock_file_handler, \
              patch('logging.StreamHandler') as mock_stream_handler:
             
             # Setup mock handlers
@@ -78,6 +82,127 @@ class TestLoggingUtils(unittest.TestCase):
             formatter_calls = mock_file_handler.return_value.setFormatter.call_args[0]
             self.assertIsInstance(formatter_calls[0], JsonFormatter)
     
+    @patch('utils.logging_utils.LOG_BUFFER_CAPACITY', 10)
+    def test_setup_logging_buffers_error_log(self):
+        """Test setup_logging puts a buffered handler in front of the error log file"""
+        with patch('utils.logging_utils.SizeRotatingFileHandler') as mock_file_handler, \
+             patch('logging.StreamHandler'):
+            setup_logging('test_log.txt')
+        
+        buffered = [handler for handler in self.root_logger.handlers if isinstance(handler, BufferedHandler)]
+        self.assertEqual(len(buffered), 1)
+        self.assertIs(buffered[0].target, mock_file_handler.return_value)
+        self.assertEqual(buffered[0].capacity, 10)
+    
+    def test_buffered_handler_writes_batches(self):
+        """Test records reach the file once the buffer is full, on flush_level and on flush()"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = os.path.join(temp_dir, 'errors.txt')
+            file_handler = create_file_handler(log_file, rotation='none')
+            handler = BufferedHandler(3, file_handler, flush_level=logging.CRITICAL, flush_interval=3600, flush_burst=0)
+            logger = logging.getLogger('test_buffered')
+            logger.propagate = False
+            logger.addHandler(handler)
+            try:
+                def lines():
+                    with open(log_file) as f:
+                        return f.read().splitlines()
+                
+                logger.error('one')
+                logger.error('two')
+                self.assertEqual(lines(), [])
+                logger.error('three')
+                self.assertEqual(lines(), ['one', 'two', 'three'])
+                logger.error('four')
+                logger.critical('five')
+                self.assertEqual(lines()[3:], ['four', 'five'])
+                logger.error('six')
+                handler.flush()
+                self.assertEqual(lines()[5:], ['six'])
+            finally:
+                logger.removeHandler(handler)
+                handler.close()
+    
+    def test_buffered_handler_flushes_on_interval(self):
+        """Test buffered records are written by the timer without waiting for another record"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = os.path.join(temp_dir, 'errors.txt')
+            handler = BufferedHandler(100, create_file_handler(log_file, rotation='none'),
+                                      flush_level=logging.CRITICAL, flush_interval=0.1, flush_burst=0)
+            try:
+                handler.handle(logging.makeLogRecord({'msg': 'one', 'levelno': logging.ERROR}))
+                handler.handle(logging.makeLogRecord({'msg': 'two', 'levelno': logging.ERROR}))
+                with open(log_file) as f:
+                    self.assertEqual(f.read(), '')
+                
+                deadline = time.monotonic() + 5
+                while handler.buffer and time.monotonic() < deadline:
+                    time.sleep(0.02)
+                with open(log_file) as f:
+                    self.assertEqual(f.read().splitlines(), ['one', 'two'])
+            finally:
+                handler.close()
+            # Closing the handler stops its timer thread
+            handler._timer.join(1)
+            self.assertFalse(handler._timer.is_alive())
+    
+    def test_buffered_handler_flushes_error_bursts(self):
+        """Test a burst of errors is written once flush_burst of them are waiting"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = os.path.join(temp_dir, 'errors.txt')
+            handler = BufferedHandler(100, create_file_handler(log_file, rotation='none'),
+                                      flush_level=logging.CRITICAL, flush_interval=3600, flush_burst=3)
+            try:
+                for number in range(5):
+                    handler.handle(logging.makeLogRecord({'msg': f'error {number}', 'levelno': logging.ERROR}))
+                    handler.handle(logging.makeLogRecord({'msg': f'info {number}', 'levelno': logging.INFO}))
+                with open(log_file) as f:
+                    lines = f.read().splitlines()
+            finally:
+                handler.close()
+            
+            self.assertEqual(lines, ['error 0', 'info 0', 'error 1', 'info 1', 'error 2'])
+    
+    def test_buffered_handler_without_interval_waits_for_capacity(self):
+        """Test a flush_interval of 0 holds records until the buffer is full"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = os.path.join(temp_dir, 'errors.txt')
+            handler = BufferedHandler(3, create_file_handler(log_file, rotation='none'),
+                                      flush_level=logging.CRITICAL, flush_interval=0, flush_burst=0)
+            try:
+                for number in range(2):
+                    handler.handle(logging.makeLogRecord({'msg': f'error {number}', 'levelno': logging.ERROR}))
+                    self.assertEqual(len(handler.buffer), number + 1)
+                handler.handle(logging.makeLogRecord({'msg': 'error 2', 'levelno': logging.ERROR}))
+                self.assertEqual(len(handler.buffer), 0)
+                self.assertIsNone(handler._timer)
+            finally:
+                handler.close()
+    
+    def test_worker_log_file(self):
+        """Test each worker process gets its own error log file next to the main one"""
+        self.assertEqual(worker_log_file('shard-worker-0', os.path.join('logs', 'error_log.txt')),
+                         os.path.join('logs', 'error_log.shard-worker-0.txt'))
+    
+    def test_size_rotation_with_compression(self):
+        """Test the error log rotates at max_bytes and gzips the rotated files"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_file = os.path.join(temp_dir, 'errors.txt')
+            handler = create_file_handler(log_file, rotation='size', max_bytes=100, backup_count=2, compress=True)
+            try:
+                for number in range(20):
+                    handler.emit(logging.makeLogRecord({'msg': f'error number {number:02d}', 'levelno': logging.ERROR}))
+            finally:
+                handler.close()
+            
+            self.assertEqual(sorted(os.listdir(temp_dir)), ['errors.txt', 'errors.txt.1.gz', 'errors.txt.2.gz'])
+            with gzip.open(os.path.join(temp_dir, 'errors.txt.1.gz'), 'rt') as f:
+                rotated = f.read().splitlines()
+            with open(log_file) as f:
+                current = f.read().splitlines()
+            self.assertEqual(current[-1], 'error number 19')
+            self.assertEqual(rotated[-1], f'error number {int(current[0][-2:]) - 1:02d}')
+    
     def test_json_formatter(self):
         """Test JsonFormatter formats log records correctly"""
         # Create a formatter
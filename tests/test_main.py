@@ -1,7 +1,13 @@
 import unittest
-from unittest.mock import patch, mock_open
+from unittest.mock import patch
+import csv
+import json
 import os
+import signal
 import sys
+import tempfile
+import threading
+import time
 from io import StringIO
 
 # Add parent directory to path to allow imports
@@ -9,18 +15,44 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import main
 from utils.validation import validate_email_address
+from utils.api import ApiResult
+from utils.report import RunReport
+from utils.outcomes import OutcomeStore
+from utils.load_test import LoadProfile, LoadTestReport
+from utils.sharding import split_file, run_worker, merge_results
+
+
+def make_report(**counts):
+    """Builds a RunReport with the given counter values"""
+    report = RunReport()
+    for key, value in counts.items():
+        setattr(report, key, value)
+    return report
+
 
 class TestMain(unittest.TestCase):
     """Test cases for the main module"""
     
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def write_csv(self, csv_data):
+        """Writes CSV data to a file in the test's temporary directory and returns its path"""
+        path = os.path.join(self.temp_dir.name, "test.csv")
+        with open(path, "w", newline="") as f:
+            f.write(csv_data)
+        return path
+    
     @patch('os.path.exists')
     @patch('main.create_user')
     @patch('main.validate_user_data')
     @patch('main.validate_email_address')
-    @patch('builtins.open', new_callable=mock_open)
     @patch('logging.error')
     @patch('logging.info')
-    def test_create_users_success(self, mock_info, mock_error, mock_file, mock_validate_email, mock_validate, mock_create, mock_exists):
+    def test_create_users_success(self, mock_info, mock_error, mock_validate_email, mock_validate, mock_create, mock_exists):
         """Test create_users function with successful user creation"""
         # Setup mock file existence
         mock_exists.return_value = True
@@ -29,20 +61,20 @@ class TestMain(unittest.TestCase):
         csv_data = """email,name,role
         alice@example.com,Alice,admin
         bob@example.com,Bob,user"""
-        mock_file.return_value.__enter__.return_value = StringIO(csv_data)
+        csv_path = self.write_csv(csv_data)
         
         # Setup mock validation and creation
         mock_validate.return_value = (True, "")
         mock_validate_email.return_value = ("normalized@example.com", None)
-        mock_create.return_value = (True, "User created successfully")
+        mock_create.return_value = ApiResult(True)
         
         # Call create_users
-        result = main.create_users("test.csv")
+        result = main.create_users(csv_path)
         
         # Verify results
-        self.assertEqual(result["success"], 2)
-        self.assertEqual(result["errors"], 0)
-        self.assertEqual(result["skipped"], 0)
+        self.assertEqual(result.success, 2)
+        self.assertEqual(result.errors, 0)
+        self.assertEqual(result.skipped, 0)
         
         # Verify validate_user_data and create_user were called for each user
         self.assertEqual(mock_validate.call_count, 2)
@@ -52,10 +84,9 @@ class TestMain(unittest.TestCase):
     @patch('main.create_user')
     @patch('main.validate_user_data')
     @patch('main.validate_email_address')
-    @patch('builtins.open', new_callable=mock_open)
     @patch('logging.error')
     @patch('logging.info')
-    def test_create_users_validation_failure(self, mock_info, mock_error, mock_file, mock_validate_email, mock_validate, mock_create, mock_exists):
+    def test_create_users_validation_failure(self, mock_info, mock_error, mock_validate_email, mock_validate, mock_create, mock_exists):
         """Test create_users function with validation failures"""
         # Setup mock file existence
         mock_exists.return_value = True
@@ -64,7 +95,7 @@ class TestMain(unittest.TestCase):
         csv_data = """email,name,role
         alice@example.com,Alice,admin
         invalid-email,Bob,user"""
-        mock_file.return_value.__enter__.return_value = StringIO(csv_data)
+        csv_path = self.write_csv(csv_data)
         
         # Setup mock validation and creation
         mock_validate.return_value = (True, "")  # All users pass required field validation
@@ -75,15 +106,15 @@ class TestMain(unittest.TestCase):
             (None, "Invalid email format")   # Second user has invalid email
         ]
         
-        mock_create.return_value = (True, "User created successfully")
+        mock_create.return_value = ApiResult(True)
         
         # Call create_users
-        result = main.create_users("test.csv")
+        result = main.create_users(csv_path)
         
         # Verify results
-        self.assertEqual(result["success"], 1)
-        self.assertEqual(result["errors"], 0)
-        self.assertEqual(result["skipped"], 1)
+        self.assertEqual(result.success, 1)
+        self.assertEqual(result.errors, 0)
+        self.assertEqual(result.skipped, 1)
         
         # Verify create_user was only called for the valid user
         self.assertEqual(mock_create.call_count, 1)
@@ -92,10 +123,9 @@ class TestMain(unittest.TestCase):
     @patch('main.create_user')
     @patch('main.validate_user_data')
     @patch('main.validate_email_address')
-    @patch('builtins.open', new_callable=mock_open)
     @patch('logging.error')
     @patch('logging.info')
-    def test_create_users_api_failure(self, mock_info, mock_error, mock_file, mock_validate_email, mock_validate, mock_create, mock_exists):
+    def test_create_users_api_failure(self, mock_info, mock_error, mock_validate_email, mock_validate, mock_create, mock_exists):
         """Test create_users function with API failures"""
         # Setup mock file existence
         mock_exists.return_value = True
@@ -104,32 +134,31 @@ class TestMain(unittest.TestCase):
         csv_data = """email,name,role
         alice@example.com,Alice,admin
         bob@example.com,Bob,user"""
-        mock_file.return_value.__enter__.return_value = StringIO(csv_data)
+        csv_path = self.write_csv(csv_data)
         
         # Setup mock validation and creation
         mock_validate.return_value = (True, "")
         mock_validate_email.return_value = ("normalized@example.com", None)
         mock_create.side_effect = [
-            (True, "User created successfully"),  # First user succeeds
-            (False, "API error")  # Second user fails
+            ApiResult(True),  # First user succeeds
+            ApiResult(False, "API error", "http_status", 500)  # Second user fails
         ]
         
         # Call create_users
-        result = main.create_users("test.csv")
+        result = main.create_users(csv_path)
         
         # Verify results
-        self.assertEqual(result["success"], 1)
-        self.assertEqual(result["errors"], 1)
-        self.assertEqual(result["skipped"], 0)
+        self.assertEqual(result.success, 1)
+        self.assertEqual(result.errors, 1)
+        self.assertEqual(result.skipped, 0)
     
     @patch('os.path.exists')
     @patch('main.create_user')
     @patch('main.validate_user_data')
     @patch('main.validate_email_address')
-    @patch('builtins.open', new_callable=mock_open)
     @patch('logging.error')
     @patch('logging.info')
-    def test_create_users_missing_headers(self, mock_info, mock_error, mock_file, mock_validate_email, mock_validate, mock_create, mock_exists):
+    def test_create_users_missing_headers(self, mock_info, mock_error, mock_validate_email, mock_validate, mock_create, mock_exists):
         """Test create_users function with missing headers"""
         # Setup mock file existence
         mock_exists.return_value = True
@@ -137,29 +166,394 @@ class TestMain(unittest.TestCase):
         # Setup mock CSV data with missing required headers
         csv_data = """email,name
         alice@example.com,Alice"""
-        mock_file.return_value.__enter__.return_value = StringIO(csv_data)
+        csv_path = self.write_csv(csv_data)
         
         # Call create_users
-        result = main.create_users("test.csv")
+        result = main.create_users(csv_path)
         
         # Verify results - should fail due to missing 'role' header
-        self.assertEqual(result["success"], 0)
-        self.assertEqual(result["errors"], 1)
-        self.assertEqual(result["skipped"], 0)
+        self.assertEqual(result.success, 0)
+        self.assertEqual(result.errors, 1)
+        self.assertEqual(result.skipped, 0)
         
         # Verify validate_user_data and create_user were not called
         mock_validate.assert_not_called()
         mock_create.assert_not_called()
     
+    @patch('os.path.exists')
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_updates_progress(self, mock_info, mock_error, mock_create, mock_exists):
+        """Test create_users keeps the progress counters up to date"""
+        mock_exists.return_value = True
+        csv_data = """email,name,role
+alice@example.com,Alice,admin
+bob@example.com,,user
+carol@example.com,Carol,user"""
+        csv_path = self.write_csv(csv_data)
+        mock_create.side_effect = [ApiResult(True), ApiResult(False, "API error", "http_status", 500)]
+        progress = main.ProgressReporter(total_bytes=len(csv_data), is_tty=False)
+        
+        main.create_users(csv_path, progress=progress)
+        
+        self.assertEqual(progress.rows, 3)
+        self.assertEqual(progress.bytes_read, len(csv_data))
+        self.assertEqual(progress.in_flight, 0)
+        self.assertEqual((progress.success, progress.errors, progress.skipped), (1, 1, 1))
+        self.assertIsNotNone(mock_create.call_args.kwargs["on_retry"])
+    
+    @patch('os.path.exists')
+    @patch('main.create_user')
+    @patch('logging.warning')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_graceful_shutdown(self, mock_info, mock_error, mock_warning, mock_create, mock_exists):
+        """Test create_users stops reading rows once shutdown is requested"""
+        mock_exists.return_value = True
+        csv_data = """email,name,role
+alice@example.com,Alice,admin
+bob@example.com,Bob,user
+carol@example.com,Carol,user"""
+        csv_path = self.write_csv(csv_data)
+        shutdown = main.ShutdownCoordinator(drain_timeout=5)
+        
+        def create_and_signal(row, **options):
+            # Simulate SIGTERM arriving while the first request is in flight
+            shutdown.request(15)
+            return ApiResult(True)
+        mock_create.side_effect = create_and_signal
+        
+        result = main.create_users(csv_path, shutdown=shutdown, concurrency=1)
+        
+        self.assertTrue(result.interrupted)
+        self.assertEqual(result.unfinished, 0)
+        self.assertLess(mock_create.call_count, 3)
+        self.assertEqual(result.success, mock_create.call_count)
+    
+    def run_with_hung_requests(self, csv_data, concurrency):
+        """Runs create_users against requests that never return, signalling shutdown once the main thread blocks"""
+        csv_path = self.write_csv(csv_data)
+        shutdown = main.ShutdownCoordinator(drain_timeout=0.2)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        
+        def hang(row, **options):
+            release.wait(30)
+            return ApiResult(True)
+        
+        timer = threading.Timer(0.3, shutdown.request, args=(signal.SIGTERM,))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        started = time.monotonic()
+        with patch('main.create_user', side_effect=hang), patch('logging.warning'), \
+             patch('logging.error'), patch('logging.info'):
+            result = main.create_users(csv_path, shutdown=shutdown, concurrency=concurrency)
+        return result, time.monotonic() - started
+    
+    def test_create_users_shutdown_while_waiting_for_slot(self):
+        """Test a signal is honoured while the main thread waits for a free request slot"""
+        result, elapsed = self.run_with_hung_requests(
+            "email,name,role\nalice@example.com,Alice,admin\nbob@example.com,Bob,user\ncarol@example.com,Carol,user\n", 1
+        )
+        
+        self.assertLess(elapsed, 5)
+        self.assertTrue(result.interrupted)
+        self.assertEqual(result.success, 0)
+        # The in-flight request and the row waiting for its slot
+        self.assertEqual(result.unfinished, 2)
+    
+    def test_create_users_shutdown_after_last_row(self):
+        """Test a signal is honoured while the main thread waits for the last requests"""
+        result, elapsed = self.run_with_hung_requests(
+            "email,name,role\nalice@example.com,Alice,admin\nbob@example.com,Bob,user\n", 4
+        )
+        
+        self.assertLess(elapsed, 5)
+        self.assertTrue(result.interrupted)
+        self.assertEqual(result.unfinished, 2)
+    
+    @patch('main.create_user')
+    @patch('logging.warning')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_interrupted_shard_resumes_from_checkpoint(self, mock_info, mock_error, mock_warning, mock_create):
+        """Test a shard stopped part way resumes after the rows it finished and keeps their results"""
+        rows = [f"user{i}@example.com,User {i},user" for i in range(12)]
+        rows[1] = "user1@example.com,User 1,"
+        csv_path = self.write_csv("email,name,role\n" + "\n".join(rows) + "\n")
+        shard_dir = os.path.join(self.temp_dir.name, "shards")
+        split_file(csv_path, shard_dir, 1)
+        sent = []
+        shutdowns = [main.ShutdownCoordinator(drain_timeout=5)]
+        
+        def create(row, **options):
+            sent.append(row["email"])
+            if len(sent) == 5:
+                shutdowns[0].request(15)
+            return ApiResult(True)
+        mock_create.side_effect = create
+        
+        def process(path, rejects, checkpoint):
+            return main.create_users(path, shutdown=shutdowns[0], concurrency=3, rejects_file=rejects,
+                                     checkpoint=checkpoint)
+        
+        def stopping():
+            return shutdowns[0].requested
+        
+        self.assertEqual(run_worker(shard_dir, process, should_stop=stopping), [])
+        first_run = len(sent)
+        shutdowns[0] = main.ShutdownCoordinator()
+        self.assertEqual(run_worker(shard_dir, process, should_stop=stopping), [0])
+        
+        self.assertGreater(first_run, 0)
+        self.assertEqual(len(sent), 11)
+        self.assertEqual(len(set(sent)), 11)
+        rejects_path = os.path.join(self.temp_dir.name, "rejects.csv")
+        merged = merge_results(shard_dir, rejects_file=rejects_path)
+        report = merged["report"]
+        self.assertEqual((report.success, report.skipped, report.unfinished), (11, 1, 0))
+        self.assertFalse(report.interrupted)
+        with open(rejects_path, newline="") as f:
+            self.assertEqual([row[1] for row in csv.reader(f)], ["row", "3"])
+    
+    @patch('os.path.exists')
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_concurrent(self, mock_info, mock_error, mock_create, mock_exists):
+        """Test create_users with several requests in flight"""
+        mock_exists.return_value = True
+        rows = "\n".join(f"user{i}@example.com,User {i},user" for i in range(20))
+        csv_path = self.write_csv("email,name,role\n" + rows)
+        mock_create.side_effect = lambda row, **options: ApiResult(row["name"] != "User 5", "API error")
+        
+        result = main.create_users(csv_path, concurrency=4)
+        
+        self.assertEqual(result.success, 19)
+        self.assertEqual(result.errors, 1)
+        self.assertFalse(result.interrupted)
+    
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_writes_rejects(self, mock_info, mock_error, mock_create):
+        """Test create_users writes skipped and failed rows to the rejects file"""
+        mock_create.side_effect = [ApiResult(True), ApiResult(False, "API returned status code 500", "http_status", 500)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "users.csv")
+            rejects_path = os.path.join(temp_dir, "rejects.csv")
+            with open(csv_path, "w") as f:
+                f.write("email,name,role\nalice@example.com,Alice,admin\n,Bob,user\ncarol@example.com,Carol,user\n")
+            
+            report = main.create_users(csv_path, rejects_file=rejects_path)
+            
+            with open(rejects_path, newline="") as f:
+                rejects = list(csv.reader(f))
+        
+        self.assertEqual(rejects[0], ["row", "reason", "email", "name", "role"])
+        self.assertEqual(rejects[1][:2], ["3", "Missing required field: email"])
+        self.assertEqual(rejects[2][:2], ["4", "API returned status code 500"])
+        self.assertEqual(report.error_classes, {"missing_field": 1, "http_status": 1})
+        self.assertEqual(report.status_codes, {500: 1})
+    
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_records_outcomes(self, mock_info, mock_error, mock_create):
+        """Test create_users records the outcome of every row as a run in the outcome store"""
+        mock_create.side_effect = [ApiResult(True, status_code=201), ApiResult(False, "API returned status code 500", "http_status", 500)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "users.csv")
+            with open(csv_path, "w") as f:
+                f.write("email,name,role\nAlice@Example.COM,Alice,admin\n,Bob,user\ncarol@example.com,Carol,user\n")
+            
+            with OutcomeStore(os.path.join(temp_dir, "outcomes.db")) as store:
+                main.create_users(csv_path, outcome_store=store)
+                
+                alice = store.lookup("Alice@example.com")
+                carol = store.lookup("carol@example.com")
+                runs = store.run_counts()
+        
+        self.assertEqual([(entry["row_num"], entry["outcome"]) for entry in alice], [(2, "created")])
+        self.assertEqual((carol[0]["outcome"], carol[0]["error_class"], carol[0]["status_code"]), ("failed", "http_status", 500))
+        self.assertEqual((runs[0]["created"], runs[0]["failed"], runs[0]["skipped"]), (1, 1, 1))
+        self.assertIsNotNone(runs[0]["finished"])
+    
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_invalid_utf8_row(self, mock_info, mock_error, mock_create):
+        """Test a row that is not valid UTF-8 stops the run with a file error after every row before it is sent"""
+        mock_create.return_value = ApiResult(True)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "users.csv")
+            rejects_path = os.path.join(temp_dir, "rejects.csv")
+            with open(csv_path, "wb") as f:
+                f.write(b"email,name,role\n" + b"".join(f"u{i}@example.com,U{i},user\n".encode() for i in range(30))
+                        + b"bad@example.com,Ren\xe9,user\nlast@example.com,Last,user\n")
+            
+            report = main.create_users(csv_path, rejects_file=rejects_path, send_queue=main.SendQueue(capacity=10))
+        
+        self.assertEqual(mock_create.call_count, 30)
+        self.assertEqual(report.success, 30)
+        self.assertEqual(report.error_classes, {"file": 1})
+        self.assertIn("Row 32: invalid utf-8 data", mock_error.call_args_list[-1].args[0])
+    
+    @patch('main.compile_priority')
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_unexpected_error_reports_queued_rows(self, mock_info, mock_error, mock_create, mock_compile):
+        """Test rows still queued when an unexpected error stops the run are reported as unfinished"""
+        mock_create.return_value = ApiResult(True)
+        
+        def priority(row):
+            if row["email"] == "u5@example.com":
+                raise RuntimeError("broken rule")
+            return 0
+        mock_compile.return_value = priority
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "users.csv")
+            with open(csv_path, "w") as f:
+                f.write("email,name,role\n" + "".join(f"u{i}@example.com,U{i},user\n" for i in range(8)))
+            
+            report = main.create_users(csv_path, send_queue=main.SendQueue(capacity=3))
+        
+        # The full queue sent u0-u2 as u2-u4 arrived, and u3 and u4 were still queued
+        self.assertEqual(report.success, 3)
+        self.assertEqual(report.unfinished, 2)
+        self.assertEqual(report.error_classes["file"], 1)
+    
+    @patch('main.PRIORITY_RULES', {"role": {"admin": 0, "manager": 1}})
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_priority_order(self, mock_info, mock_error, mock_create):
+        """Test queued rows are sent by priority class and in file order within a class"""
+        mock_create.return_value = ApiResult(True)
+        roles = ["user", "manager", "user", "admin", "manager", "admin"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "users.csv")
+            with open(csv_path, "w") as f:
+                f.write("email,name,role\n" + "".join(f"u{i}@example.com,U{i},{role}\n" for i, role in enumerate(roles)))
+            
+            report = main.create_users(csv_path, concurrency=1)
+        
+        sent = [call.args[0]["email"] for call in mock_create.call_args_list]
+        self.assertEqual(sent, ["u3@example.com", "u5@example.com", "u1@example.com", "u4@example.com",
+                                "u0@example.com", "u2@example.com"])
+        self.assertEqual(report.success, 6)
+    
+    @patch('main.compile_priority')
+    @patch('main.create_user')
+    @patch('logging.warning')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_shutdown_reports_queued_rows(self, mock_info, mock_error, mock_warning, mock_create, mock_compile):
+        """Test rows still queued at shutdown are not sent, but reported as unfinished and written to the rejects file"""
+        shutdown = main.ShutdownCoordinator(drain_timeout=5)
+        
+        def priority(row):
+            # Simulate SIGTERM arriving while the last row is queued
+            if row["email"] == "u3@example.com":
+                shutdown.request(15)
+            return 0
+        mock_compile.return_value = priority
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, "users.csv")
+            rejects_path = os.path.join(temp_dir, "rejects.csv")
+            with open(csv_path, "w") as f:
+                f.write("email,name,role\n" + "".join(f"u{i}@example.com,U{i},user\n" for i in range(4)))
+            
+            report = main.create_users(csv_path, shutdown=shutdown, rejects_file=rejects_path,
+                                       send_queue=main.SendQueue(capacity=10))
+            
+            with open(rejects_path, newline="") as f:
+                rejects = list(csv.reader(f))[1:]
+        
+        mock_create.assert_not_called()
+        self.assertTrue(report.interrupted)
+        self.assertEqual((report.success, report.unfinished), (0, 4))
+        self.assertEqual([reject[:2] for reject in rejects],
+                         [[str(row), "Row was not sent before shutdown"] for row in (2, 3, 4, 5)])
+    
+    @patch('main.merge_results')
+    @patch('main.run_local_workers')
+    @patch('main.split_file')
+    @patch('main.print_summary')
+    @patch('logging.info')
+    def test_main_sharded(self, mock_info, mock_print, mock_split, mock_run, mock_merge):
+        """Test main splits, runs local workers and merges for --shards"""
+        mock_merge.return_value = {"report": make_report(success=5, skipped=1), "shards": 2, "completed": 2}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            exit_code = main.main(["users.csv", "--shards", "2", "--shard-dir", temp_dir, "--concurrency", "3"])
+        
+        self.assertEqual(exit_code, 0)
+        mock_split.assert_called_once_with("users.csv", temp_dir, 2, "bytes")
+        mock_run.assert_called_once_with(temp_dir, 2, main.run_shard_worker_process, (3,))
+    
+    @patch('main.run_local_workers')
+    @patch('logging.error')
+    def test_main_sharded_missing_file(self, mock_error, mock_run):
+        """Test a sharded import of a missing file logs the error and exits with 1"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            missing = os.path.join(temp_dir, "missing.csv")
+            exit_code = main.main([missing, "--shards", "2", "--shard-dir", os.path.join(temp_dir, "shards")])
+        
+        self.assertEqual(exit_code, 1)
+        mock_error.assert_called_once_with(f"File not found: {missing}")
+        mock_run.assert_not_called()
+    
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_shard_rows_keep_source_row_numbers(self, mock_info, mock_error, mock_create):
+        """Test rejects of a byte-split shard carry the row numbers of the source file"""
+        mock_create.return_value = ApiResult(True)
+        csv_path = self.write_csv("email,name,role\n" + "".join(
+            f"u{i}@example.com,\"U\n{i}\",user\n" if i % 7 else f",Missing{i},user\n" for i in range(40)))
+        shard_dir = os.path.join(self.temp_dir.name, "shards")
+        split_file(csv_path, shard_dir, 3)
+        run_worker(shard_dir, lambda path, rejects, checkpoint: main.create_users(path, rejects_file=rejects,
+                                                                                checkpoint=checkpoint))
+        merged_path = os.path.join(self.temp_dir.name, "rejects.csv")
+        merge_results(shard_dir, rejects_file=merged_path)
+        
+        with open(merged_path, newline="") as f:
+            rows = [int(row[1]) for row in list(csv.reader(f))[1:]]
+        self.assertEqual(sorted(rows), [i + 2 for i in range(40) if i % 7 == 0])
+    
+    @patch('os.path.exists')
+    @patch('main.compile_validator')
+    @patch('main.create_user')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_create_users_rule_failure(self, mock_info, mock_error, mock_create, mock_compile, mock_exists):
+        """Test create_users skips rows rejected by the compiled rules"""
+        mock_exists.return_value = True
+        csv_data = """email,name,role
+alice@example.com,Alice,admin
+bob@example.com,Bob,root"""
+        csv_path = self.write_csv(csv_data)
+        mock_compile.return_value = lambda row: "Invalid value for field role: root" if row["role"] == "root" else None
+        mock_create.return_value = ApiResult(True)
+        
+        result = main.create_users(csv_path)
+        
+        self.assertEqual(result.success, 1)
+        self.assertEqual(result.skipped, 1)
+        self.assertEqual(mock_create.call_count, 1)
+    
     @patch('main.create_users')
     @patch('logging.info')
     def test_main_function(self, mock_info, mock_create_users):
         """Test main function"""
         # Setup mock create_users
-        mock_create_users.return_value = {"success": 2, "errors": 1, "skipped": 1}
+        mock_create_users.return_value = make_report(success=2, errors=1, skipped=1)
         
         # Call main
-        exit_code = main.main()
+        exit_code = main.main([])
         
         # Note: setup_logging is called at module level, not in main function anymore
         
@@ -174,14 +568,106 @@ class TestMain(unittest.TestCase):
     def test_main_function_success(self, mock_info, mock_create_users):
         """Test main function with all successful operations"""
         # Setup mock create_users with no errors
-        mock_create_users.return_value = {"success": 2, "errors": 0, "skipped": 0}
+        mock_create_users.return_value = make_report(success=2)
         
         # Call main
-        exit_code = main.main()
+        exit_code = main.main([])
         
         # Verify exit code (should be zero for success)
         self.assertEqual(exit_code, 0)
     
+    @patch('main.create_users')
+    @patch('logging.info')
+    def test_main_json_report(self, mock_info, mock_create_users):
+        """Test main prints the run report as JSON with --report-format json"""
+        mock_create_users.return_value = make_report(success=2, retries=3)
+        
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            exit_code = main.main(["--report-format", "json", "--progress-interval", "0"])
+        
+        report = json.loads(stdout.getvalue())
+        self.assertEqual(exit_code, 0)
+        self.assertEqual((report["success"], report["retries"]), (2, 3))
+        self.assertIn("p99_ms", report["latency"])
+    
+    def test_main_status(self):
+        """Test the status command reports whether users were created and lists runs"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, "outcomes.db")
+            with OutcomeStore(db_path) as store:
+                store.start_run("users.csv")
+                store.record(2, "alice@example.com", "created")
+                store.record(3, "bob@example.com", "failed", "http_status", 500, "API returned status code 500")
+                store.finish_run(make_report(success=1, errors=1))
+            
+            with patch('sys.stdout', new_callable=StringIO) as stdout:
+                created = main.main(["status", "--db", db_path, "alice@example.com"])
+            self.assertEqual(created, 0)
+            self.assertIn("alice@example.com: created in run 1", stdout.getvalue())
+            
+            with patch('sys.stdout', new_callable=StringIO) as stdout:
+                failed = main.main(["status", "--db", db_path, "bob@example.com", "alice@example.com"])
+            self.assertEqual(failed, 1)
+            self.assertIn("bob@example.com: not created", stdout.getvalue())
+            self.assertIn("failed (http_status 500): API returned status code 500", stdout.getvalue())
+            
+            with patch('sys.stdout', new_callable=StringIO) as stdout:
+                main.main(["status", "--db", db_path, "--format", "json"])
+            runs = json.loads(stdout.getvalue())
+            self.assertEqual((runs[0]["created"], runs[0]["failed"]), (1, 1))
+    
+    @patch('main.run_load_test')
+    @patch('logging.error')
+    @patch('logging.info')
+    def test_main_load_test(self, mock_info, mock_error, mock_run):
+        """Test --load-test replays the file's valid rows in a loop, once each and without retries"""
+        mock_run.return_value = LoadTestReport(LoadProfile(5, 2), 1)
+        csv_path = self.write_csv("email,name,role\nAlice@Example.com,Alice,admin\n,Bob,user\ncarol@example.com,Carol,user\n")
+        
+        with patch('sys.stdout', new_callable=StringIO) as stdout:
+            exit_code = main.main([csv_path, "--load-test", "--rate", "5", "--ramp-to", "50", "--duration", "2",
+                                   "--window", "1", "--report-format", "json"])
+        
+        self.assertEqual(exit_code, 0)
+        rows, profile = mock_run.call_args.args
+        self.assertEqual([row["email"] for row, _ in zip(rows, range(4))],
+                         ["Alice@example.com", "carol@example.com", "Alice@example.com", "carol@example.com"])
+        self.assertEqual(profile, LoadProfile(5, 2, 50))
+        self.assertEqual(mock_run.call_args.kwargs["max_retries"], 0)
+        self.assertEqual(json.loads(stdout.getvalue())["window"], 1)
+        
+        # A load test needs rows to send and a positive duration
+        self.assertEqual(main.main([self.write_csv("email,name,role\n,Bob,user\n"), "--load-test"]), 1)
+        with patch('sys.stderr', new_callable=StringIO), self.assertRaises(SystemExit):
+            main.main([csv_path, "--load-test", "--duration", "0"])
+    
+    @patch('main.Profiler')
+    @patch('main.create_users')
+    @patch('logging.info')
+    def test_main_profile(self, mock_info, mock_create_users, mock_profiler):
+        """Test main runs create_users under the profiler and writes the profile with --profile"""
+        mock_create_users.return_value = make_report(success=1)
+        
+        exit_code = main.main(["--profile", "--progress-interval", "0"])
+        
+        self.assertEqual(exit_code, 0)
+        mock_profiler.return_value.__enter__.assert_called_once()
+        mock_profiler.return_value.write.assert_called_once_with()
+    
+    @patch('main.print_dry_run_report')
+    @patch('main.dry_run_file')
+    @patch('main.create_users')
+    @patch('logging.info')
+    def test_main_dry_run(self, mock_info, mock_create_users, mock_dry_run, mock_print):
+        """Test main function in dry-run mode does not create users"""
+        mock_dry_run.return_value = {"errors": 0}
+        
+        exit_code = main.main(["users.csv", "--dry-run", "--workers", "2", "--rejects", "rejects.csv"])
+        
+        self.assertEqual(exit_code, 0)
+        mock_create_users.assert_not_called()
+        mock_dry_run.assert_called_once_with("users.csv", rejects_file="rejects.csv", workers=2)
+    
     @patch('logging.info')
     def test_handle_keyboard_interrupt(self, mock_info):
         """Test keyboard interrupt handler"""
@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.outcomes import OutcomeStore, OUTCOME_CREATED, OUTCOME_FAILED, OUTCOME_SKIPPED
+from utils.report import RunReport
+
+
+class TestOutcomeStore(unittest.TestCase):
+    """Test cases for the outcome store"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "outcomes.db")
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_outcomes_written_in_batches(self):
+        """Test outcomes are buffered until batch_size are pending"""
+        with OutcomeStore(self.path, batch_size=2) as store, OutcomeStore(self.path) as reader:
+            store.start_run("users.csv")
+            store.record(2, "alice@example.com", OUTCOME_CREATED)
+            self.assertEqual(reader.lookup("alice@example.com"), [])
+            
+            store.record(3, "bob@example.com", OUTCOME_FAILED, "http_status", 500, "API returned status code 500")
+            self.assertEqual(len(reader.lookup("alice@example.com")), 1)
+            
+            store.record(4, "carol@example.com", OUTCOME_CREATED)
+            self.assertEqual(reader.lookup("carol@example.com"), [])
+        
+        # Closing writes the rest
+        with OutcomeStore(self.path) as reader:
+            self.assertEqual(len(reader.lookup("carol@example.com")), 1)
+    
+    def test_lookup_newest_first(self):
+        """Test lookup returns the outcomes of every run, newest first"""
+        with OutcomeStore(self.path) as store:
+            first = store.start_run("users.csv")
+            store.record(2, "alice@example.com", OUTCOME_FAILED, "http_status", 500, "API returned status code 500")
+            store.finish_run(RunReport())
+            second = store.start_run("users.csv")
+            store.record(5, "alice@example.com", OUTCOME_CREATED)
+            
+            entries = store.lookup("alice@example.com")
+        
+        self.assertEqual([entry["run_id"] for entry in entries], [second, first])
+        self.assertEqual(entries[0]["outcome"], OUTCOME_CREATED)
+        self.assertEqual(entries[1]["row_num"], 2)
+        self.assertEqual(entries[1]["status_code"], 500)
+        self.assertEqual(entries[1]["source"], os.path.abspath("users.csv"))
+    
+    def test_run_counts(self):
+        """Test run_counts returns the outcome counts and totals of recent runs"""
+        report = RunReport()
+        report.success, report.skipped, report.interrupted = 2, 1, True
+        with OutcomeStore(self.path) as store:
+            store.start_run("old.csv")
+            store.finish_run(RunReport())
+            run_id = store.start_run("users.csv")
+            store.record(2, "alice@example.com", OUTCOME_CREATED)
+            store.record(3, "bob@example.com", OUTCOME_CREATED)
+            store.record(4, None, OUTCOME_SKIPPED, "missing_field", message="Missing required field: email")
+            store.finish_run(report)
+            
+            runs = store.run_counts(limit=1)
+        
+        self.assertEqual(len(runs), 1)
+        self.assertEqual(runs[0]["id"], run_id)
+        self.assertEqual((runs[0][OUTCOME_CREATED], runs[0][OUTCOME_SKIPPED], runs[0][OUTCOME_FAILED]), (2, 1, 0))
+        self.assertTrue(runs[0]["interrupted"])
+        self.assertIsNotNone(runs[0]["finished"])
+    
+    def test_unused_store_creates_nothing(self):
+        """Test the database is only created once the store is used"""
+        OutcomeStore(self.path).close()
+        
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
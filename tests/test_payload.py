@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+import gzip
+import json
+import os
+import sys
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.payload import PayloadBuilder, encode_json
+
+
+class TestPayloadBuilder(unittest.TestCase):
+    """Test cases for the payload builder"""
+    
+    def test_encode_matches_json(self):
+        """Test encoded rows match compact json.dumps of the schema fields, including escaped and missing values"""
+        builder = PayloadBuilder(["email", "name", "note", "100%"], compress=False)
+        row = {"email": "a@example.com", "name": 'Zoë "Z" \\ O\'Neil\n', "100%": "yes", "unused": "x"}
+        
+        body = builder.encode(row)
+        
+        expected = {"email": "a@example.com", "name": 'Zoë "Z" \\ O\'Neil\n', "note": None, "100%": "yes"}
+        self.assertEqual(body, json.dumps(expected, separators=(",", ":")).encode())
+    
+    @patch('logging.warning')
+    def test_from_header(self, mock_warning):
+        """Test the schema defaults to every column and drops configured fields missing from the header"""
+        self.assertEqual(PayloadBuilder.from_header(["email", "name", "role"]).fields, ["email", "name", "role"])
+        
+        builder = PayloadBuilder.from_header(["email", "name", "role"], fields=["email", "phone"])
+        
+        self.assertEqual(builder.fields, ["email"])
+        mock_warning.assert_called_once()
+    
+    def test_gzip_above_threshold(self):
+        """Test only bodies of at least compress_min_bytes are gzipped"""
+        builder = PayloadBuilder(["email", "bio"], compress=True, compress_min_bytes=200)
+        small = {"email": "a@example.com", "bio": "short"}
+        large = {"email": "a@example.com", "bio": "long " * 100}
+        
+        body, headers = builder.build(small)
+        self.assertEqual(json.loads(body), small)
+        self.assertNotIn("Content-Encoding", headers)
+        
+        body, headers = builder.build(large)
+        self.assertEqual(headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(body)), large)
+        self.assertLess(len(body), 200)
+    
+    def test_encode_json(self):
+        """Test the fallback encoder produces compact JSON"""
+        body, headers = encode_json({"a": 1, "b": [1, 2]})
+        
+        self.assertEqual(body, b'{"a":1,"b":[1,2]}')
+        self.assertEqual(headers["Content-Type"], "application/json")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import os
+import random
+import sys
+import time
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.policies import RetryPolicy, TimeoutPolicy
+
+
+class TestRetryPolicy(unittest.TestCase):
+    """Test cases for the retry policy"""
+    
+    def test_exponential_backoff(self):
+        """Test exponential backoff doubles the delay up to max_delay"""
+        policy = RetryPolicy(backoff="exponential", base_delay=2, max_delay=5)
+        
+        self.assertEqual([policy.delay(n, 0) for n in (1, 2, 3)], [2, 4, 5])
+    
+    def test_decorrelated_jitter_bounds(self):
+        """Test decorrelated jitter stays between base_delay and three times the previous delay"""
+        policy = RetryPolicy(backoff="decorrelated", base_delay=0.1, max_delay=10)
+        rng = random.Random(42)
+        
+        previous = policy.base_delay
+        for retry_count in range(1, 20):
+            delay = policy.delay(retry_count, previous, rng)
+            self.assertGreaterEqual(delay, 0.1)
+            self.assertLessEqual(delay, min(10, previous * 3))
+            previous = delay
+    
+    def test_unknown_backoff(self):
+        """Test an unknown backoff type is rejected"""
+        with self.assertRaises(ValueError):
+            RetryPolicy(backoff="linear").delay(1, 1)
+
+
+class TestTimeoutPolicy(unittest.TestCase):
+    """Test cases for the timeout policy"""
+    
+    def test_no_deadline(self):
+        """Test attempts use the configured timeouts without a deadline"""
+        policy = TimeoutPolicy(connect=1, read=5, deadline=0)
+        
+        self.assertIsNone(policy.start())
+        self.assertEqual(policy.attempt_timeout(None), (1, 5))
+    
+    def test_deadline_caps_attempt_timeout(self):
+        """Test attempt timeouts never exceed the time left before the deadline"""
+        policy = TimeoutPolicy(connect=1, read=5, deadline=2)
+        
+        connect, read = policy.attempt_timeout(time.monotonic() + 2)
+        self.assertEqual(connect, 1)
+        self.assertLessEqual(read, 2)
+        self.assertIsNone(policy.attempt_timeout(time.monotonic() - 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
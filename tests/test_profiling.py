@@ -0,0 +1,87 @@
+import unittest
+from unittest.mock import patch
+import os
+import pstats
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.profiling import Profiler, timed, timing_report, reset_timings
+
+
+def busy_worker(n):
+    """Function run in worker threads so the profiler has something to find"""
+    return sum(range(n))
+
+
+class TestTimingHooks(unittest.TestCase):
+    """Test cases for the timing hooks"""
+    
+    def setUp(self):
+        reset_timings()
+    
+    def test_disabled_hook_returns_function(self):
+        """Test a disabled hook leaves the function untouched"""
+        self.assertIs(timed(enabled=False)(busy_worker), busy_worker)
+    
+    def test_enabled_hook_records_calls(self):
+        """Test an enabled hook counts calls, including ones that raise"""
+        @timed("square", enabled=True)
+        def square(x):
+            if x < 0:
+                raise ValueError("negative")
+            return x * x
+        
+        self.assertEqual(square(3), 9)
+        with self.assertRaises(ValueError):
+            square(-1)
+        
+        report = timing_report()
+        self.assertEqual(report["square"]["calls"], 2)
+        self.assertGreaterEqual(report["square"]["max_ms"], report["square"]["mean_ms"])
+        
+        reset_timings()
+        self.assertEqual(timing_report(), {})
+
+
+class TestProfiler(unittest.TestCase):
+    """Test cases for the profiler"""
+    
+    @patch('logging.info')
+    def test_profiles_worker_threads(self, mock_info):
+        """Test functions run in threads started inside the block are profiled"""
+        with Profiler() as profiler:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                list(executor.map(busy_worker, [200000] * 4))
+        
+        with tempfile.TemporaryDirectory() as temp_dir:
+            profile_path, summary_path = profiler.write(temp_dir, top=10)
+            stats = pstats.Stats(profile_path)
+            with open(summary_path) as f:
+                summary = f.read()
+        
+        calls = {function[2]: stat[1] for function, stat in stats.stats.items()}
+        self.assertEqual(calls["busy_worker"], 4)
+        self.assertIn("Top 10 functions by cumulative time", summary)
+        # The work done in the worker threads tops the internal time ranking
+        self.assertIn("builtins.sum", summary)
+    
+    @unittest.skipUnless(sys.version_info >= (3, 12), "cProfile is process-wide from Python 3.12")
+    @patch('logging.info')
+    def test_single_profiler_on_process_wide_cprofile(self, mock_info):
+        """Test worker threads do not start profilers of their own where only one may be active"""
+        with Profiler() as profiler:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                results = list(executor.map(busy_worker, [1000] * 4))
+        
+        self.assertEqual(len(results), 4)
+        self.assertEqual(len(profiler._profiles), 1)
+        calls = {function[2]: stat[1] for function, stat in profiler.stats().stats.items()}
+        self.assertEqual(calls["busy_worker"], 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
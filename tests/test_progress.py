@@ -0,0 +1,118 @@
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import time
+import logging
+import threading
+from io import StringIO
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.progress import ProgressReporter
+
+
+class TestProgressReporter(unittest.TestCase):
+    """Test cases for the progress reporter"""
+    
+    def test_render_includes_counters(self):
+        """Test the status line contains every counter"""
+        progress = ProgressReporter(total_bytes=200, is_tty=False)
+        progress.rows = 10
+        progress.bytes_read = 50
+        progress.in_flight = 1
+        progress.retries = 3
+        progress.success, progress.errors, progress.skipped = 7, 1, 2
+        
+        line = progress.render()
+        
+        self.assertIn("10 rows", line)
+        self.assertIn("50/200 bytes (25.0%)", line)
+        self.assertIn("rows/sec", line)
+        self.assertIn("ETA", line)
+        self.assertIn("in-flight 1", line)
+        self.assertIn("retries 3", line)
+        self.assertIn("ok 7 / errors 1 / skipped 2", line)
+    
+    def test_eta_unknown_without_file_size(self):
+        """Test no ETA is given when the file size is unknown"""
+        progress = ProgressReporter(total_bytes=0, is_tty=False)
+        progress.bytes_read = 100
+        
+        self.assertIsNone(progress.eta())
+        self.assertNotIn("ETA", progress.render())
+    
+    @patch('logging.info')
+    def test_report_logs_when_not_tty(self, mock_info):
+        """Test reports become log lines when stdout is not a terminal"""
+        stream = StringIO()
+        ProgressReporter(stream=stream, is_tty=False).report()
+        
+        mock_info.assert_called_once()
+        self.assertIn("Progress:", mock_info.call_args[0][0])
+        self.assertEqual(stream.getvalue(), "")
+    
+    def test_report_redraws_line_on_tty(self):
+        """Test reports redraw a single line on a terminal"""
+        stream = StringIO()
+        ProgressReporter(stream=stream, is_tty=True).report()
+        
+        self.assertTrue(stream.getvalue().startswith("\r"))
+        self.assertNotIn("\n", stream.getvalue())
+    
+    def test_log_lines_clear_status_line(self):
+        """Test console log lines are written above the live status line on a terminal"""
+        stream = StringIO()
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger = logging.getLogger()
+        old_level = logger.level
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        try:
+            progress = ProgressReporter(interval=60, stream=stream, is_tty=True).start()
+            progress.report()
+            line = progress._line
+            logging.info("Created user row 2")
+            progress.stop()
+            logging.info("After the run")
+        finally:
+            logger.removeHandler(handler)
+            logger.setLevel(old_level)
+        
+        output = stream.getvalue()
+        self.assertIn(f"\r{line}\x1b[K\r\x1b[KCreated user row 2\n\r{line}\x1b[K", output)
+        self.assertTrue(output.endswith("\nAfter the run\n"))
+        self.assertIs(handler.stream, stream)
+    
+    def test_on_retry_from_threads(self):
+        """Test retries counted from several threads are not lost"""
+        progress = ProgressReporter(is_tty=False)
+        
+        def retry():
+            for _ in range(10000):
+                progress.on_retry()
+        threads = [threading.Thread(target=retry) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.assertEqual(progress.retries, 40000)
+    
+    @patch('logging.info')
+    def test_background_reporting(self, mock_info):
+        """Test the background thread reports at the configured interval"""
+        progress = ProgressReporter(interval=0.01, is_tty=False)
+        with progress:
+            progress.on_retry()
+            time.sleep(0.1)
+        
+        # At least one periodic report plus the final one from stop()
+        self.assertGreaterEqual(mock_info.call_count, 2)
+        self.assertIn("retries 1", mock_info.call_args[0][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+import json
+import os
+import sys
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.api import ApiResult, RESULT_HTTP_STATUS, RESULT_TIMEOUT
+from utils.report import RunReport, LatencyHistogram, classify_rule_error, ERROR_MISSING_FIELD, ERROR_DUPLICATE
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Test cases for the latency histogram"""
+    
+    def test_percentiles(self):
+        """Test percentiles are within the bucket width of the true value"""
+        histogram = LatencyHistogram()
+        for millis in range(1, 1001):
+            histogram.record(millis / 1000)
+        
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 0.5, delta=0.05)
+        self.assertAlmostEqual(histogram.percentile(99), 0.99, delta=0.1)
+        self.assertEqual(histogram.percentile(100), 1.0)
+        self.assertEqual(LatencyHistogram().percentile(50), 0.0)
+    
+    def test_round_trip_and_merge(self):
+        """Test a histogram survives to_dict/from_dict and merges by adding counts"""
+        histogram = LatencyHistogram()
+        histogram.record(0.01)
+        histogram.record(2.0)
+        
+        restored = LatencyHistogram.from_dict(json.loads(json.dumps(histogram.to_dict())))
+        restored.merge(histogram)
+        
+        self.assertEqual(restored.count, 4)
+        self.assertEqual(restored.max, 2.0)
+        self.assertAlmostEqual(restored.total, 4.02)
+
+
+class TestRunReport(unittest.TestCase):
+    """Test cases for the run report"""
+    
+    def test_record_results(self):
+        """Test results are counted by error class, HTTP status, retries and latency"""
+        report = RunReport()
+        report.record_result(ApiResult(True, retries=1, elapsed=0.1))
+        report.record_result(ApiResult(False, "API error", RESULT_HTTP_STATUS, 500, elapsed=0.2))
+        report.record_result(ApiResult(False, "API error", RESULT_HTTP_STATUS, 409, elapsed=0.2))
+        report.record_result(ApiResult(False, "Timed out", RESULT_TIMEOUT, retries=3, elapsed=9.0))
+        report.record_skip(ERROR_MISSING_FIELD)
+        
+        self.assertEqual((report.success, report.errors, report.skipped), (1, 3, 1))
+        self.assertEqual(report.retries, 4)
+        self.assertEqual(report.error_classes, {"http_status": 1, "duplicate": 1, "timeout": 1, "missing_field": 1})
+        self.assertEqual(report.status_codes, {500: 1, 409: 1})
+        self.assertEqual(report.latency.count, 4)
+        self.assertEqual(report.rows, 5)
+    
+    def test_merge_through_dict(self):
+        """Test reports stored as dictionaries merge into the combined counts"""
+        first = RunReport()
+        first.record_result(ApiResult(False, "API error", RESULT_HTTP_STATUS, 500, elapsed=0.5))
+        second = RunReport()
+        second.record_result(ApiResult(True, elapsed=0.1))
+        second.interrupted = True
+        
+        merged = RunReport()
+        for report in (first, second):
+            merged.merge(RunReport.from_dict(json.loads(json.dumps(report.to_dict(include_histogram=True)))))
+        
+        self.assertEqual((merged.success, merged.errors), (1, 1))
+        self.assertEqual(merged.status_codes, {500: 1})
+        self.assertEqual(merged.latency.count, 2)
+        self.assertTrue(merged.interrupted)
+    
+    def test_format_text(self):
+        """Test the text report lists the totals and error classes"""
+        report = RunReport()
+        report.record_skip(ERROR_MISSING_FIELD)
+        report.elapsed = 2.0
+        
+        text = report.format_text()
+        
+        self.assertIn("Skipped: 1", text)
+        self.assertIn("0.5 rows/sec", text)
+        self.assertIn("missing_field  1", text)
+        self.assertNotIn("Unfinished", text)
+    
+    def test_classify_rule_error(self):
+        """Test uniqueness violations are told apart from other rule violations"""
+        self.assertEqual(classify_rule_error("Duplicate value for field email: a@example.com"), ERROR_DUPLICATE)
+        self.assertEqual(classify_rule_error("Invalid value for field role: root"), "rule_violation")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+import os
+import sys
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.scheduling import SendQueue, compile_priority
+
+
+class TestCompilePriority(unittest.TestCase):
+    """Test cases for priority rules"""
+    
+    def test_priority_classes(self):
+        """Test rows get the lowest class of the rules they match, ignoring case and whitespace"""
+        priority = compile_priority({"role": {"admin": 0, "Manager": 1}, "team": {"ops": 2}}, default=5)
+        
+        self.assertEqual(priority({"role": " ADMIN ", "team": "ops"}), 0)
+        self.assertEqual(priority({"role": "manager"}), 1)
+        self.assertEqual(priority({"role": "user", "team": "ops"}), 2)
+        self.assertEqual(priority({"role": "user"}), 5)
+        self.assertEqual(priority({"role": None}), 5)
+        self.assertEqual(compile_priority({}, default=3)({"role": "admin"}), 3)
+
+
+class TestSendQueue(unittest.TestCase):
+    """Test cases for the send queue"""
+    
+    def test_priority_then_fifo(self):
+        """Test lower classes come out first and each class keeps push order"""
+        queue = SendQueue(capacity=10)
+        for priority, item in [(5, "a"), (0, "b"), (5, "c"), (1, "d"), (0, "e")]:
+            queue.push(priority, item)
+        
+        self.assertEqual([queue.pop() for _ in range(len(queue))], ["b", "e", "d", "a", "c"])
+    
+    def test_sources_take_turns(self):
+        """Test sources of the same class are served round-robin"""
+        queue = SendQueue(capacity=10)
+        for item in ["a1", "a2", "a3"]:
+            queue.push(0, item, source="a.csv")
+        queue.push(0, "b1", source="b.csv")
+        queue.push(0, "b2", source="b.csv")
+        queue.push(1, "c1", source="c.csv")
+        
+        self.assertEqual(queue.drain(), ["a1", "b1", "a2", "b2", "a3", "c1"])
+        self.assertEqual(len(queue), 0)
+    
+    def test_bounded(self):
+        """Test pushing to a full queue raises and popping an empty one raises"""
+        queue = SendQueue(capacity=2)
+        queue.push(1, "a")
+        self.assertFalse(queue.full)
+        queue.push(1, "b")
+        self.assertTrue(queue.full)
+        
+        with self.assertRaises(OverflowError):
+            queue.push(0, "c")
+        queue.drain()
+        with self.assertRaises(IndexError):
+            queue.pop()
+
+
+if __name__ == "__main__":
+    unittest.main()
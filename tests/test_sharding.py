@@ -0,0 +1,263 @@
+import unittest
+from unittest.mock import patch
+import csv
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.sharding import (
+    split_file, claim_shard, run_worker, run_local_workers, merge_results, shard_path, lock_is_stale, ShardCheckpoint
+)
+from utils.report import RunReport
+
+
+def make_report(**counts):
+    """Builds a RunReport with the given counter values"""
+    report = RunReport()
+    for key, value in counts.items():
+        setattr(report, key, value)
+    return report
+
+
+def count_rows_worker(shard_dir):
+    """Worker process target that records the number of rows in each shard it claims"""
+    def process(path, rejects_path, checkpoint):
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        return make_report(success=len(rows))
+    run_worker(shard_dir, process)
+
+
+class TestSharding(unittest.TestCase):
+    """Test cases for the sharding module"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.shard_dir = os.path.join(self.temp_dir.name, "shards")
+        self.csv_path = os.path.join(self.temp_dir.name, "users.csv")
+        with open(self.csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "email", "role"])
+            for i in range(50):
+                # Every fifth name contains a quoted newline
+                name = f"User\n{i}" if i % 5 == 0 else f"User {i}"
+                writer.writerow([name, f"user{i % 20}@example.com", "user"])
+        with open(self.csv_path, newline="") as f:
+            self.rows = list(csv.reader(f))[1:]
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def read_shards(self, manifest):
+        shards = []
+        for shard in manifest["shards"]:
+            with open(shard_path(self.shard_dir, shard["index"], ".csv"), newline="") as f:
+                reader = csv.reader(f)
+                self.assertEqual(next(reader), ["name", "email", "role"])
+                shards.append(list(reader))
+        return shards
+    
+    @patch('logging.info')
+    def test_split_by_bytes_keeps_records_whole(self, mock_info):
+        """Test byte-range shards end on record boundaries, even with quoted newlines"""
+        manifest = split_file(self.csv_path, self.shard_dir, 4, "bytes")
+        shards = self.read_shards(manifest)
+        
+        self.assertEqual(len(shards), 4)
+        self.assertEqual([row for shard in shards for row in shard], self.rows)
+    
+    @patch('logging.info')
+    def test_split_by_bytes_records_first_rows(self, mock_info):
+        """Test each byte-range shard records the source row number of its first record"""
+        manifest = split_file(self.csv_path, self.shard_dir, 4, "bytes")
+        shards = self.read_shards(manifest)
+        first_rows = []
+        
+        def process(path, rejects_path, checkpoint):
+            first_rows.append(checkpoint.row_num)
+            return make_report()
+        run_worker(self.shard_dir, process)
+        
+        expected = [2 + sum(len(shard) for shard in shards[:index]) for index in range(len(shards))]
+        self.assertEqual([shard["first_row"] for shard in manifest["shards"]], expected)
+        self.assertEqual(first_rows, expected)
+    
+    @patch('logging.info')
+    def test_split_by_bytes_with_quotes_inside_fields(self, mock_info):
+        """Test quotes that do not start a field do not move the shard boundaries"""
+        with open(self.csv_path, "w", newline="") as f:
+            f.write("name,email,role\n")
+            f.write('Bob 5\'10" tall,bob@example.com,user\n')
+            for i in range(50):
+                f.write(f'User {i},user{i}@example.com,user\n')
+        with open(self.csv_path, newline="") as f:
+            rows = list(csv.reader(f))[1:]
+        
+        shards = self.read_shards(split_file(self.csv_path, self.shard_dir, 4, "bytes"))
+        
+        self.assertEqual(len(shards), 4)
+        self.assertEqual([row for shard in shards for row in shard], rows)
+    
+    @patch('logging.info')
+    def test_split_by_email_groups_addresses(self, mock_info):
+        """Test email shards keep every occurrence of an address together"""
+        manifest = split_file(self.csv_path, self.shard_dir, 3, "email")
+        shards = self.read_shards(manifest)
+        
+        owners = {}
+        for index, shard in enumerate(shards):
+            for row in shard:
+                self.assertEqual(owners.setdefault(row[1], index), index)
+        self.assertEqual(sum(len(shard) for shard in shards), len(self.rows))
+    
+    @patch('logging.info')
+    def test_split_refuses_existing_manifest(self, mock_info):
+        """Test splitting into a directory that already has a manifest fails"""
+        split_file(self.csv_path, self.shard_dir, 2)
+        with self.assertRaises(FileExistsError):
+            split_file(self.csv_path, self.shard_dir, 2)
+    
+    @patch('logging.info')
+    def test_claim_is_exclusive(self, mock_info):
+        """Test each shard can only be claimed once"""
+        split_file(self.csv_path, self.shard_dir, 2)
+        
+        self.assertEqual(claim_shard(self.shard_dir), 0)
+        self.assertEqual(claim_shard(self.shard_dir), 1)
+        self.assertIsNone(claim_shard(self.shard_dir))
+    
+    @patch('logging.info')
+    def test_interrupted_shard_is_released(self, mock_info):
+        """Test an interrupted shard can be claimed again and a finished one cannot"""
+        split_file(self.csv_path, self.shard_dir, 2)
+        results = [make_report(success=3, interrupted=True)]
+        
+        # Stop after the first shard, as a worker that received SIGTERM would
+        finished = run_worker(self.shard_dir, lambda path, rejects, checkpoint: results.pop(),
+                              should_stop=lambda: not results)
+        
+        self.assertEqual(finished, [])
+        with open(shard_path(self.shard_dir, 0, ".status.json")) as f:
+            self.assertEqual(json.load(f)["state"], "interrupted")
+        self.assertEqual(claim_shard(self.shard_dir), 0)
+    
+    def write_lock(self, index, owner, age=0.0):
+        """Writes a shard lock held by owner, last refreshed age seconds ago"""
+        path = shard_path(self.shard_dir, index, ".lock")
+        with open(path, "w") as f:
+            f.write(f"{owner}\n")
+        if age:
+            os.utime(path, (time.time() - age, time.time() - age))
+        return path
+    
+    @patch('logging.warning')
+    @patch('logging.info')
+    def test_stale_locks_are_reclaimed(self, mock_info, mock_warning):
+        """Test locks of dead processes and locks that are no longer refreshed can be claimed"""
+        split_file(self.csv_path, self.shard_dir, 4)
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        host = socket.gethostname()
+        self.write_lock(0, f"{host}:{dead.pid}")
+        self.write_lock(1, "other-host:1", age=120)
+        live = self.write_lock(2, f"{host}:{os.getpid()}")
+        self.write_lock(3, "other-host:1")
+        
+        self.assertTrue(lock_is_stale(shard_path(self.shard_dir, 0, ".lock"), lock_timeout=60))
+        self.assertFalse(lock_is_stale(live, lock_timeout=60))
+        self.assertEqual(claim_shard(self.shard_dir, lock_timeout=60), 0)
+        self.assertEqual(claim_shard(self.shard_dir, lock_timeout=60), 1)
+        self.assertIsNone(claim_shard(self.shard_dir, lock_timeout=60))
+        with open(shard_path(self.shard_dir, 1, ".lock")) as f:
+            self.assertEqual(f.read(), f"{host}:{os.getpid()}\n")
+    
+    @patch('logging.info')
+    def test_lock_refreshed_while_processing(self, mock_info):
+        """Test a worker keeps its lock fresh while it processes a long shard"""
+        split_file(self.csv_path, self.shard_dir, 1)
+        lock_path = shard_path(self.shard_dir, 0, ".lock")
+        ages = []
+        
+        def process(path, rejects_path, checkpoint):
+            os.utime(lock_path, (time.time() - 100, time.time() - 100))
+            time.sleep(0.3)
+            ages.append(time.time() - os.path.getmtime(lock_path))
+            return make_report(success=1)
+        run_worker(self.shard_dir, process, lock_timeout=0.2)
+        
+        self.assertLess(ages[0], 1)
+    
+    def test_checkpoint_tracks_rows_finished_out_of_order(self):
+        """Test the checkpoint resumes at the first unfinished row and remembers later finished rows"""
+        path = os.path.join(self.temp_dir.name, "checkpoint.json")
+        checkpoint = ShardCheckpoint(path, interval=60)
+        self.assertFalse(checkpoint.load().resuming)
+        for row_num, offset in ((2, 10), (3, 20), (4, 30), (5, 40)):
+            checkpoint.start(row_num, offset, offset + 10)
+        checkpoint.finish(2)
+        checkpoint.finish(4)
+        report = make_report(success=2)
+        report.record_unfinished()
+        checkpoint.save(report)
+        self.assertFalse(os.path.exists(path))
+        checkpoint.save(report, force=True)
+        
+        resumed = ShardCheckpoint(path).load()
+        
+        self.assertTrue(resumed.resuming)
+        self.assertEqual((resumed.offset, resumed.row_num, resumed.done), (20, 3, {4}))
+        self.assertEqual((resumed.report.success, resumed.report.unfinished), (2, 0))
+        self.assertNotIn("unfinished", resumed.report.error_classes)
+        
+        rejects_path = os.path.join(self.temp_dir.name, "rejects.csv")
+        with open(rejects_path, "w", newline="") as f:
+            csv.writer(f).writerows([["row", "reason"], [2, "a"], [3, "b"], [4, "c"], [5, "d"]])
+        resumed.prune_rejects(rejects_path)
+        with open(rejects_path, newline="") as f:
+            self.assertEqual([row[0] for row in csv.reader(f)], ["row", "2", "4"])
+    
+    @patch('logging.info')
+    def test_merge_results(self, mock_info):
+        """Test merging sums the shard summaries and concatenates rejects"""
+        split_file(self.csv_path, self.shard_dir, 2)
+        
+        def process(path, rejects_path, checkpoint):
+            with open(rejects_path, "w", newline="") as f:
+                csv.writer(f).writerows([["row", "reason", "name"], [2, "Missing required field: email", "X"]])
+            return make_report(success=4, errors=1, skipped=1)
+        run_worker(self.shard_dir, process)
+        
+        rejects_file = os.path.join(self.temp_dir.name, "rejects.csv")
+        merged = merge_results(self.shard_dir, rejects_file=rejects_file)
+        
+        report = merged["report"]
+        self.assertEqual((report.success, report.errors, report.skipped), (8, 2, 2))
+        self.assertEqual((merged["completed"], merged["shards"]), (2, 2))
+        self.assertFalse(report.interrupted)
+        with open(rejects_file, newline="") as f:
+            rejects = list(csv.reader(f))
+        self.assertEqual(rejects[0], ["shard", "row", "reason", "name"])
+        self.assertEqual([row[0] for row in rejects[1:]], ["0", "1"])
+    
+    @patch('logging.info')
+    def test_local_worker_processes(self, mock_info):
+        """Test several processes share the shards through the directory"""
+        split_file(self.csv_path, self.shard_dir, 5)
+        
+        exit_codes = run_local_workers(self.shard_dir, 2, count_rows_worker)
+        merged = merge_results(self.shard_dir)
+        
+        self.assertEqual(exit_codes, [0, 0])
+        self.assertEqual(merged["completed"], 5)
+        self.assertEqual(merged["report"].success, len(self.rows))
+
+
+if __name__ == "__main__":
+    unittest.main()
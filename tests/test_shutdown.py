@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import patch
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED
+
+# Add parent directory to path to allow imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.shutdown import ShutdownCoordinator
+
+
+class TestShutdownCoordinator(unittest.TestCase):
+    """Test cases for the shutdown coordinator"""
+    
+    def test_request(self):
+        """Test a request is recorded with its signal"""
+        shutdown = ShutdownCoordinator()
+        self.assertFalse(shutdown.requested)
+        
+        shutdown.request(signal.SIGTERM)
+        
+        self.assertTrue(shutdown.requested)
+        self.assertEqual(shutdown.exit_code(), 128 + signal.SIGTERM)
+    
+    def test_wait(self):
+        """Test wait returns False on timeout and True as soon as a shutdown is requested"""
+        shutdown = ShutdownCoordinator()
+        self.assertFalse(shutdown.wait(0.01))
+        
+        shutdown.request()
+        start = time.monotonic()
+        
+        self.assertTrue(shutdown.wait(5))
+        self.assertLess(time.monotonic() - start, 1)
+    
+    @patch('logging.warning')
+    def test_signal_requests_shutdown(self, mock_warning):
+        """Test the first signal requests a graceful shutdown and the second forces one"""
+        with ShutdownCoordinator() as shutdown:
+            os.kill(os.getpid(), signal.SIGTERM)
+            self.assertTrue(shutdown.requested)
+            
+            with self.assertRaises(KeyboardInterrupt):
+                os.kill(os.getpid(), signal.SIGTERM)
+        
+        # The previous handler is restored on exit
+        self.assertEqual(signal.getsignal(signal.SIGTERM), signal.SIG_DFL)
+    
+    def test_drain_waits_until_deadline(self):
+        """Test drain returns finished and unfinished requests"""
+        shutdown = ShutdownCoordinator(drain_timeout=0.2)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fast = executor.submit(time.sleep, 0)
+            slow = executor.submit(time.sleep, 1)
+            
+            done, not_done = shutdown.drain({fast, slow})
+        
+        self.assertEqual(done, {fast})
+        self.assertEqual(not_done, {slow})
+    
+    def test_wait_for_returns_on_shutdown(self):
+        """Test wait_for stops waiting on slow requests once a shutdown is requested"""
+        shutdown = ShutdownCoordinator()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            slow = executor.submit(time.sleep, 1)
+            threading.Timer(0.1, shutdown.request).start()
+            start = time.monotonic()
+            
+            done, not_done = shutdown.wait_for({slow})
+            
+            self.assertLess(time.monotonic() - start, 0.8)
+            self.assertEqual(done, set())
+            self.assertEqual(not_done, {slow})
+    
+    def test_wait_for_first_completed(self):
+        """Test wait_for with FIRST_COMPLETED returns as soon as one request finishes"""
+        shutdown = ShutdownCoordinator()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fast = executor.submit(time.sleep, 0.05)
+            slow = executor.submit(time.sleep, 0.5)
+            
+            done, not_done = shutdown.wait_for({fast, slow}, FIRST_COMPLETED)
+        
+        self.assertEqual(done, {fast})
+        self.assertEqual(not_done, {slow})
+    
+    def test_exit_process_skips_abandoned_threads(self):
+        """Test exit_process does not wait for request threads still running"""
+        code = (
+            "import sys, time; sys.path.insert(0, sys.argv[1])\n"
+            "from concurrent.futures import ThreadPoolExecutor\n"
+            "from utils.shutdown import exit_process\n"
+            "executor = ThreadPoolExecutor(max_workers=1)\n"
+            "executor.submit(time.sleep, 30)\n"
+            "executor.shutdown(wait=False)\n"
+            "print('done', flush=False)\n"
+            "exit_process(143)\n"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        start = time.monotonic()
+        result = subprocess.run([sys.executable, "-c", code, root], capture_output=True, text=True, timeout=20)
+        
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(result.returncode, 143)
+        self.assertEqual(result.stdout, "done\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
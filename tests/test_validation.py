@@ -1,11 +1,16 @@
 import unittest
 import os
 import sys
+import random
+import string
 
 # Add parent directory to path to allow imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.validation import validate_user_data, validate_email_address
+from utils.validation import (
+    validate_user_data, validate_email_address, validate_user_batch, validate_email_batch, compile_validator,
+    STATUS_VALID, STATUS_MISSING_FIELD, STATUS_INVALID_EMAIL
+)
 
 
 class TestValidation(unittest.TestCase):
@@ -48,6 +53,86 @@ class TestValidation(unittest.TestCase):
         valid_email, error = validate_email_address(email)
         self.assertIsNone(valid_email)  # Should be None for invalid email
         self.assertIsNotNone(error)     # Should have an error message
+    
+    def test_email_batch_matches_single_validation(self):
+        """Test batch email validation agrees with validate_email_address"""
+        emails = [
+            "Alice@Example.COM", "a.b+c@sub.example.org", "x@localhost", "x@a.b",
+            "x@1.23", "\u00e9@example.com", "x@xn--80ak6aa92e.com", "a..b@example.com",
+            "x@-a.com", "x@example.local", "a" * 65 + "@example.com", " a@example.com"
+        ]
+        statuses, normalized = validate_email_batch(emails)
+        for index, email in enumerate(emails):
+            expected, _ = validate_email_address(email)
+            self.assertEqual(normalized[index], expected, email)
+            self.assertEqual(statuses[index], STATUS_VALID if expected else STATUS_INVALID_EMAIL)
+    
+    def test_email_batch_fast_path_cross_check(self):
+        """Test every address the fast path accepts is accepted unchanged by validate_email_address"""
+        rng = random.Random(26)
+        local_chars = string.ascii_letters + string.digits + "-._+%"
+        label_chars = string.ascii_letters + string.digits + "-"
+        emails = ["zJ@TS--r1.cx.hRniop", "a@ab--c.com", "a@x.ab--cd.org"]
+        for _ in range(3000):
+            local = "".join(rng.choice(local_chars) for _ in range(rng.randint(1, 6)))
+            labels = ["".join(rng.choice(label_chars) for _ in range(rng.randint(1, 6))) for _ in range(rng.randint(1, 3))]
+            labels.append("".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(2, 4))))
+            emails.append(local + "@" + ".".join(labels))
+        statuses, normalized = validate_email_batch(emails)
+        for index, email in enumerate(emails):
+            if statuses[index] == STATUS_VALID:
+                expected, _ = validate_email_address(email)
+                self.assertEqual(normalized[index], expected, email)
+        self.assertEqual(statuses[0], STATUS_INVALID_EMAIL)
+    
+    def test_user_batch_statuses(self):
+        """Test batch validation of a column-oriented chunk"""
+        columns = {
+            "email": ["alice@Example.com", "", "not-an-email", "dave@example.com"],
+            "name": ["Alice", "Bob", "Carol", "Dave"],
+            "role": ["admin", "user", "user", ""]
+        }
+        statuses, normalized = validate_user_batch(columns)
+        self.assertEqual(list(statuses), [
+            STATUS_VALID, STATUS_MISSING_FIELD, STATUS_INVALID_EMAIL, STATUS_MISSING_FIELD
+        ])
+        self.assertEqual(normalized, ["alice@example.com", None, None, None])
+    
+    def test_user_batch_missing_column(self):
+        """Test batch validation when a required column is absent"""
+        statuses, normalized = validate_user_batch({"email": ["a@example.com"], "name": ["A"]})
+        self.assertEqual(list(statuses), [STATUS_MISSING_FIELD])
+        self.assertEqual(normalized, [None])
+
+    
+    def test_compiled_rules(self):
+        """Test each compiled rule type rejects invalid values"""
+        validate = compile_validator({
+            "role": {"choices": ["admin", "user"]},
+            "name": {"min_length": 2, "max_length": 10, "pattern": "[A-Za-z ]+"}
+        })
+        self.assertIsNone(validate({"role": "admin", "name": "Alice"}))
+        self.assertIn("Invalid value for field role", validate({"role": "root", "name": "Alice"}))
+        self.assertIn("shorter than 2", validate({"role": "user", "name": "A"}))
+        self.assertIn("longer than 10", validate({"role": "user", "name": "Alice Example"}))
+        self.assertIn("does not match", validate({"role": "user", "name": "Alice1"}))
+    
+    def test_compiled_unique_rule(self):
+        """Test unique rule only records values from rows that pass"""
+        validate = compile_validator({
+            "email": {"unique": True},
+            "role": {"choices": ["user"]}
+        })
+        self.assertIsNotNone(validate({"email": "a@example.com", "role": "admin"}))
+        self.assertIsNone(validate({"email": "a@example.com", "role": "user"}))
+        self.assertIn("Duplicate value for field email", validate({"email": "a@example.com", "role": "user"}))
+        # A fresh validator has its own state
+        self.assertIsNone(compile_validator({"email": {"unique": True}})({"email": "a@example.com"}))
+    
+    def test_compiled_rules_unknown_rule(self):
+        """Test unknown rule names are rejected at compile time"""
+        with self.assertRaises(ValueError):
+            compile_validator({"name": {"shape": "round"}})
 
 
 if __name__ == "__main__":
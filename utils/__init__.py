@@ -9,23 +9,114 @@ API communication, and logging configuration.
 # Imports
 # =============================================================================
 # Validation utilities
-from .validation import validate_user_data, validate_email_address
+from .validation import (
+    validate_user_data, validate_email_address,
+    validate_user_batch, validate_email_batch, compile_validator
+)
 
 # API utilities
-from .api import create_user
+from .api import create_user, parse_error_body, ApiResult
+from .policies import RetryPolicy, TimeoutPolicy
+from .payload import PayloadBuilder
 
 # Logging utilities
-from .logging_utils import setup_logging
+from .logging_utils import setup_logging, worker_log_file
+
+# CSV reading utilities
+from .csv_reader import MappedCsvReader, CsvRecord, find_record_boundary
+
+# Dry run utilities
+from .dry_run import dry_run_file
+
+# Progress utilities
+from .progress import ProgressReporter
+
+# Shutdown utilities
+from .shutdown import ShutdownCoordinator, exit_process
+
+# Sharding utilities
+from .sharding import split_file, run_worker, run_local_workers, merge_results, load_manifest, ShardCheckpoint
+
+# Report utilities
+from .report import RunReport, LatencyHistogram, classify_rule_error
+
+# Outcome store utilities
+from .outcomes import OutcomeStore
+
+# Scheduling utilities
+from .scheduling import SendQueue, compile_priority
+
+# Load test utilities
+from .load_test import LoadProfile, LoadTestReport, run_load_test, synthetic_rows
+
+# Profiling utilities
+from .profiling import Profiler, timed, timing_report, reset_timings
 
 
 __all__ = [
     # Validation utilities
     'validate_user_data',
     'validate_email_address',
+    'validate_user_batch',
+    'validate_email_batch',
+    'compile_validator',
     
     # API utilities
     'create_user',
+    'parse_error_body',
+    'ApiResult',
+    'RetryPolicy',
+    'TimeoutPolicy',
+    'PayloadBuilder',
     
     # Logging utilities
-    'setup_logging'
+    'setup_logging',
+    'worker_log_file',
+    
+    # CSV reading utilities
+    'MappedCsvReader',
+    'CsvRecord',
+    'find_record_boundary',
+    
+    # Dry run utilities
+    'dry_run_file',
+    
+    # Progress utilities
+    'ProgressReporter',
+    
+    # Shutdown utilities
+    'ShutdownCoordinator',
+    'exit_process',
+    
+    # Sharding utilities
+    'split_file',
+    'run_worker',
+    'run_local_workers',
+    'merge_results',
+    'load_manifest',
+    'ShardCheckpoint',
+    
+    # Report utilities
+    'RunReport',
+    'LatencyHistogram',
+    'classify_rule_error',
+    
+    # Outcome store utilities
+    'OutcomeStore',
+    
+    # Scheduling utilities
+    'SendQueue',
+    'compile_priority',
+    
+    # Load test utilities
+    'LoadProfile',
+    'LoadTestReport',
+    'run_load_test',
+    'synthetic_rows',
+    
+    # Profiling utilities
+    'Profiler',
+    'timed',
+    'timing_report',
+    'reset_timings'
 ]
@@ -1,41 +1,288 @@
+import re
+import json
 import requests
 import time
-from typing import Dict, Tuple, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
+from typing import Dict, Tuple, Any, Optional, Callable, NamedTuple
 
-from config import API_URL, MAX_RETRIES
+from config import API_URL, ERROR_BODY_LIMIT, CONCURRENCY
+from .policies import RetryPolicy, TimeoutPolicy
+from .profiling import timed
+from .payload import PayloadBuilder, encode_json
 
-def create_user(user_data: Dict[str, Any], api_url: str = API_URL, max_retries: int = MAX_RETRIES) -> Tuple[bool, str]:
+# Default policies built from config/settings.py
+DEFAULT_RETRY_POLICY = RetryPolicy()
+DEFAULT_TIMEOUT_POLICY = TimeoutPolicy()
+
+# Threads used to run hedged requests, created on first use
+_hedge_executor: Optional[ThreadPoolExecutor] = None
+_hedge_executor_lock = threading.Lock()
+
+# Maximum length of the detail kept from an error body
+_DETAIL_LIMIT = 200
+
+# Keys checked, in order, for an error code and a message in JSON error bodies
+_CODE_KEYS = ("code", "error_code", "errorCode", "error")
+_MESSAGE_KEYS = ("message", "detail", "error_description", "error")
+
+_HTML_TITLE_RE = re.compile(rb"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+
+# ============================================================================
+# Results
+# ============================================================================
+
+# Result kinds
+RESULT_OK = "ok"
+RESULT_HTTP_STATUS = "http_status"
+RESULT_TIMEOUT = "timeout"
+RESULT_CONNECTION = "connection"
+RESULT_DEADLINE = "deadline"
+
+class ApiResult(NamedTuple):
+    """
+    Outcome of a create_user call.
+    
+    Attributes:
+        success: True if the user was created
+        message: Short description of the error, empty on success
+        kind: One of RESULT_OK, RESULT_HTTP_STATUS, RESULT_TIMEOUT, RESULT_CONNECTION, RESULT_DEADLINE
+        status_code: HTTP status of the final response, if one was received
+        error_code: Machine-readable error code from the response body, if any
+        retries: Number of retries made
+        elapsed: Seconds spent on the call, including retries and backoff
+    """
+    success: bool
+    message: str = ""
+    kind: str = RESULT_OK
+    status_code: Optional[int] = None
+    error_code: Optional[str] = None
+    retries: int = 0
+    elapsed: float = 0.0
+
+# ============================================================================
+# Response Handling
+# ============================================================================
+
+def _read_limited(response: requests.Response, limit: int) -> Tuple[bytes, bool]:
+    """
+    Reads at most limit bytes of a streamed response body and closes it.
+    
+    Returns:
+        Tuple containing (body, truncated)
+    """
+    chunks = []
+    size = 0
+    try:
+        for chunk in response.iter_content(chunk_size=min(limit + 1, 8192)):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > limit:
+                break
+    finally:
+        response.close()
+    body = b"".join(chunks)
+    return body[:limit], size > limit
+
+def _first_string(data: Dict[str, Any], keys: Tuple[str, ...]) -> Optional[str]:
+    """
+    Returns the first scalar value found under keys, as a string.
+    """
+    for key in keys:
+        value = data.get(key)
+        if isinstance(value, (str, int)) and not isinstance(value, bool) and value != "":
+            return str(value)
+    return None
+
+def parse_error_body(body: bytes, content_type: str, truncated: bool = False) -> Tuple[Optional[str], str]:
+    """
+    Extracts an error code and a short detail message from an error response body.
+    
+    JSON bodies are searched for common code and message keys, including a
+    nested "error" object. HTML pages are reduced to their title, and any other
+    text is collapsed and cut to a short snippet.
+    
+    Args:
+        body: The (possibly truncated) response body
+        content_type: Value of the Content-Type header
+        truncated: True if body was cut at the read limit
+        
+    Returns:
+        Tuple containing (error_code, detail)
+    """
+    content_type = content_type.lower()
+    if "json" in content_type and not truncated:
+        try:
+            data = json.loads(body)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            if isinstance(data.get("error"), dict):
+                data = data["error"]
+            code = _first_string(data, _CODE_KEYS)
+            detail = _first_string(data, _MESSAGE_KEYS) or json.dumps(data, separators=(",", ":"))
+            return code, detail[:_DETAIL_LIMIT]
+    
+    title = None
+    if "html" in content_type or body.lstrip()[:1] == b"<":
+        title = _HTML_TITLE_RE.search(body)
+        text = title.group(1).decode("utf-8", "replace") if title else _HTML_TAG_RE.sub(" ", body.decode("utf-8", "replace"))
+    else:
+        text = body.decode("utf-8", "replace")
+    detail = " ".join(text.split())
+    # Mark snippets that do not show the whole body; a page title is complete on its own
+    if len(detail) > _DETAIL_LIMIT or (truncated and detail and not title):
+        detail = detail[:_DETAIL_LIMIT] + "..."
+    return None, detail
+
+@timed()
+def _post(body: bytes, headers: Dict[str, str], api_url: str, timeout: Tuple[float, float]) -> ApiResult:
+    """
+    Sends a single create request with a pre-encoded body.
+    
+    The response is streamed: success bodies are never read, and at most
+    ERROR_BODY_LIMIT bytes of an error body are read and parsed.
+    
+    Raises:
+        requests.exceptions.RequestException: If the request could not be completed
+    """
+    response = requests.post(api_url, data=body, headers=headers, timeout=timeout, stream=True)  # Connect timeout, Read timeout
+    status_code = response.status_code
+    if status_code == 201:
+        response.close()
+        return ApiResult(True, status_code=status_code)
+    
+    body, truncated = _read_limited(response, ERROR_BODY_LIMIT)
+    error_code, detail = parse_error_body(body, response.headers.get("Content-Type", ""), truncated)
+    error_message = f"API returned status code {status_code}"
+    if error_code and error_code != detail:
+        error_message += f" ({error_code})"
+    if detail:
+        error_message += f": {detail}"
+    return ApiResult(False, error_message, RESULT_HTTP_STATUS, status_code, error_code)
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    """
+    Returns the executor for hedged requests, creating it on first use.
+    
+    Every row in flight may need a thread for its request and one for a
+    hedged copy, so it has twice CONCURRENCY threads.
+    """
+    global _hedge_executor
+    with _hedge_executor_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=2 * max(1, CONCURRENCY),
+                                                 thread_name_prefix="hedged-request")
+        return _hedge_executor
+
+def _hedged_post(body: bytes, headers: Dict[str, str], api_url: str, timeout: Tuple[float, float],
+                 hedge_after: float) -> ApiResult:
+    """
+    Sends a create request and, if it is still unanswered hedge_after seconds
+    after it was sent, a second copy. The first success wins; if the first
+    answer is a failure (e.g. 409 because the other copy already created the
+    user), the other copy is still awaited before giving up.
+    
+    Time the request spends queued for a thread does not count towards
+    hedge_after, so a busy executor does not cause copies to be sent.
+    
+    Raises:
+        requests.exceptions.RequestException: If every copy failed to complete
+    """
+    executor = _get_hedge_executor()
+    sent = threading.Event()
+    
+    def send_primary() -> ApiResult:
+        sent.set()
+        return _post(body, headers, api_url, timeout)
+    
+    primary = executor.submit(send_primary)
+    sent.wait()
+    done, _ = wait([primary], timeout=hedge_after, return_when=FIRST_COMPLETED)
+    if done:
+        return primary.result()
+    
+    hedge = executor.submit(_post, body, headers, api_url, timeout)
+    failure: Optional[ApiResult] = None
+    exception: Optional[requests.exceptions.RequestException] = None
+    for future in as_completed([primary, hedge]):
+        try:
+            result = future.result()
+        except requests.exceptions.RequestException as e:
+            exception = exception or e
+            continue
+        if result.success:
+            return result
+        failure = failure or result
+    if failure is not None:
+        return failure
+    raise exception
+
+@timed()
+def create_user(user_data: Dict[str, Any], api_url: str = API_URL, max_retries: Optional[int] = None,
+                on_retry: Optional[Callable[[], None]] = None, retry_policy: RetryPolicy = DEFAULT_RETRY_POLICY,
+                timeout_policy: TimeoutPolicy = DEFAULT_TIMEOUT_POLICY,
+                payload_builder: Optional[PayloadBuilder] = None) -> ApiResult:
     """
     Sends a request to create a user and handles the response with retry logic.
     
+    Connection errors and timeouts are retried according to retry_policy.
+    timeout_policy sets the per-attempt timeouts, an optional deadline for the
+    whole row (attempts plus backoff) and optional request hedging.
+    
     Args:
         user_data: User data to send to the API
         api_url: The API endpoint URL
-        max_retries: Maximum number of retry attempts
+        max_retries: Maximum number of retry attempts, overrides retry_policy.max_retries
+        on_retry: Optional callback invoked before each retry, e.g. for progress counters
+        retry_policy: Retry count and backoff strategy
+        timeout_policy: Per-attempt timeouts, per-row deadline and hedging
+        payload_builder: Encodes the request body with a fixed field list, otherwise
+                         user_data is sent as compact JSON
         
     Returns:
-        Tuple containing (success, error_message)
-        success is True if the API call was successful, False otherwise
-        error_message contains details if there was an error, empty string otherwise
+        ApiResult with success, a short error message, the kind of failure,
+        the HTTP status and error code of the final response, the retry count
+        and the elapsed time
+    """
+    started = time.perf_counter()
+    # Encode once; retries and hedged copies reuse the same bytes
+    body, headers = payload_builder.build(user_data) if payload_builder is not None else encode_json(user_data)
+    result = _create_user(body, headers, api_url, max_retries, on_retry, retry_policy, timeout_policy)
+    return result._replace(elapsed=time.perf_counter() - started)
+
+def _create_user(body: bytes, headers: Dict[str, str], api_url: str, max_retries: Optional[int],
+                 on_retry: Optional[Callable[[], None]], retry_policy: RetryPolicy,
+                 timeout_policy: TimeoutPolicy) -> ApiResult:
+    """
+    Runs the attempts of create_user, see there for the arguments.
     """
+    if max_retries is None:
+        max_retries = retry_policy.max_retries
+    deadline_at = timeout_policy.start()
     retry_count = 0
+    wait_time = retry_policy.base_delay
     while retry_count <= max_retries:
+        timeout = timeout_policy.attempt_timeout(deadline_at)
+        if timeout is None:
+            return ApiResult(False, f"Request deadline of {timeout_policy.deadline:g}s exceeded after {retry_count} retries",
+                             RESULT_DEADLINE, retries=retry_count)
         try:
-            response = requests.post(api_url, json=user_data, timeout=(3.05, 27))  # Connect timeout, Read timeout
-            if response.status_code == 201:
-                return True, ""
+            if timeout_policy.hedge_after > 0:
+                result = _hedged_post(body, headers, api_url, timeout, timeout_policy.hedge_after)
             else:
-                error_message = f"API returned status code {response.status_code}"
-                try:
-                    error_details = response.json()
-                    error_message += f": {error_details}"
-                except ValueError:
-                    error_message += f": {response.text}"
-                return False, error_message
+                result = _post(body, headers, api_url, timeout)
+            return result._replace(retries=retry_count) if retry_count else result
         except requests.exceptions.RequestException as e:
+            kind = RESULT_TIMEOUT if isinstance(e, requests.exceptions.Timeout) else RESULT_CONNECTION
             retry_count += 1
             if retry_count > max_retries:
-                return False, f"Request failed after {max_retries} retries: {str(e)}"
-            # Exponential backoff
-            wait_time = 2 ** retry_count
+                return ApiResult(False, f"Request failed after {max_retries} retries: {str(e)}", kind, retries=max_retries)
+            wait_time = retry_policy.delay(retry_count, wait_time)
+            if deadline_at is not None and time.monotonic() + wait_time >= deadline_at:
+                return ApiResult(False, f"Request deadline of {timeout_policy.deadline:g}s exceeded after {retry_count - 1} retries: {str(e)}",
+                                 RESULT_DEADLINE, retries=retry_count - 1)
+            if on_retry is not None:
+                on_retry()
             time.sleep(wait_time)
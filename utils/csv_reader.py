@@ -0,0 +1,341 @@
+"""
+Memory-mapped CSV reading with byte offsets.
+
+MappedCsvReader reads a CSV file through a read-only memory map and yields
+each row together with its row number and the byte range it occupies, so a
+run can report exact progress, record where a row came from and resume from
+a saved offset. The file is never read into Python buffers as a whole: blocks
+of whole lines are decoded straight from the map and split on newlines and
+commas, and only records containing quotes are located by scanning the map
+for a newline outside quoted fields and parsed by the csv module. Quotes are
+tracked the way the csv module reads them: a quote opens a quoted field only
+at the start of a field and is an ordinary character anywhere else, as in
+5'10" tall. Rows come out as csv.DictReader would produce them, for lines
+ending in \n or \r\n; unlike csv.DictReader, a bare \r is not a line ending.
+"""
+
+import os
+import csv
+import mmap
+from typing import Dict, Any, List, Optional, Iterator, NamedTuple, Tuple
+
+# Block size used when decoding lines and scanning for record boundaries
+_BLOCK_SIZE = 1024 * 1024
+
+_NEWLINE = b"\n"
+_QUOTE = b'"'
+_CR = ord("\r")
+_QUOTE_BYTE = ord('"')
+_FIELD_ENDS = (ord(","), ord("\n"))
+
+# Quote states of the scanner before a byte, as in the csv module's parser
+_FIELD_START = 0   # at the start of a field, where a quote opens a quoted field
+_UNQUOTED = 1      # inside an unquoted field, where quotes are ordinary characters
+_QUOTED = 2        # inside a quoted field, where newlines belong to the field
+_QUOTE_SEEN = 3    # after a quote in a quoted field: a second quote is an escaped quote
+
+def _scan(data, position: int, end: int, state: int, stop: bool) -> Tuple[int, int, bool]:
+    """
+    Runs the quote state machine over data[position:end], jumping from quote to quote.
+    
+    Args:
+        data: Bytes or memory map
+        position: Offset to start at
+        end: Offset to stop at
+        state: Quote state before position
+        stop: Stop just past the first newline outside a quoted field
+    
+    Returns:
+        Tuple containing (offset reached, quote state there, whether a record ended)
+    """
+    while position < end:
+        if state == _QUOTED:
+            quote = data.find(_QUOTE, position, end)
+            if quote < 0:
+                return end, _QUOTED, False
+            position, state = quote + 1, _QUOTE_SEEN
+            continue
+        if data[position] == _QUOTE_BYTE and state != _UNQUOTED:
+            # An opening quote at a field start, or an escaped quote inside a quoted field
+            position, state = position + 1, _QUOTED
+            continue
+        # Outside quotes until the next quote that follows a comma or newline
+        state = _UNQUOTED
+        limit = end
+        if stop:
+            newline = data.find(_NEWLINE, position, end)
+            if newline >= 0:
+                limit = newline
+        # A quote at position itself is not at a field start, or it would have been handled above
+        quote = data.find(_QUOTE, position + 1, limit)
+        while quote >= 0 and data[quote - 1] not in _FIELD_ENDS:
+            quote = data.find(_QUOTE, quote + 1, limit)
+        if quote >= 0:
+            position, state = quote + 1, _QUOTED
+            continue
+        if limit < end:
+            return limit + 1, _FIELD_START, True
+        return end, _FIELD_START if data[end - 1] in _FIELD_ENDS else _UNQUOTED, False
+    return position, state, False
+
+def scan_quote_state(block: bytes, state: int = _FIELD_START) -> int:
+    """
+    Returns the quote state after a block of CSV data.
+    
+    Args:
+        block: Bytes following the point where state applies
+        state: Quote state before the block, 0 at a record boundary
+    
+    Returns:
+        Quote state after the block, for the next block or find_record_boundary
+    """
+    return _scan(block, 0, len(block), state, False)[1]
+
+class CsvRecord(NamedTuple):
+    """
+    A row of a CSV file and where it was read from.
+    
+    Attributes:
+        row: The row as a dictionary keyed by the header fields
+        row_num: Row number in the file, counting the header as row 1
+        offset: Byte offset of the start of the record
+        end: Byte offset just past the record, where the next record starts
+    """
+    row: Dict[Optional[str], Any]
+    row_num: int
+    offset: int
+    end: int
+
+def find_record_boundary(f, position: int, state: int = _FIELD_START) -> Tuple[int, int]:
+    """
+    Finds the first record boundary after position.
+    
+    A newline ends a record only when it is outside a quoted field.
+    
+    Args:
+        f: Binary file object or memory map
+        position: Offset to start searching from
+        state: Quote state at position, 0 at a record boundary (see scan_quote_state)
+    
+    Returns:
+        Tuple containing (boundary offset, quote state there)
+    """
+    f.seek(position)
+    while True:
+        block = f.read(_BLOCK_SIZE)
+        if not block:
+            return position, state
+        end, state, found = _scan(block, 0, len(block), state, True)
+        if found:
+            return position + end, state
+        position += len(block)
+
+class MappedCsvReader:
+    """
+    Reads rows of a CSV file through a memory map.
+    
+    Usage:
+        with MappedCsvReader("users.csv") as reader:
+            for record in reader:
+                print(record.row_num, record.offset, record.row["email"])
+    """
+    
+    def __init__(self, file_path: str, encoding: str = "utf-8"):
+        """
+        Args:
+            file_path: Path to the CSV file
+            encoding: Text encoding of the file
+        """
+        self.file_path = file_path
+        self.encoding = encoding
+        self.size = 0
+        self.fieldnames: Optional[List[str]] = None
+        self.data_start = 0
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+    
+    def open(self) -> "MappedCsvReader":
+        """
+        Maps the file and reads the header.
+        
+        Returns:
+            The reader itself
+        """
+        self._file = open(self.file_path, "rb")
+        self.size = os.fstat(self._file.fileno()).st_size
+        # Empty files cannot be mapped; they simply have no header and no rows
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            end, quoted = self._record_end(0)
+            self.fieldnames = self._parse(0, end, quoted, 1) or None
+            self.data_start = min(end + 1, self.size)
+        return self
+    
+    def close(self) -> None:
+        """
+        Unmaps and closes the file.
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self) -> "MappedCsvReader":
+        return self.open()
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def _record_end(self, position: int) -> Tuple[int, bool]:
+        """
+        Finds the end of the record starting at position.
+        
+        Returns:
+            Tuple containing (offset of the newline ending the record or the file
+            size, whether the record contains quotes)
+        """
+        data, size = self._map, self.size
+        newline = data.find(_NEWLINE, position)
+        if newline < 0:
+            newline = size
+        if data.find(_QUOTE, position, newline) < 0:
+            return newline, False
+        # Newlines inside quoted fields belong to the record
+        end, _, found = _scan(data, position, size, _FIELD_START, True)
+        return (end - 1 if found else size), True
+    
+    def _decode_error(self, row_num: int, offset: int, error: UnicodeDecodeError) -> csv.Error:
+        """
+        Describes a record that cannot be decoded, with its row number and the offset of the bad byte.
+        """
+        return csv.Error(f"Row {row_num}: invalid {self.encoding} data at byte {offset + error.start}: {error.reason}")
+    
+    def _parse(self, start: int, end: int, quoted: bool, row_num: int) -> List[str]:
+        """
+        Decodes the record between start and end into its field values.
+        
+        Raises:
+            csv.Error: If the record is not valid in the file's encoding
+        """
+        if end > start and self._map[end - 1] == _CR:
+            end -= 1
+        try:
+            text = self._map[start:end].decode(self.encoding)
+        except UnicodeDecodeError as e:
+            raise self._decode_error(row_num, start, e) from e
+        if not quoted:
+            return text.split(",") if text else []
+        return next(csv.reader([text]), [])
+    
+    def records(self, start: Optional[int] = None, row_num: int = 2) -> Iterator[CsvRecord]:
+        """
+        Yields the rows of the file, skipping blank lines like csv.DictReader.
+        
+        Missing trailing fields are None and extra fields are listed under the
+        None key, as with csv.DictReader.
+        
+        Args:
+            start: Offset of the record to start at, defaults to the first row after
+                the header; must be a record boundary, see record_boundary
+            row_num: Row number of the record at start
+        
+        Returns:
+            Iterator over the records
+        
+        Raises:
+            csv.Error: At the first record that is not valid in the file's encoding,
+                after all records before it
+        """
+        if self.fieldnames is None:
+            return
+        fieldnames = self.fieldnames
+        field_count = len(fieldnames)
+        data, size, encoding = self._map, self.size, self.encoding
+        new_record = tuple.__new__
+        position = self.data_start if start is None else start
+        
+        while position < size:
+            # Decode a block of whole lines at once; newline bytes never occur inside multibyte characters
+            limit = size
+            if position + _BLOCK_SIZE < size:
+                # Up to the last newline in the block, or the end of a line longer than the block
+                limit = (data.rfind(_NEWLINE, position, position + _BLOCK_SIZE) + 1
+                         or data.find(_NEWLINE, position) + 1 or size)
+            block = data[position:limit]
+            try:
+                text = block.decode(encoding)
+            except UnicodeDecodeError as e:
+                # End the block before the line holding the bad byte, so the records before it are still read
+                line_start = block.rfind(_NEWLINE, 0, e.start) + 1
+                if not line_start:
+                    raise self._decode_error(row_num, position, e) from e
+                limit = position + line_start
+                text = block[:line_start].decode(encoding)
+            lines = text.split("\n")
+            if data[limit - 1] == _NEWLINE[0]:
+                lines.pop()
+            line_count = len(lines)
+            index = 0
+            while index < line_count:
+                line = lines[index]
+                index += 1
+                next_position = position + (len(line) if line.isascii() else len(line.encode(encoding))) + 1
+                if '"' in line:
+                    # Quoted fields may contain newlines, so find the real end of the record in the map
+                    end, _ = self._record_end(position)
+                    values = self._parse(position, end, True, row_num)
+                    record_end = end + 1 if end < size else size
+                    while next_position < record_end and index < line_count:
+                        line = lines[index]
+                        index += 1
+                        next_position += (len(line) if line.isascii() else len(line.encode(encoding))) + 1
+                    if next_position < record_end:
+                        # The record runs past this block; continue with a block after it
+                        index = line_count
+                    next_position = record_end
+                else:
+                    if line and line[-1] == "\r":
+                        line = line[:-1]
+                    values = line.split(",") if line else None
+                    if next_position > size:
+                        next_position = size
+                if values:
+                    if len(values) == field_count:
+                        row: Dict[Optional[str], Any] = dict(zip(fieldnames, values))
+                    else:
+                        row = dict(zip(fieldnames, values))
+                        if len(values) > field_count:
+                            row[None] = values[field_count:]
+                        else:
+                            for field in fieldnames[len(values):]:
+                                row[field] = None
+                    yield new_record(CsvRecord, (row, row_num, position, next_position))
+                    row_num += 1
+                position = next_position
+    
+    def __iter__(self) -> Iterator[CsvRecord]:
+        return self.records()
+    
+    def record_boundary(self, offset: int) -> int:
+        """
+        Returns the first record boundary at or after an offset, such as a byte
+        position chosen to split the file.
+        
+        Quote state is tracked from the start of the data, so this reads
+        everything before the offset once.
+        
+        Args:
+            offset: Any byte offset in the file
+        
+        Returns:
+            Offset of the next record start, or the file size if there is none
+        """
+        if offset <= self.data_start:
+            return self.data_start
+        offset = min(offset, self.size)
+        _, state, _ = _scan(self._map, self.data_start, offset, _FIELD_START, False)
+        if self._map[offset - 1] == _NEWLINE[0] and state == _FIELD_START:
+            return offset
+        return find_record_boundary(self._map, offset, state)[0]
@@ -0,0 +1,203 @@
+"""
+Dry-run validation of a user CSV file.
+
+Runs the read, validate, normalize and dedup steps of the import without
+calling the API, so operators can see how many rows would be skipped and why.
+Repeated emails are only skipped by the import when a unique rule is
+configured for the email field; otherwise the dry run counts them for
+information and they stay among the valid rows.
+"""
+
+import csv
+import time
+import logging
+from collections import Counter, deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator, Tuple
+
+from config import REQUIRED_FIELDS, VALIDATION_RULES, REJECTS_FILE, DRY_RUN_WORKERS, DRY_RUN_CHUNK_SIZE
+from .validation import (
+    validate_user_data, validate_email_address, validate_user_batch, compile_validator,
+    STATUS_VALID, STATUS_MISSING_FIELD
+)
+
+# ============================================================================
+# Chunk Reading
+# ============================================================================
+
+def _read_chunks(reader: Iterator[List[str]], chunk_size: int) -> Iterator[List[List[str]]]:
+    """
+    Groups raw CSV rows into lists of at most chunk_size rows.
+    Blank lines are dropped, as csv.DictReader does in the import.
+    """
+    chunk: List[List[str]] = []
+    for row in reader:
+        if not row:
+            continue
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _to_columns(chunk: List[List[str]], positions: Dict[str, int]) -> Dict[str, List[str]]:
+    """
+    Transposes the columns needed for validation out of a chunk of raw rows.
+    Short rows are padded with empty values, as csv.DictReader would do.
+    """
+    columns = {}
+    for field, position in positions.items():
+        columns[field] = [row[position] if position < len(row) else "" for row in chunk]
+    return columns
+
+# ============================================================================
+# Dry Run
+# ============================================================================
+
+def _reject_reason(row: Dict[str, Any], status: int) -> Tuple[List[str], str]:
+    """
+    Builds the (histogram keys, detailed reason) pair for a row that failed batch validation.
+    """
+    if status == STATUS_MISSING_FIELD:
+        _, message = validate_user_data(row)
+        return message.split("; "), message
+    _, email_error = validate_email_address(row["email"])
+    return ["Invalid email format"], f"Invalid email format: {email_error}"
+
+def dry_run_file(
+    file_path: str,
+    rejects_file: Optional[str] = REJECTS_FILE,
+    workers: int = DRY_RUN_WORKERS,
+    chunk_size: int = DRY_RUN_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """
+    Validates a user CSV file without sending anything to the API.
+    
+    Rows are read in chunks and validated with validate_user_batch, spread over
+    a process pool when workers is greater than 1. The compiled validation rules
+    and the duplicate check on the normalized email run in this process, in file order.
+    
+    Args:
+        file_path: Path to the CSV file containing user data
+        rejects_file: Path of the CSV file rejected rows are written to, or None to skip it
+        workers: Number of processes used for batch validation
+        chunk_size: Number of rows validated per batch
+    
+    Returns:
+        Dictionary containing:
+        - rows: Number of data rows read, not counting blank lines
+        - valid: Number of rows that would be sent to the API
+        - skipped: Number of rows that would be skipped by validation
+        - duplicates: Number of valid rows repeating an earlier normalized email; they
+          are sent by the import and included in valid unless a unique rule skips them
+        - errors: 1 if the file could not be processed, 0 otherwise
+        - elapsed: Time taken in seconds
+        - rows_per_sec: Throughput of the run
+        - reasons: Counter of rejection reasons (a row missing several fields counts once per field)
+    """
+    start_time = time.perf_counter()
+    summary: Dict[str, Any] = {
+        "rows": 0, "valid": 0, "skipped": 0, "duplicates": 0, "errors": 0,
+        "elapsed": 0.0, "rows_per_sec": 0.0, "reasons": Counter()
+    }
+    reasons = summary["reasons"]
+    
+    try:
+        # Read as UTF-8 like MappedCsvReader, so the dry run checks the same text the import sends
+        with open(file_path, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            fieldnames = next(reader, None)
+            if not fieldnames or not all(field in fieldnames for field in REQUIRED_FIELDS):
+                logging.error(f"CSV file missing required headers: {', '.join(REQUIRED_FIELDS)}")
+                summary["errors"] = 1
+                return summary
+            
+            wanted = set(REQUIRED_FIELDS) | {"email"}
+            positions = {field: fieldnames.index(field) for field in wanted if field in fieldnames}
+            validate_rules = compile_validator(VALIDATION_RULES) if VALIDATION_RULES else None
+            seen_emails = set()
+            
+            rejects_writer = None
+            try:
+                rejects_handle = open(rejects_file, 'w', newline='') if rejects_file else None
+            except OSError as e:
+                logging.error(f"Cannot write rejects file {rejects_file}: {e.strerror}")
+                summary["errors"] = 1
+                return summary
+            if rejects_handle:
+                rejects_writer = csv.writer(rejects_handle)
+                rejects_writer.writerow(["row", "reason"] + fieldnames)
+            
+            executor: Optional[Executor] = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+            try:
+                pending: deque = deque()
+                row_num = 1  # Header row
+                
+                def finish(chunk: List[List[str]], result: Tuple[Any, List[Optional[str]]]) -> None:
+                    nonlocal row_num
+                    statuses, normalized = result
+                    for index, raw in enumerate(chunk):
+                        row_num += 1
+                        status = statuses[index]
+                        if status == STATUS_VALID:
+                            email = normalized[index]
+                            if validate_rules is not None:
+                                # Only build row dictionaries when there are rules to apply
+                                row = dict(zip(fieldnames, raw))
+                                row["email"] = email
+                                rule_error = validate_rules(row)
+                                if rule_error:
+                                    summary["skipped"] += 1
+                                    reasons[rule_error.split(": ", 1)[0]] += 1
+                                    if rejects_writer:
+                                        rejects_writer.writerow([row_num, rule_error] + raw)
+                                    continue
+                            if email in seen_emails:
+                                # Informational: the import sends these rows unless a unique rule skips them
+                                summary["duplicates"] += 1
+                            else:
+                                seen_emails.add(email)
+                            summary["valid"] += 1
+                        else:
+                            row = dict(zip(fieldnames, raw))
+                            keys, reason = _reject_reason(row, status)
+                            summary["skipped"] += 1
+                            reasons.update(keys)
+                            if rejects_writer:
+                                rejects_writer.writerow([row_num, reason] + raw)
+                
+                for chunk in _read_chunks(reader, chunk_size):
+                    summary["rows"] += len(chunk)
+                    columns = _to_columns(chunk, positions)
+                    if executor is None:
+                        finish(chunk, validate_user_batch(columns))
+                        continue
+                    # Keep a bounded window of chunks in flight, finishing them in file order
+                    pending.append((chunk, executor.submit(validate_user_batch, columns)))
+                    if len(pending) >= workers * 2:
+                        done_chunk, future = pending.popleft()
+                        finish(done_chunk, future.result())
+                
+                while pending:
+                    done_chunk, future = pending.popleft()
+                    finish(done_chunk, future.result())
+            finally:
+                if executor is not None:
+                    executor.shutdown(cancel_futures=True)
+                if rejects_handle:
+                    rejects_handle.close()
+    except FileNotFoundError:
+        logging.error(f"File not found: {file_path}")
+        summary["errors"] = 1
+    except csv.Error as e:
+        logging.error(f"CSV parsing error: {str(e)}")
+        summary["errors"] = 1
+    except UnicodeDecodeError as e:
+        logging.error(f"File is not valid UTF-8: {file_path}: {str(e)}")
+        summary["errors"] = 1
+    
+    elapsed = time.perf_counter() - start_time
+    summary["elapsed"] = elapsed
+    summary["rows_per_sec"] = summary["rows"] / elapsed if elapsed > 0 else 0.0
+    return summary
@@ -0,0 +1,271 @@
+"""
+Open-loop load generation against the create-user API.
+
+A LoadProfile fixes when each request is sent: at a constant rate or on a
+linear ramp between two rates. Requests are started on that schedule whether
+or not earlier ones have completed, so a slow API builds up a backlog instead
+of slowing the test down, and each latency is measured from the request's
+scheduled send time (a request that had to wait for a free worker includes
+that wait). Results are grouped into fixed time windows by scheduled send
+time, each with its own run report, so latency percentiles and error rates
+can be read against the offered rate.
+"""
+
+import math
+import time
+import logging
+import itertools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Iterable, Iterator, NamedTuple, Sequence, Set
+
+from config import REQUIRED_FIELDS, LOAD_TEST_WINDOW, LOAD_TEST_MAX_IN_FLIGHT
+from .api import create_user
+from .report import RunReport
+from .shutdown import ShutdownCoordinator
+
+class LoadProfile(NamedTuple):
+    """
+    Send schedule of a load test.
+    
+    Attributes:
+        rate: Requests per second at the start
+        duration: Length of the test in seconds
+        end_rate: Requests per second at the end for a linear ramp, defaults to rate
+    """
+    rate: float
+    duration: float
+    end_rate: Optional[float] = None
+    
+    def rate_at(self, offset: float) -> float:
+        """
+        Returns the offered rate at an offset from the start.
+        """
+        end_rate = self.rate if self.end_rate is None else self.end_rate
+        return self.rate + (end_rate - self.rate) * min(offset, self.duration) / self.duration
+    
+    def sent_by(self, offset: float) -> float:
+        """
+        Returns the number of requests scheduled before an offset from the start.
+        """
+        offset = min(offset, self.duration)
+        return offset * (self.rate + self.rate_at(offset)) / 2
+    
+    def send_time(self, index: int) -> Optional[float]:
+        """
+        Returns the offset from the start at which a request is sent.
+        
+        Args:
+            index: Zero-based number of the request
+        
+        Returns:
+            Offset in seconds, or None if the request falls after the end of the test
+        """
+        if index == 0:
+            return 0.0 if self.duration > 0 and (self.rate > 0 or self.end_rate) else None
+        # Solve sent_by(t) = index for t: rate * t + slope / 2 * t^2 = index
+        slope = ((self.rate if self.end_rate is None else self.end_rate) - self.rate) / self.duration
+        discriminant = self.rate * self.rate + 2 * slope * index
+        if discriminant < 0:
+            return None
+        denominator = self.rate + math.sqrt(discriminant)
+        if denominator <= 0:
+            return None
+        offset = 2 * index / denominator
+        return offset if offset < self.duration else None
+
+def synthetic_rows(run_id: Optional[str] = None, fields: Sequence[str] = REQUIRED_FIELDS) -> Iterator[Dict[str, str]]:
+    """
+    Yields an endless stream of valid rows with unique email addresses.
+    
+    Args:
+        run_id: Tag included in every email address, defaults to the current time
+        fields: Fields of each row; email, name and role get realistic values, others a placeholder
+    
+    Returns:
+        Iterator over the rows
+    """
+    run_id = run_id or time.strftime("%Y%m%d%H%M%S")
+    for index in itertools.count():
+        values = {"email": f"loadtest-{run_id}-{index}@example.com", "name": f"Load Test {index}", "role": "user"}
+        yield {field: values.get(field, f"{field} {index}") for field in fields}
+
+class LoadTestReport:
+    """
+    Results of a load test, per time window and in total.
+    """
+    
+    def __init__(self, profile: LoadProfile, window: float):
+        """
+        Args:
+            profile: The send schedule of the test
+            window: Length of each window in seconds
+        """
+        self.profile = profile
+        self.window = window
+        self.sent = 0
+        self.elapsed = 0.0
+        self.interrupted = False
+        self.windows: List[RunReport] = [RunReport() for _ in range(max(1, math.ceil(profile.duration / window)))]
+    
+    def window_report(self, offset: float) -> RunReport:
+        """
+        Returns the report of the window a scheduled send time falls in.
+        """
+        return self.windows[min(int(offset / self.window), len(self.windows) - 1)]
+    
+    @property
+    def total(self) -> RunReport:
+        """
+        The windows merged into one report.
+        """
+        total = RunReport()
+        for report in self.windows:
+            total.merge(report)
+        total.elapsed = self.elapsed
+        total.interrupted = self.interrupted
+        return total
+    
+    def window_rows(self) -> List[Dict[str, Any]]:
+        """
+        Returns one summary per window that had requests scheduled.
+        
+        Returns:
+            List of dictionaries with the window start, offered rate, rate of successful
+            requests, request counts, error rate, error classes and latency percentiles
+        """
+        rows = []
+        for index, report in enumerate(self.windows):
+            start = index * self.window
+            end = min(start + self.window, self.profile.duration)
+            if not report.rows:
+                continue
+            length = end - start
+            rows.append({
+                "start": round(start, 3),
+                "offered_rps": round((self.profile.sent_by(end) - self.profile.sent_by(start)) / length, 2),
+                "ok_rps": round(report.success / length, 2),
+                "sent": report.rows,
+                "success": report.success,
+                "errors": report.errors,
+                "unfinished": report.unfinished,
+                "error_rate": round((report.errors + report.unfinished) / report.rows, 4),
+                "error_classes": dict(report.error_classes),
+                "latency": report.latency.summary()
+            })
+        return rows
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the report as a JSON-ready dictionary.
+        """
+        return {
+            "profile": {"rate": self.profile.rate, "end_rate": self.profile.end_rate, "duration": self.profile.duration},
+            "window": self.window,
+            "sent": self.sent,
+            "windows": self.window_rows(),
+            "total": self.total.to_dict()
+        }
+    
+    def format_text(self) -> str:
+        """
+        Renders the per-window table and the total report for the console.
+        """
+        lines = [
+            "Load test:",
+            f"  {'Window':>8}  {'Offered':>9}  {'OK':>9}  {'Sent':>7}  {'Errors':>7}  {'Err %':>6}  "
+            f"{'p50 ms':>9}  {'p90 ms':>9}  {'p99 ms':>9}  {'max ms':>9}"
+        ]
+        for row in self.window_rows():
+            latency = row["latency"]
+            lines.append(
+                f"  {row['start']:>7g}s  {row['offered_rps']:>5.1f}/sec  {row['ok_rps']:>5.1f}/sec  "
+                f"{row['sent']:>7}  {row['errors'] + row['unfinished']:>7}  {row['error_rate'] * 100:>6.2f}  "
+                f"{latency['p50_ms']:>9}  {latency['p90_ms']:>9}  {latency['p99_ms']:>9}  {latency['max_ms']:>9}"
+            )
+        return "\n".join(lines) + "\n\n" + self.total.format_text()
+
+def run_load_test(
+    rows: Iterable[Dict[str, Any]],
+    profile: LoadProfile,
+    window: float = LOAD_TEST_WINDOW,
+    max_in_flight: int = LOAD_TEST_MAX_IN_FLIGHT,
+    shutdown: Optional[ShutdownCoordinator] = None,
+    **request_options
+) -> LoadTestReport:
+    """
+    Sends rows to the API on the schedule of a load profile.
+    
+    Args:
+        rows: Rows to send, in order; the test ends early if they run out
+        profile: Send schedule
+        window: Length of the reporting windows in seconds
+        max_in_flight: Number of requests that can be in flight at once; later
+            requests wait for a free worker and the wait counts as latency
+        shutdown: Optional coordinator that stops the test early
+        **request_options: Options passed to create_user, e.g. api_url or max_retries
+    
+    Returns:
+        LoadTestReport with the results per window
+    """
+    report = LoadTestReport(profile, window)
+    lock = threading.Lock()
+    # Scheduled send times of requests without a result, by request index
+    pending: Dict[int, float] = {}
+    futures: Set[Future] = set()
+    started = time.monotonic()
+    
+    def send(index: int, offset: float, row: Dict[str, Any]) -> None:
+        result = create_user(row, **request_options)
+        # Open-loop latency: from the scheduled send time, not from when a worker picked the request up
+        latency = time.monotonic() - started - offset
+        with lock:
+            # Requests given up on at the end of the test were already counted as unfinished
+            if pending.pop(index, None) is not None:
+                report.window_report(offset).record_result(result._replace(elapsed=latency))
+    
+    def forget(future: Future) -> None:
+        with lock:
+            futures.discard(future)
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="load-test")
+    try:
+        rows = iter(rows)
+        for index in itertools.count():
+            offset = profile.send_time(index)
+            if offset is None:
+                break
+            delay = started + offset - time.monotonic()
+            if shutdown is not None:
+                if shutdown.wait(max(0.0, delay)):
+                    report.interrupted = True
+                    break
+            elif delay > 0:
+                time.sleep(delay)
+            row = next(rows, None)
+            if row is None:
+                logging.warning(f"Load test ran out of rows after {index} requests")
+                break
+            with lock:
+                pending[index] = offset
+            future = executor.submit(send, index, offset, row)
+            with lock:
+                futures.add(future)
+            future.add_done_callback(forget)
+            report.sent += 1
+        
+        with lock:
+            outstanding = set(futures)
+        wait(outstanding, timeout=shutdown.drain_timeout if shutdown is not None else None)
+        if shutdown is not None and shutdown.requested:
+            report.interrupted = True
+        with lock:
+            if pending:
+                logging.warning(f"{len(pending)} load test requests did not finish in time")
+            for offset in pending.values():
+                report.window_report(offset).record_unfinished()
+            pending.clear()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        report.elapsed = time.monotonic() - started
+    return report
@@ -1,9 +1,24 @@
 import logging
+import logging.handlers
+import os
 import sys
 import time
+import gzip
 import json
+import shutil
+import weakref
+import threading
 from datetime import datetime
+from typing import Optional
 from config import LOG_FILE, LOG_LEVEL, LOG_FORMAT_TYPE, LOG_FORMAT_STR
+from config import (
+    LOG_ROTATION, LOG_MAX_BYTES, LOG_ROTATE_WHEN, LOG_BACKUP_COUNT, LOG_COMPRESS,
+    LOG_BUFFER_CAPACITY, LOG_FLUSH_INTERVAL, LOG_FLUSH_LEVEL, LOG_FLUSH_BURST
+)
+
+# Buffered handlers still alive, flushed before forking so child processes
+# do not inherit and write out a copy of the parent's pending records
+_buffered_handlers = weakref.WeakSet()
 
 class JsonFormatter(logging.Formatter):
     """
@@ -25,10 +40,209 @@ class JsonFormatter(logging.Formatter):
             
         return json.dumps(log_data)
 
+class _BatchFlushMixin:
+    """
+    Lets a BufferedHandler write several records with a single flush instead
+    of the one-flush-per-record behaviour of logging.StreamHandler.
+    """
+    defer_flush = False
+    
+    def flush(self):
+        if not self.defer_flush:
+            super().flush()
+
+class SizeRotatingFileHandler(_BatchFlushMixin, logging.handlers.RotatingFileHandler):
+    """
+    File handler that rotates once the file reaches maxBytes (never if 0).
+    """
+
+class TimeRotatingFileHandler(_BatchFlushMixin, logging.handlers.TimedRotatingFileHandler):
+    """
+    File handler that rotates at a fixed time interval, e.g. at midnight.
+    """
+
+class BufferedHandler(logging.handlers.MemoryHandler):
+    """
+    Buffers records and writes them to the target in batches.
+    
+    The buffer is written when it holds capacity records, when flush_burst
+    records at ERROR or above are waiting, when a record at or above
+    flush_level arrives, and on flush() or close(). A background thread also
+    writes it every flush_interval seconds, so no record waits longer than
+    that. A record arriving after a quiet period is written right away. With
+    a flush_interval of 0 there is no timer and records wait for the buffer to
+    fill. A batch is written to the target with one flush of its stream.
+    
+    When only ERROR records reach the handler, as for the error log, every
+    record counts towards flush_burst, so batches hold at most
+    min(capacity, flush_burst) records.
+    """
+    
+    def __init__(self, capacity: int, target: logging.Handler, flush_level: int = LOG_FLUSH_LEVEL,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, flush_burst: int = LOG_FLUSH_BURST):
+        """
+        Args:
+            capacity: Number of records buffered before a write
+            target: Handler the records are written to
+            flush_level: Records at or above this level are written immediately
+            flush_interval: Maximum seconds a record waits before it is written (0 for no timer)
+            flush_burst: Number of waiting records at ERROR or above that triggers a write (0 to disable)
+        """
+        super().__init__(capacity, flushLevel=flush_level, target=target)
+        self.flush_interval = flush_interval
+        self.flush_burst = flush_burst
+        self._last_flush = time.time()
+        self._errors = 0
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        self._timer_pid: Optional[int] = None
+        _buffered_handlers.add(self)
+    
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            self._errors += 1
+        return (len(self.buffer) >= self.capacity or record.levelno >= self.flushLevel
+                or (self.flush_burst > 0 and self._errors >= self.flush_burst)
+                or (self.flush_interval > 0 and record.created - self._last_flush >= self.flush_interval))
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        if self.buffer and self.flush_interval > 0:
+            self._start_timer()
+    
+    def _start_timer(self) -> None:
+        """
+        Starts the interval flush thread on the first buffered record, and
+        again in a forked child, which does not inherit the parent's thread.
+        """
+        if self._timer_pid == os.getpid() or self._stop.is_set():
+            return
+        self._timer_pid = os.getpid()
+        self._timer = threading.Thread(target=_flush_periodically,
+                                       args=(weakref.ref(self), self.flush_interval, self._stop),
+                                       name="log-flush", daemon=True)
+        self._timer.start()
+    
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            self._last_flush = time.time()
+            self._errors = 0
+            target = self.target
+            if not target or not self.buffer:
+                return
+            target.acquire()
+            try:
+                if isinstance(target, _BatchFlushMixin):
+                    target.defer_flush = True
+                try:
+                    for record in self.buffer:
+                        target.handle(record)
+                finally:
+                    if isinstance(target, _BatchFlushMixin):
+                        target.defer_flush = False
+                target.flush()
+            finally:
+                target.release()
+            self.buffer.clear()
+        finally:
+            self.release()
+    
+    def close(self) -> None:
+        """
+        Writes out the buffer and closes the target, which this handler owns.
+        """
+        self._stop.set()
+        target = self.target
+        super().close()
+        if target is not None:
+            target.close()
+
+def _flush_periodically(handler_ref: "weakref.ref[BufferedHandler]", interval: float,
+                        stop: threading.Event) -> None:
+    """
+    Writes out a buffered handler every interval seconds until it is closed.
+    Holds only a weak reference so an unused handler can still be collected.
+    """
+    while not stop.wait(interval):
+        handler = handler_ref()
+        if handler is None:
+            return
+        if handler.buffer:
+            handler.flush()
+        del handler
+
+def _flush_buffered_handlers() -> None:
+    for handler in list(_buffered_handlers):
+        handler.flush()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_flush_buffered_handlers)
+
+def gzip_namer(name: str) -> str:
+    """
+    Names rotated log files with a .gz suffix.
+    """
+    return name + ".gz"
+
+def gzip_rotator(source: str, dest: str) -> None:
+    """
+    Compresses a rotated log file into dest and removes the original.
+    """
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+def create_file_handler(log_file: str, rotation: str = LOG_ROTATION, max_bytes: int = LOG_MAX_BYTES,
+                        when: str = LOG_ROTATE_WHEN, backup_count: int = LOG_BACKUP_COUNT,
+                        compress: bool = LOG_COMPRESS) -> logging.Handler:
+    """
+    Creates the error log file handler with the configured rotation.
+    
+    Args:
+        log_file: Path to the log file
+        rotation: "size", "time" or "none"
+        max_bytes: Size at which the file is rotated with size rotation
+        when: Rotation interval with time rotation, as understood by TimedRotatingFileHandler
+        backup_count: Number of rotated files kept
+        compress: Compress rotated files with gzip
+    
+    Returns:
+        The file handler
+    """
+    if rotation == "time":
+        handler = TimeRotatingFileHandler(log_file, when=when, backupCount=backup_count)
+    else:
+        handler = SizeRotatingFileHandler(log_file, maxBytes=max_bytes if rotation == "size" else 0,
+                                          backupCount=backup_count)
+    if compress:
+        handler.namer = gzip_namer
+        handler.rotator = gzip_rotator
+    return handler
+
+def worker_log_file(worker_name: str, log_file: str = LOG_FILE) -> str:
+    """
+    Names the error log file of a worker process, next to the main one.
+    
+    Rotation is not coordinated between processes, so each local shard worker
+    writes its own file, e.g. logs/error_log.shard-worker-0.txt.
+    
+    Args:
+        worker_name: Name of the worker process
+        log_file: Path to the main error log file
+    
+    Returns:
+        Path to the worker's error log file
+    """
+    root, ext = os.path.splitext(log_file)
+    return f"{root}.{worker_name}{ext}"
+
 def setup_logging(log_file: str = LOG_FILE) -> None:
     """
     Configure logging to write only error logs to a file and print all logs to console.
-    Supports both text and JSON formats based on configuration.
+    Supports both text and JSON formats based on configuration. The error log is
+    rotated and compressed according to LOG_ROTATION and LOG_COMPRESS, and
+    written in batches of up to LOG_BUFFER_CAPACITY records.
     
     Args:
         log_file: Path to the log file where error logs will be written
@@ -42,10 +256,15 @@ def setup_logging(log_file: str = LOG_FILE) -> None:
     else:
         formatter = logging.Formatter(LOG_FORMAT_STR)
     
-    # Set up file handler for error logs only
-    file_handler = logging.FileHandler(log_file)
+    # Set up file handler for error logs only, rotated and written in batches
+    file_handler = create_file_handler(log_file)
     file_handler.setLevel(logging.ERROR)
     file_handler.setFormatter(formatter)
+    if LOG_BUFFER_CAPACITY > 0:
+        error_handler = BufferedHandler(LOG_BUFFER_CAPACITY, file_handler)
+        error_handler.setLevel(logging.ERROR)
+    else:
+        error_handler = file_handler
     
     # Set up console handler for all logs
     console_handler = logging.StreamHandler(sys.stdout)
@@ -55,6 +274,8 @@ def setup_logging(log_file: str = LOG_FILE) -> None:
     # Configure root logger
     root_logger = logging.getLogger()
     root_logger.setLevel(LOG_LEVEL)  # Use configured log level
+    for handler in root_logger.handlers:
+        handler.close()  # Writes out records still held by a previous buffered handler
     root_logger.handlers = []  # Clear any existing handlers
-    root_logger.addHandler(file_handler)
+    root_logger.addHandler(error_handler)
     root_logger.addHandler(console_handler)
\ No newline at end of file
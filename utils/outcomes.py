@@ -0,0 +1,227 @@
+"""
+Persistent store of row outcomes.
+
+Every import run records the outcome of each row (created, failed, skipped
+or unfinished) in a local SQLite database, indexed on the normalized email,
+so "was this user created?" is a single indexed lookup instead of a search
+through old log files. Outcomes are buffered and written in batches, one
+transaction per batch.
+
+Tables:
+    runs       One row per create_users call: source file, start and end time, totals
+    outcomes   One row per CSV row: run, row number, email, outcome, error class, status, message
+"""
+
+import os
+import time
+import socket
+import sqlite3
+from typing import Dict, Any, List, Optional, Tuple
+
+from config import OUTCOME_DB, OUTCOME_BATCH_SIZE
+from .report import RunReport
+
+# Row outcomes
+OUTCOME_CREATED = "created"
+OUTCOME_FAILED = "failed"
+OUTCOME_SKIPPED = "skipped"
+OUTCOME_UNFINISHED = "unfinished"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    host TEXT,
+    pid INTEGER,
+    started REAL NOT NULL,
+    finished REAL,
+    success INTEGER,
+    errors INTEGER,
+    skipped INTEGER,
+    unfinished INTEGER,
+    interrupted INTEGER
+);
+CREATE TABLE IF NOT EXISTS outcomes (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    row_num INTEGER NOT NULL,
+    email TEXT,
+    outcome TEXT NOT NULL,
+    error_class TEXT,
+    status_code INTEGER,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS outcomes_email ON outcomes(email, run_id);
+CREATE INDEX IF NOT EXISTS outcomes_run ON outcomes(run_id, outcome);
+"""
+
+class OutcomeStore:
+    """
+    SQLite store of import outcomes.
+    
+    The connection is opened on first use, so creating a store is free when
+    nothing is recorded or queried. A store must be used from one thread;
+    several processes may share the database file.
+    """
+    
+    def __init__(self, path: str = OUTCOME_DB, batch_size: int = OUTCOME_BATCH_SIZE):
+        """
+        Args:
+            path: Database file, created if missing
+            batch_size: Number of outcomes buffered before they are written in one transaction
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self.run_id: Optional[int] = None
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple] = []
+    
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens the database and creates the schema if needed.
+        """
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Workers of a sharded import write to the same file, so wait for locks
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        return self._connection
+    
+    def __enter__(self) -> "OutcomeStore":
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """
+        Writes pending outcomes and closes the database.
+        """
+        if self._connection is not None:
+            self.flush()
+            self._connection.close()
+            self._connection = None
+    
+    def start_run(self, source: str) -> int:
+        """
+        Starts a run; following outcomes are recorded under it.
+        
+        Args:
+            source: The imported file
+        
+        Returns:
+            The run id
+        """
+        connection = self._connect()
+        self.flush()
+        with connection:
+            cursor = connection.execute(
+                "INSERT INTO runs (source, host, pid, started) VALUES (?, ?, ?, ?)",
+                (os.path.abspath(source), socket.gethostname(), os.getpid(), time.time())
+            )
+        self.run_id = cursor.lastrowid
+        return self.run_id
+    
+    def record(self, row_num: int, email: Optional[str], outcome: str, error_class: Optional[str] = None,
+               status_code: Optional[int] = None, message: str = "") -> None:
+        """
+        Records the outcome of a row; written once batch_size outcomes are pending.
+        
+        Args:
+            row_num: Row number in the file
+            email: Email address of the row, normalized if it passed validation
+            outcome: One of OUTCOME_CREATED, OUTCOME_FAILED, OUTCOME_SKIPPED, OUTCOME_UNFINISHED
+            error_class: Error class from the run report, if the row was not created
+            status_code: HTTP status of a failed request, if any
+            message: Reason the row was not created
+        """
+        self._pending.append((self.run_id, row_num, email or None, outcome, error_class, status_code, message or None))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+    
+    def flush(self) -> None:
+        """
+        Writes pending outcomes in one transaction.
+        """
+        if not self._pending:
+            return
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT INTO outcomes (run_id, row_num, email, outcome, error_class, status_code, message) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._pending
+            )
+        self._pending = []
+    
+    def finish_run(self, report: RunReport) -> None:
+        """
+        Writes pending outcomes and the totals of the current run.
+        
+        Args:
+            report: The run report of the run
+        """
+        if self.run_id is None:
+            return
+        self.flush()
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE runs SET finished = ?, success = ?, errors = ?, skipped = ?, unfinished = ?, interrupted = ? "
+                "WHERE id = ?",
+                (time.time(), report.success, report.errors, report.skipped, report.unfinished,
+                 int(report.interrupted), self.run_id)
+            )
+        self.run_id = None
+    
+    def lookup(self, email: str) -> List[Dict[str, Any]]:
+        """
+        Returns every recorded outcome for an email address, newest first.
+        
+        Args:
+            email: Normalized email address
+        
+        Returns:
+            List of dictionaries with run_id, source, started, row_num, outcome,
+            error_class, status_code and message
+        """
+        self.flush()
+        connection = self._connect()
+        cursor = connection.execute(
+            "SELECT o.run_id, r.source, r.started, o.row_num, o.outcome, o.error_class, o.status_code, o.message "
+            "FROM outcomes o JOIN runs r ON r.id = o.run_id WHERE o.email = ? ORDER BY o.run_id DESC, o.row_num DESC",
+            (email,)
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def run_counts(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Returns the most recent runs with their outcome counts, newest first.
+        
+        Args:
+            limit: Maximum number of runs
+        
+        Returns:
+            List of dictionaries with id, source, started, finished, interrupted and
+            the number of rows per outcome
+        """
+        self.flush()
+        connection = self._connect()
+        runs = connection.execute(
+            "SELECT id, source, started, finished, interrupted FROM runs ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+        result = []
+        for run_id, source, started, finished, interrupted in runs:
+            counts = dict(connection.execute(
+                "SELECT outcome, COUNT(*) FROM outcomes WHERE run_id = ? GROUP BY outcome", (run_id,)
+            ).fetchall())
+            entry = {"id": run_id, "source": source, "started": started, "finished": finished,
+                     "interrupted": bool(interrupted)}
+            for outcome in (OUTCOME_CREATED, OUTCOME_FAILED, OUTCOME_SKIPPED, OUTCOME_UNFINISHED):
+                entry[outcome] = counts.get(outcome, 0)
+            result.append(entry)
+        return result
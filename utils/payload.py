@@ -0,0 +1,129 @@
+"""
+Request payload encoding.
+
+A PayloadBuilder is created once per file from the CSV header. It fixes the
+list of fields sent to the API and precomputes a JSON template for them, so
+encoding a row only escapes its values instead of running the generic
+json.dumps over every column. Large bodies can be gzip-compressed for APIs
+that accept a Content-Encoding.
+"""
+
+import json
+import zlib
+import logging
+from json.encoder import encode_basestring_ascii
+from typing import Dict, Any, Optional, Sequence, Tuple
+
+from config import PAYLOAD_FIELDS, PAYLOAD_GZIP, PAYLOAD_GZIP_MIN_BYTES, PAYLOAD_GZIP_LEVEL
+
+# Headers shared by every request, never mutated
+_JSON_HEADERS = {"Content-Type": "application/json"}
+_GZIP_HEADERS = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+
+def _encode_value(value: Any) -> str:
+    """
+    Encodes a single value as JSON; CSV values are strings or None.
+    """
+    if value.__class__ is str:
+        return encode_basestring_ascii(value)
+    if value is None:
+        return "null"
+    return json.dumps(value, separators=(",", ":"), allow_nan=False)
+
+def gzip_body(body: bytes, level: int = PAYLOAD_GZIP_LEVEL) -> bytes:
+    """
+    Compresses a request body in the gzip format.
+    
+    Args:
+        body: Encoded request body
+        level: zlib compression level (1-9)
+    
+    Returns:
+        The compressed body
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip header and trailer
+    return compressor.compress(body) + compressor.flush()
+
+def encode_json(data: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Encodes arbitrary data as compact JSON, for callers without a PayloadBuilder.
+    
+    Args:
+        data: Data to send
+    
+    Returns:
+        Tuple containing (body, headers)
+    """
+    return json.dumps(data, separators=(",", ":"), allow_nan=False).encode(), _JSON_HEADERS
+
+class PayloadBuilder:
+    """
+    Encodes rows as compact JSON request bodies with a fixed field list.
+    """
+    
+    def __init__(self, fields: Sequence[str], compress: bool = PAYLOAD_GZIP,
+                 compress_min_bytes: int = PAYLOAD_GZIP_MIN_BYTES, compress_level: int = PAYLOAD_GZIP_LEVEL):
+        """
+        Args:
+            fields: Fields sent to the API, in order
+            compress: Gzip bodies of at least compress_min_bytes
+            compress_min_bytes: Smaller bodies are sent uncompressed, since gzip would not shrink them
+            compress_level: zlib compression level (1-9)
+        """
+        self.fields = list(fields)
+        self.compress = compress
+        self.compress_min_bytes = compress_min_bytes
+        self.compress_level = compress_level
+        # '{"email":%s,"name":%s}' with each key escaped once, up front
+        self._template = "{" + ",".join(
+            encode_basestring_ascii(field).replace("%", "%%") + ":%s" for field in self.fields
+        ) + "}"
+    
+    @classmethod
+    def from_header(cls, fieldnames: Sequence[str], fields: Optional[Sequence[str]] = None,
+                    **kwargs) -> "PayloadBuilder":
+        """
+        Builds a payload builder for a CSV header.
+        
+        Args:
+            fieldnames: Columns of the CSV file
+            fields: Fields to send, defaults to PAYLOAD_FIELDS or, if that is empty, every column
+            **kwargs: Compression options passed to PayloadBuilder
+        
+        Returns:
+            The payload builder
+        """
+        if fields is None:
+            fields = PAYLOAD_FIELDS or fieldnames
+        missing = [field for field in fields if field not in fieldnames]
+        if missing:
+            logging.warning(f"Payload fields not in the CSV header are not sent: {', '.join(missing)}")
+        return cls([field for field in fields if field in fieldnames], **kwargs)
+    
+    def encode(self, row: Dict[str, Any]) -> bytes:
+        """
+        Encodes the schema fields of a row as compact JSON.
+        
+        Args:
+            row: Row read from the CSV file
+        
+        Returns:
+            The JSON body
+        """
+        get = row.get
+        return (self._template % tuple([_encode_value(get(field)) for field in self.fields])).encode()
+    
+    def build(self, row: Dict[str, Any]) -> Tuple[bytes, Dict[str, str]]:
+        """
+        Encodes a row and compresses the body if configured and worthwhile.
+        
+        Args:
+            row: Row read from the CSV file
+        
+        Returns:
+            Tuple containing (body, headers)
+        """
+        body = self.encode(row)
+        if self.compress and len(body) >= self.compress_min_bytes:
+            return gzip_body(body, self.compress_level), _GZIP_HEADERS
+        return body, _JSON_HEADERS
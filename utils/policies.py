@@ -0,0 +1,96 @@
+"""
+Retry and timeout policies for API requests.
+
+The policies are small immutable values built from config/settings.py, so each
+environment can trade latency for reliability without code changes.
+"""
+
+import time
+import random
+from typing import NamedTuple, Optional, Tuple
+
+from config import (
+    MAX_RETRIES, RETRY_BACKOFF, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    CONNECT_TIMEOUT, READ_TIMEOUT, REQUEST_DEADLINE, HEDGE_AFTER
+)
+
+# Backoff strategies understood by RetryPolicy
+BACKOFF_TYPES = ("exponential", "decorrelated")
+
+class RetryPolicy(NamedTuple):
+    """
+    How often and how long to wait before retrying a failed request.
+    
+    Attributes:
+        max_retries: Maximum number of retries after the first attempt
+        backoff: "exponential" (base_delay, 2 * base_delay, ...) or "decorrelated"
+                 (random between base_delay and three times the previous delay)
+        base_delay: First delay in seconds
+        max_delay: Upper bound for any delay in seconds
+    """
+    max_retries: int = MAX_RETRIES
+    backoff: str = RETRY_BACKOFF
+    base_delay: float = RETRY_BASE_DELAY
+    max_delay: float = RETRY_MAX_DELAY
+    
+    def delay(self, retry_count: int, previous_delay: float, rng: random.Random = random) -> float:
+        """
+        Returns the delay before the given retry.
+        
+        Args:
+            retry_count: Number of the retry about to happen, starting at 1
+            previous_delay: Delay used before the previous retry (base_delay for the first)
+            rng: Random number generator used for jitter
+        
+        Returns:
+            Delay in seconds
+        
+        Raises:
+            ValueError: If backoff is not one of BACKOFF_TYPES
+        """
+        if self.backoff == "exponential":
+            return min(self.max_delay, self.base_delay * 2 ** (retry_count - 1))
+        if self.backoff == "decorrelated":
+            # Decorrelated jitter spreads retries of many workers instead of synchronizing them
+            return min(self.max_delay, rng.uniform(self.base_delay, max(self.base_delay, previous_delay * 3)))
+        raise ValueError(f"Unknown backoff type: {self.backoff}")
+
+class TimeoutPolicy(NamedTuple):
+    """
+    Time limits for a single row's request.
+    
+    Attributes:
+        connect: Connect timeout per attempt in seconds
+        read: Read timeout per attempt in seconds
+        deadline: Total time allowed per row across attempts and backoff, 0 for no limit
+        hedge_after: Send a second copy of a request still unanswered after this many
+                     seconds, 0 to disable. Only safe if the API rejects duplicate
+                     creations (e.g. with 409), since both copies may reach it.
+    """
+    connect: float = CONNECT_TIMEOUT
+    read: float = READ_TIMEOUT
+    deadline: float = REQUEST_DEADLINE
+    hedge_after: float = HEDGE_AFTER
+    
+    def start(self) -> Optional[float]:
+        """
+        Returns the monotonic time by which the row must be done, or None without a deadline.
+        """
+        return time.monotonic() + self.deadline if self.deadline > 0 else None
+    
+    def attempt_timeout(self, deadline_at: Optional[float]) -> Optional[Tuple[float, float]]:
+        """
+        Returns the (connect, read) timeout of the next attempt, capped by the time left.
+        
+        Args:
+            deadline_at: Value returned by start()
+        
+        Returns:
+            Timeout tuple for requests, or None if the deadline has passed
+        """
+        if deadline_at is None:
+            return self.connect, self.read
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            return None
+        return min(self.connect, remaining), min(self.read, remaining)
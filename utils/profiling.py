@@ -0,0 +1,201 @@
+"""
+Profiling support.
+
+Profiler runs a block under cProfile in the calling thread and in every
+thread started while it is active, such as the create_user worker threads,
+and writes a profile artifact plus a summary of the hottest functions.
+From Python 3.12 cProfile is built on sys.monitoring, which allows one
+profiler per process and reports the calls of every thread to it, so a
+single profiler is used there instead of one per thread.
+
+The timed decorator adds lightweight call timings around individual utility
+functions. It is applied when PROFILE_HOOKS is enabled at import time;
+otherwise it returns the function unchanged, so disabled hooks cost nothing.
+"""
+
+import os
+import io
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from functools import wraps
+from typing import Dict, List, Optional, Tuple, Callable, TypeVar
+
+from config import LOGS_DIR, PROFILE_TOP, PROFILE_HOOKS
+
+F = TypeVar("F", bound=Callable)
+
+# cProfile profilers are process-wide (sys.monitoring) from Python 3.12; enabling
+# a second one raises ValueError, and the first already sees every thread
+_PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+# Call count, total seconds and maximum seconds per timed function
+_timings: Dict[str, List[float]] = {}
+_timings_lock = threading.Lock()
+
+# ============================================================================
+# Timing Hooks
+# ============================================================================
+
+def timed(name: Optional[str] = None, enabled: bool = PROFILE_HOOKS) -> Callable[[F], F]:
+    """
+    Decorator that records call timings of a function when hooks are enabled.
+    
+    Args:
+        name: Name the timings are reported under, defaults to module.function
+        enabled: Whether to install the hook, defaults to PROFILE_HOOKS
+    
+    Returns:
+        Decorator returning the wrapped function, or the function itself when disabled
+    """
+    def decorator(func: F) -> F:
+        if not enabled:
+            return func
+        key = name or f"{func.__module__}.{func.__qualname__}"
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with _timings_lock:
+                    entry = _timings.get(key)
+                    if entry is None:
+                        _timings[key] = [1, elapsed, elapsed]
+                    else:
+                        entry[0] += 1
+                        entry[1] += elapsed
+                        if elapsed > entry[2]:
+                            entry[2] = elapsed
+        return wrapper
+    return decorator
+
+def timing_report() -> Dict[str, Dict[str, float]]:
+    """
+    Returns the timings recorded by the timed hooks.
+    
+    Returns:
+        Dictionary mapping function names to calls, total_ms, mean_ms and max_ms,
+        ordered by total time
+    """
+    with _timings_lock:
+        items = [(key, list(entry)) for key, entry in _timings.items()]
+    items.sort(key=lambda item: item[1][1], reverse=True)
+    return {
+        key: {
+            "calls": int(calls),
+            "total_ms": round(total * 1000, 3),
+            "mean_ms": round(total * 1000 / calls, 3),
+            "max_ms": round(longest * 1000, 3)
+        }
+        for key, (calls, total, longest) in items
+    }
+
+def reset_timings() -> None:
+    """
+    Clears the timings recorded by the timed hooks.
+    """
+    with _timings_lock:
+        _timings.clear()
+
+# ============================================================================
+# Profiler
+# ============================================================================
+
+class Profiler:
+    """
+    Deterministic profiler for the calling thread and the threads it starts.
+    
+    Before Python 3.12 each thread started inside the block gets its own
+    cProfile profiler and the results are combined. From 3.12 one profiler
+    records all threads; calls that interleave across threads share its call
+    stack, so cumulative times of worker functions are approximate there,
+    while call counts and internal times stay exact.
+    
+    Usage:
+        with Profiler() as profiler:
+            create_users(...)
+        profiler.write()
+    """
+    
+    def __init__(self):
+        self._profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+    
+    def _start_thread_profile(self, frame, event, arg) -> None:
+        """
+        Profile function installed for new threads: replaces itself with a
+        cProfile profiler on the thread's first event.
+        """
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+    
+    def __enter__(self) -> "Profiler":
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        if not _PROCESS_WIDE_PROFILER:
+            threading.setprofile(self._start_thread_profile)
+        profile.enable()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._profiles[0].disable()
+        if not _PROCESS_WIDE_PROFILER:
+            threading.setprofile(None)
+    
+    def stats(self) -> pstats.Stats:
+        """
+        Returns the combined statistics of all profiled threads.
+        Call after the profiled block and its threads have finished.
+        """
+        stats = pstats.Stats(self._profiles[0])
+        with self._lock:
+            for profile in self._profiles[1:]:
+                stats.add(profile)
+        return stats
+    
+    def write(self, output_dir: str = LOGS_DIR, top: int = PROFILE_TOP) -> Tuple[str, str]:
+        """
+        Writes the profile and a summary of the hottest functions.
+        
+        The .prof file can be loaded with pstats or tools such as snakeviz. The
+        summary lists the top functions by cumulative and by internal time,
+        followed by the timings of the timed hooks if any were recorded.
+        
+        Args:
+            output_dir: Directory the files are written to
+            top: Number of functions listed per ordering
+        
+        Returns:
+            Tuple containing (profile path, summary path)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        base = os.path.join(output_dir, f"profile-{time.strftime('%Y%m%d-%H%M%S')}")
+        stats = self.stats()
+        stats.dump_stats(f"{base}.prof")
+        
+        summary = io.StringIO()
+        stats.stream = summary
+        stats.strip_dirs()
+        for order, label in (("cumulative", "cumulative time"), ("tottime", "internal time")):
+            summary.write(f"Top {top} functions by {label}\n")
+            stats.sort_stats(order).print_stats(top)
+        timings = timing_report()
+        if timings:
+            summary.write("Timing hooks\n")
+            width = max(len(key) for key in timings)
+            for key, entry in timings.items():
+                summary.write(f"  {key:<{width}}  {entry['calls']:>9} calls  {entry['total_ms']:>12.3f}ms total  "
+                              f"{entry['mean_ms']:>9.3f}ms mean  {entry['max_ms']:>9.3f}ms max\n")
+        with open(f"{base}.txt", "w") as f:
+            f.write(summary.getvalue())
+        
+        logging.info(f"Profile written to {base}.prof, summary to {base}.txt")
+        return f"{base}.prof", f"{base}.txt"
@@ -0,0 +1,214 @@
+"""
+Progress reporting for long-running imports.
+
+The sending loop only bumps plain integer counters on a ProgressReporter; a
+background thread renders them at a fixed interval, so reporting never blocks
+the loop. On a terminal the status line is redrawn in place, otherwise it is
+written as a periodic log line. While the line is live, console log handlers
+writing to the same terminal clear it before each log line and redraw it
+after, so log output never runs into the status line.
+"""
+
+import sys
+import time
+import logging
+import threading
+from typing import Optional, TextIO, List
+
+from config import PROGRESS_INTERVAL
+
+class _StatusLineStream:
+    """
+    Stream wrapper given to console log handlers while a status line is live.
+    """
+    
+    def __init__(self, reporter: "ProgressReporter"):
+        self.reporter = reporter
+    
+    def write(self, text: str) -> int:
+        return self.reporter._write_above(text)
+    
+    def flush(self) -> None:
+        self.reporter.stream.flush()
+
+class ProgressReporter:
+    """
+    Tracks and periodically reports the progress of an import.
+    
+    The counters are public attributes that the import updates directly:
+    rows, bytes_read, in_flight, retries, success, errors and skipped.
+    """
+    
+    def __init__(self, total_bytes: int = 0, interval: float = PROGRESS_INTERVAL,
+                 stream: Optional[TextIO] = None, is_tty: Optional[bool] = None):
+        """
+        Args:
+            total_bytes: Size of the input file, used for the percentage and ETA (0 if unknown)
+            interval: Seconds between reports
+            stream: Stream the status line is written to on a terminal, defaults to sys.stdout
+            is_tty: Force terminal or log-line output, detected from stream by default
+        """
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self.stream = stream if stream is not None else sys.stdout
+        self.is_tty = is_tty if is_tty is not None else self.stream.isatty()
+        
+        # Counters updated by the sending loop
+        self.rows = 0
+        self.bytes_read = 0
+        self.in_flight = 0
+        self.retries = 0
+        self.success = 0
+        self.errors = 0
+        self.skipped = 0
+        
+        self._start_time = time.monotonic()
+        self._last_time = self._start_time
+        self._last_rows = 0
+        self._rate = 0.0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Guards retries, which worker threads update, and writes to the terminal
+        self._retry_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._line = ""
+        self._handlers: List[logging.StreamHandler] = []
+    
+    def start(self) -> "ProgressReporter":
+        """
+        Starts the background reporting thread.
+        """
+        self._start_time = self._last_time = time.monotonic()
+        if self.is_tty:
+            self._attach_handlers()
+        self._thread = threading.Thread(target=self._run, name="progress-reporter", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """
+        Stops the reporting thread and writes a final report.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.report()
+        if self.is_tty:
+            with self._write_lock:
+                self._line = ""
+                self.stream.write("\n")
+                self.stream.flush()
+            self._detach_handlers()
+    
+    def __enter__(self) -> "ProgressReporter":
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.stop()
+    
+    def on_retry(self) -> None:
+        """
+        Counts a retried request, suitable as the on_retry callback of create_user.
+        Safe to call from several worker threads.
+        """
+        with self._retry_lock:
+            self.retries += 1
+    
+    def _attach_handlers(self) -> None:
+        """
+        Routes root console handlers writing to the status line's stream through it.
+        """
+        for handler in logging.getLogger().handlers:
+            if type(handler) is logging.StreamHandler and handler.stream is self.stream:
+                handler.setStream(_StatusLineStream(self))
+                self._handlers.append(handler)
+    
+    def _detach_handlers(self) -> None:
+        """
+        Gives the console handlers their stream back.
+        """
+        for handler in self._handlers:
+            if isinstance(handler.stream, _StatusLineStream):
+                handler.setStream(self.stream)
+        self._handlers = []
+    
+    def _write_above(self, text: str) -> int:
+        """
+        Writes log output, clearing the status line first and redrawing it after complete lines.
+        """
+        with self._write_lock:
+            if self._line:
+                self.stream.write("\r\x1b[K")
+            written = self.stream.write(text)
+            if self._line and text.endswith("\n"):
+                self.stream.write(f"\r{self._line}\x1b[K")
+            return written
+    
+    def _run(self) -> None:
+        """
+        Reports at every interval until stopped.
+        """
+        while not self._stop_event.wait(self.interval):
+            self.report()
+    
+    def _update_rate(self) -> None:
+        """
+        Updates the smoothed rows/sec rate from the rows done since the last call.
+        """
+        now = time.monotonic()
+        elapsed = now - self._last_time
+        if elapsed <= 0:
+            return
+        current = (self.rows - self._last_rows) / elapsed
+        # Exponential moving average, seeded with the first measurement
+        self._rate = current if self._last_rows == 0 else 0.3 * current + 0.7 * self._rate
+        self._last_time = now
+        self._last_rows = self.rows
+    
+    def eta(self) -> Optional[float]:
+        """
+        Estimates the seconds remaining from the bytes read so far.
+        
+        Returns:
+            Estimated seconds remaining, or None if the file size is unknown
+        """
+        if not self.total_bytes or not self.bytes_read:
+            return None
+        elapsed = time.monotonic() - self._start_time
+        remaining = max(self.total_bytes - self.bytes_read, 0)
+        return elapsed * remaining / self.bytes_read
+    
+    def render(self) -> str:
+        """
+        Formats the current counters as a single status line.
+        
+        Returns:
+            The status line
+        """
+        self._update_rate()
+        parts = [f"{self.rows} rows"]
+        if self.total_bytes:
+            percent = min(100.0, 100.0 * self.bytes_read / self.total_bytes)
+            parts.append(f"{self.bytes_read}/{self.total_bytes} bytes ({percent:.1f}%)")
+        parts.append(f"{self._rate:.1f} rows/sec")
+        eta = self.eta()
+        if eta is not None:
+            parts.append(f"ETA {int(eta) // 60}m{int(eta) % 60:02d}s")
+        parts.append(f"in-flight {self.in_flight}")
+        parts.append(f"retries {self.retries}")
+        parts.append(f"ok {self.success} / errors {self.errors} / skipped {self.skipped}")
+        return " | ".join(parts)
+    
+    def report(self) -> None:
+        """
+        Writes the status line to the terminal, or logs it when not on a terminal.
+        """
+        line = self.render()
+        if self.is_tty:
+            with self._write_lock:
+                self._line = line
+                self.stream.write(f"\r{line}\x1b[K")
+                self.stream.flush()
+        else:
+            logging.info(f"Progress: {line}")
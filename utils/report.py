@@ -0,0 +1,321 @@
+"""
+Structured run reports.
+
+A RunReport collects the outcome of an import with plain counters that are
+cheap to update on the hot path: totals, counts per error class and per HTTP
+status, retries, and a bucketed latency histogram. Reports from several
+shards can be merged, and a report converts to text or to a JSON-ready dict.
+"""
+
+import math
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Any, List, Optional
+
+from .api import ApiResult, RESULT_HTTP_STATUS
+
+# ============================================================================
+# Error Classes
+# ============================================================================
+
+ERROR_MISSING_FIELD = "missing_field"
+ERROR_INVALID_EMAIL = "invalid_email"
+ERROR_RULE_VIOLATION = "rule_violation"
+ERROR_DUPLICATE = "duplicate"
+ERROR_HTTP_STATUS = "http_status"
+ERROR_UNFINISHED = "unfinished"
+ERROR_FILE = "file"
+
+# HTTP status the API uses for users that already exist
+_CONFLICT_STATUS = 409
+
+# ============================================================================
+# Latency Histogram
+# ============================================================================
+
+# Bucket upper bounds in seconds: 0.5ms to 5 minutes, 10% apart
+_LATENCY_BOUNDS = [0.0005 * 1.1 ** i for i in range(math.ceil(math.log(300 / 0.0005, 1.1)) + 1)]
+
+class LatencyHistogram:
+    """
+    Latency histogram with logarithmic buckets.
+    
+    Recording is a binary search and an increment, memory is constant, and
+    percentiles are accurate to the bucket width (10%).
+    """
+    
+    def __init__(self):
+        self.counts = [0] * (len(_LATENCY_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+    
+    def record(self, seconds: float) -> None:
+        """
+        Records one latency.
+        
+        Args:
+            seconds: Latency in seconds
+        """
+        self.counts[bisect_left(_LATENCY_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def merge(self, other: "LatencyHistogram") -> None:
+        """
+        Adds the latencies recorded by another histogram.
+        """
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+    
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the latency below which the given percentage of requests fall.
+        
+        Args:
+            percent: Percentile between 0 and 100
+        
+        Returns:
+            Upper bound of the bucket holding the percentile, in seconds (0 if empty)
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                bound = _LATENCY_BOUNDS[index] if index < len(_LATENCY_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+    
+    def summary(self) -> Dict[str, float]:
+        """
+        Returns count, mean, p50, p90, p99 and max, in milliseconds.
+        """
+        mean = self.total / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean * 1000, 2),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p90_ms": round(self.percentile(90) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "max_ms": round(self.max * 1000, 2)
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the raw histogram, for storage and later merging.
+        """
+        return {"counts": self.counts, "count": self.count, "total": self.total, "max": self.max}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """
+        Rebuilds a histogram stored with to_dict().
+        """
+        histogram = cls()
+        if len(data.get("counts", [])) == len(histogram.counts):
+            histogram.counts = list(data["counts"])
+            histogram.count = data.get("count", 0)
+            histogram.total = data.get("total", 0.0)
+            histogram.max = data.get("max", 0.0)
+        return histogram
+
+# ============================================================================
+# Run Report
+# ============================================================================
+
+class RunReport:
+    """
+    Outcome of an import run.
+    
+    Attributes:
+        success: Number of users created
+        errors: Number of rows that failed at the API, plus file-level errors
+        skipped: Number of rows skipped by validation
+        unfinished: Number of requests abandoned at shutdown
+        interrupted: True if the run was stopped before the end of the file
+        retries: Total number of retried requests
+        elapsed: Duration of the run in seconds
+        error_classes: Counter of error class names (ERROR_* constants and ApiResult kinds)
+        status_codes: Counter of HTTP status codes of failed requests
+        latency: Histogram of create_user latencies, including retries
+    """
+    
+    def __init__(self):
+        self.success = 0
+        self.errors = 0
+        self.skipped = 0
+        self.unfinished = 0
+        self.interrupted = False
+        self.retries = 0
+        self.elapsed = 0.0
+        self.error_classes: Counter = Counter()
+        self.status_codes: Counter = Counter()
+        self.latency = LatencyHistogram()
+    
+    def record_skip(self, error_class: str) -> None:
+        """
+        Records a row skipped by validation.
+        
+        Args:
+            error_class: Why the row was skipped, e.g. ERROR_MISSING_FIELD
+        """
+        self.skipped += 1
+        self.error_classes[error_class] += 1
+    
+    def record_error(self, error_class: str) -> None:
+        """
+        Records an error that is not tied to an API result, e.g. an unreadable file.
+        
+        Args:
+            error_class: Class of the error, e.g. ERROR_FILE
+        """
+        self.errors += 1
+        self.error_classes[error_class] += 1
+    
+    def record_unfinished(self) -> None:
+        """
+        Records a request abandoned at shutdown.
+        """
+        self.unfinished += 1
+        self.error_classes[ERROR_UNFINISHED] += 1
+    
+    def record_result(self, result: ApiResult) -> Optional[str]:
+        """
+        Records the result of a create_user call.
+        
+        Args:
+            result: The result returned by create_user
+        
+        Returns:
+            The error class of a failed call, None on success
+        """
+        self.retries += result.retries
+        self.latency.record(result.elapsed)
+        if result.success:
+            self.success += 1
+            return None
+        self.errors += 1
+        if result.kind == RESULT_HTTP_STATUS:
+            self.status_codes[result.status_code] += 1
+            error_class = ERROR_DUPLICATE if result.status_code == _CONFLICT_STATUS else ERROR_HTTP_STATUS
+        else:
+            error_class = result.kind
+        self.error_classes[error_class] += 1
+        return error_class
+    
+    def merge(self, other: "RunReport") -> None:
+        """
+        Adds the counts of another report, e.g. from another shard.
+        The elapsed time becomes the longer of the two.
+        """
+        self.success += other.success
+        self.errors += other.errors
+        self.skipped += other.skipped
+        self.unfinished += other.unfinished
+        self.interrupted = self.interrupted or other.interrupted
+        self.retries += other.retries
+        self.elapsed = max(self.elapsed, other.elapsed)
+        self.error_classes.update(other.error_classes)
+        self.status_codes.update(other.status_codes)
+        self.latency.merge(other.latency)
+    
+    @property
+    def rows(self) -> int:
+        """
+        Number of rows accounted for.
+        """
+        return self.success + self.errors + self.skipped + self.unfinished
+    
+    def to_dict(self, include_histogram: bool = False) -> Dict[str, Any]:
+        """
+        Returns the report as a JSON-serializable dictionary.
+        
+        Args:
+            include_histogram: Include the raw latency histogram so the report can be merged later
+        
+        Returns:
+            Dictionary of the report
+        """
+        data = {
+            "success": self.success,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "unfinished": self.unfinished,
+            "interrupted": self.interrupted,
+            "retries": self.retries,
+            "elapsed": round(self.elapsed, 3),
+            "rows_per_sec": round(self.rows / self.elapsed, 1) if self.elapsed > 0 else 0.0,
+            "error_classes": dict(self.error_classes.most_common()),
+            "status_codes": {str(code): count for code, count in sorted(self.status_codes.items())},
+            "latency": self.latency.summary()
+        }
+        if include_histogram:
+            data["latency_histogram"] = self.latency.to_dict()
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunReport":
+        """
+        Rebuilds a report stored with to_dict(include_histogram=True).
+        """
+        report = cls()
+        for key in ("success", "errors", "skipped", "unfinished", "retries"):
+            setattr(report, key, data.get(key, 0))
+        report.interrupted = data.get("interrupted", False)
+        report.elapsed = data.get("elapsed", 0.0)
+        report.error_classes = Counter(data.get("error_classes", {}))
+        report.status_codes = Counter({int(code): count for code, count in data.get("status_codes", {}).items()})
+        report.latency = LatencyHistogram.from_dict(data.get("latency_histogram", {}))
+        return report
+    
+    def format_text(self) -> str:
+        """
+        Renders the report for the console.
+        """
+        lines = [
+            "Summary:",
+            f"  Success: {self.success}",
+            f"  Errors: {self.errors}",
+            f"  Skipped: {self.skipped}"
+        ]
+        if self.interrupted:
+            lines.append(f"  Unfinished: {self.unfinished}")
+            lines.append("  (partial run, stopped by shutdown request)")
+        lines.append(f"  Retries: {self.retries}")
+        if self.elapsed > 0:
+            lines.append(f"  Elapsed: {self.elapsed:.2f}s ({self.rows / self.elapsed:,.1f} rows/sec)")
+        if self.latency.count:
+            latency = self.latency.summary()
+            lines.append(f"  Latency: mean {latency['mean_ms']}ms, p50 {latency['p50_ms']}ms, "
+                         f"p90 {latency['p90_ms']}ms, p99 {latency['p99_ms']}ms, max {latency['max_ms']}ms")
+        lines.extend(_format_counter("Error classes", self.error_classes))
+        lines.extend(_format_counter("HTTP status codes", self.status_codes))
+        return "\n".join(lines)
+
+def _format_counter(title: str, counter: Counter) -> List[str]:
+    """
+    Formats a counter as an indented table, most common first.
+    """
+    if not counter:
+        return []
+    width = max(len(str(key)) for key in counter)
+    return [f"  {title}:"] + [f"    {str(key):<{width}}  {count}" for key, count in counter.most_common()]
+
+def classify_rule_error(message: str) -> str:
+    """
+    Returns the error class of a message from a compiled validator.
+    
+    Args:
+        message: Error returned by the validator built by compile_validator
+    
+    Returns:
+        ERROR_DUPLICATE for uniqueness violations, ERROR_RULE_VIOLATION otherwise
+    """
+    return ERROR_DUPLICATE if message.startswith("Duplicate value") else ERROR_RULE_VIOLATION
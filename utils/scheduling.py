@@ -0,0 +1,140 @@
+"""
+Send scheduling.
+
+Validated rows pass through a SendQueue before they are sent. Each row gets
+a priority class from the configured PRIORITY_RULES (lower classes are sent
+first), and the queue holds up to SEND_QUEUE_SIZE rows, so a critical row
+anywhere in that window is sent ahead of the routine rows before it.
+
+Within a priority class rows keep their order per source, and sources take
+turns, so one large file cannot starve another that feeds the same queue.
+"""
+
+import heapq
+from collections import OrderedDict, deque
+from typing import Dict, Any, List, Mapping, Callable, Deque, Hashable
+
+from config import PRIORITY_RULES, PRIORITY_DEFAULT, SEND_QUEUE_SIZE
+
+def compile_priority(rules: Mapping[str, Mapping[str, int]] = PRIORITY_RULES,
+                     default: int = PRIORITY_DEFAULT) -> Callable[[Dict[str, Any]], int]:
+    """
+    Compiles priority rules into a function returning the priority class of a row.
+    
+    Values are compared after stripping whitespace and ignoring case. A row
+    matching several rules gets the most urgent (lowest) class.
+    
+    Args:
+        rules: Mapping of field name to a mapping of field value to priority class
+        default: Priority class of rows matching no rule
+    
+    Returns:
+        Function taking a row and returning its priority class
+    """
+    lookups = [
+        (field, {str(value).strip().casefold(): int(priority) for value, priority in classes.items()})
+        for field, classes in rules.items()
+    ]
+    
+    def priority(row: Dict[str, Any]) -> int:
+        result = default
+        for field, classes in lookups:
+            value = row.get(field)
+            if value:
+                result = min(result, classes.get(value.strip().casefold(), default))
+        return result
+    return priority
+
+class SendQueue:
+    """
+    Bounded priority queue of rows waiting to be sent.
+    
+    pop returns an item of the lowest priority class present. Within a class,
+    items of one source come out in the order they were pushed and sources
+    are served round-robin. The queue is not thread-safe.
+    
+    Usage:
+        queue = SendQueue(capacity=1000)
+        queue.push(priority(row), (row_num, row), source=file_path)
+        if queue.full:
+            row_num, row = queue.pop()
+    """
+    
+    def __init__(self, capacity: int = SEND_QUEUE_SIZE):
+        """
+        Args:
+            capacity: Maximum number of queued items
+        """
+        self.capacity = max(1, capacity)
+        self._size = 0
+        # Priority class -> source -> items; the first source is served next
+        self._classes: Dict[int, "OrderedDict[Hashable, Deque[Any]]"] = {}
+        # Heap of the priority classes present in _classes
+        self._heap: List[int] = []
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    @property
+    def full(self) -> bool:
+        return self._size >= self.capacity
+    
+    def push(self, priority: int, item: Any, source: Hashable = None) -> None:
+        """
+        Adds an item to the queue.
+        
+        Args:
+            priority: Priority class, lower classes are popped first
+            item: The queued item
+            source: Source of the item, such as its file, for fairness within a class
+        
+        Raises:
+            OverflowError: If the queue is full
+        """
+        if self.full:
+            raise OverflowError(f"Send queue is full ({self.capacity} items)")
+        sources = self._classes.get(priority)
+        if sources is None:
+            sources = self._classes[priority] = OrderedDict()
+            heapq.heappush(self._heap, priority)
+        items = sources.get(source)
+        if items is None:
+            items = sources[source] = deque()
+        items.append(item)
+        self._size += 1
+    
+    def pop(self) -> Any:
+        """
+        Removes and returns the next item to send.
+        
+        Returns:
+            The oldest item of the next source in the lowest priority class
+        
+        Raises:
+            IndexError: If the queue is empty
+        """
+        if not self._size:
+            raise IndexError("pop from an empty send queue")
+        priority = self._heap[0]
+        sources = self._classes[priority]
+        source, items = next(iter(sources.items()))
+        item = items.popleft()
+        if items:
+            # Let the other sources of this class go first
+            sources.move_to_end(source)
+        else:
+            del sources[source]
+            if not sources:
+                del self._classes[priority]
+                heapq.heappop(self._heap)
+        self._size -= 1
+        return item
+    
+    def drain(self) -> List[Any]:
+        """
+        Removes every queued item.
+        
+        Returns:
+            The items in pop order
+        """
+        return [self.pop() for _ in range(self._size)]
@@ -0,0 +1,618 @@
+"""
+Sharded imports coordinated through a shared directory.
+
+A coordinator splits the input file into shard CSV files, either by byte range
+or by a hash of the email address, and writes a manifest next to them. Workers
+(local processes or other nodes with the same directory mounted) claim shards
+through exclusive lock files, run the import on each one, and record the
+result in a per-shard status file. A merge step then combines the status files
+and reject files into one run report.
+
+While a shard is processed its worker refreshes the lock file and saves a
+checkpoint, so a shard left behind by a worker that was killed is reclaimed
+once its lock goes stale, and an interrupted shard resumes after the rows it
+already finished instead of sending them again.
+
+Shard directory layout:
+    manifest.json               Source file, split mode and list of shards
+    shard-0000.csv              Header plus the rows of shard 0
+    shard-0000.lock             Present while a worker owns shard 0, holds host:pid
+    shard-0000.checkpoint.json  Resume point of shard 0 while it is not finished
+    shard-0000.status.json      Run report of shard 0 once processed
+    shard-0000.rejects.csv      Skipped and failed rows of shard 0
+"""
+
+import os
+import csv
+import json
+import time
+import zlib
+import socket
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Set, Tuple
+
+from config import SHARD_DIR, SHARD_LOCK_TIMEOUT, SHARD_CHECKPOINT_INTERVAL
+from .report import RunReport, ERROR_UNFINISHED
+from .csv_reader import MappedCsvReader, find_record_boundary, scan_quote_state
+
+# Block size used when scanning and copying byte ranges
+_BLOCK_SIZE = 1024 * 1024
+
+# ============================================================================
+# Shard Paths
+# ============================================================================
+
+def shard_path(shard_dir: str, index: int, suffix: str) -> str:
+    """
+    Returns the path of a per-shard file.
+    
+    Args:
+        shard_dir: Shared shard directory
+        index: Shard index
+        suffix: File suffix, e.g. ".csv" or ".status.json"
+    
+    Returns:
+        Path of the file
+    """
+    return os.path.join(shard_dir, f"shard-{index:04d}{suffix}")
+
+def load_manifest(shard_dir: str) -> Dict[str, Any]:
+    """
+    Reads the manifest of a shard directory.
+    
+    Args:
+        shard_dir: Shared shard directory
+    
+    Returns:
+        The manifest dictionary
+    """
+    with open(os.path.join(shard_dir, "manifest.json")) as f:
+        return json.load(f)
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    """
+    Writes JSON atomically, so readers on other nodes never see a partial file.
+    """
+    temp_path = f"{path}.tmp{os.getpid()}"
+    with open(temp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+# ============================================================================
+# Splitting
+# ============================================================================
+
+def _split_by_bytes(file_path: str, shard_dir: str, shard_count: int) -> List[Dict[str, Any]]:
+    """
+    Splits the file into byte ranges that end on record boundaries.
+    
+    Each shard also records the source row number of its first record, so its
+    rows keep the numbers they have in the source file.
+    """
+    size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        # The header may itself contain quoted newlines
+        data_start, state = find_record_boundary(f, 0)
+        f.seek(0)
+        header = f.read(data_start)
+        
+        boundaries = [data_start]
+        position = data_start
+        for index in range(1, shard_count):
+            target = max(position, data_start + (size - data_start) * index // shard_count)
+            # Track quoted fields up to the target, then move forward to the next record boundary
+            f.seek(position)
+            remaining = target - position
+            while remaining > 0:
+                block = f.read(min(remaining, _BLOCK_SIZE))
+                state = scan_quote_state(block, state)
+                remaining -= len(block)
+            position, state = find_record_boundary(f, target, state)
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+        boundaries.append(size)
+        
+        shards = []
+        for index, (start, end) in enumerate(zip(boundaries, boundaries[1:])):
+            with open(shard_path(shard_dir, index, ".csv"), "wb") as out:
+                out.write(header)
+                f.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    block = f.read(min(remaining, _BLOCK_SIZE))
+                    out.write(block)
+                    remaining -= len(block)
+            shards.append({"index": index, "start": start, "end": end})
+    
+    # Row numbers count records, not lines, so they come from reading the file
+    with MappedCsvReader(file_path) as reader:
+        row_num = 2
+        starts = iter(shards)
+        shard = next(starts, None)
+        for record in reader:
+            while shard is not None and record.offset >= shard["start"]:
+                shard["first_row"] = record.row_num
+                shard = next(starts, None)
+            if shard is None:
+                break
+            row_num = record.row_num + 1
+        # Shards holding no records (only blank lines) start after the last record
+        while shard is not None:
+            shard["first_row"] = row_num
+            shard = next(starts, None)
+    return shards
+
+def _split_by_email(file_path: str, shard_dir: str, shard_count: int) -> List[Dict[str, Any]]:
+    """
+    Splits the file by a hash of the email address, so every occurrence of an
+    address lands in the same shard.
+    """
+    with open(file_path, "r", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        email_position = header.index("email") if "email" in header else None
+        
+        handles = [open(shard_path(shard_dir, index, ".csv"), "w", newline="") for index in range(shard_count)]
+        try:
+            writers = [csv.writer(handle) for handle in handles]
+            for writer in writers:
+                writer.writerow(header)
+            rows = [0] * shard_count
+            for row in reader:
+                email = row[email_position] if email_position is not None and email_position < len(row) else ""
+                index = zlib.crc32(email.strip().lower().encode()) % shard_count
+                writers[index].writerow(row)
+                rows[index] += 1
+        finally:
+            for handle in handles:
+                handle.close()
+    return [{"index": index, "rows": rows[index]} for index in range(shard_count)]
+
+def split_file(file_path: str, shard_dir: str = SHARD_DIR, shard_count: int = 4,
+               shard_by: str = "bytes") -> Dict[str, Any]:
+    """
+    Splits an input file into shards and writes the manifest.
+    
+    Args:
+        file_path: Path to the CSV file containing user data
+        shard_dir: Shared directory the shards are written to
+        shard_count: Number of shards to create
+        shard_by: "bytes" for contiguous byte ranges, "email" for a hash of the email address
+    
+    Returns:
+        The manifest dictionary
+    
+    Raises:
+        ValueError: If shard_by or shard_count is invalid
+        FileExistsError: If shard_dir already holds a manifest
+        OSError: If the input file cannot be read or the shards cannot be written
+        csv.Error: If a byte split finds a record that is not valid UTF-8
+    """
+    if shard_by not in ("bytes", "email"):
+        raise ValueError(f"Unknown shard mode: {shard_by}")
+    if shard_count < 1:
+        raise ValueError("shard_count must be at least 1")
+    
+    os.makedirs(shard_dir, exist_ok=True)
+    if os.path.exists(os.path.join(shard_dir, "manifest.json")):
+        raise FileExistsError(f"Shard directory '{shard_dir}' already contains a manifest")
+    
+    if shard_by == "bytes":
+        shards = _split_by_bytes(file_path, shard_dir, shard_count)
+    else:
+        shards = _split_by_email(file_path, shard_dir, shard_count)
+    
+    manifest = {
+        "source": os.path.abspath(file_path),
+        "shard_by": shard_by,
+        "created": time.time(),
+        "shards": shards
+    }
+    _write_json(os.path.join(shard_dir, "manifest.json"), manifest)
+    logging.info(f"Split {file_path} into {len(shards)} shards by {shard_by} in {shard_dir}")
+    return manifest
+
+# ============================================================================
+# Checkpoints
+# ============================================================================
+
+class ShardCheckpoint:
+    """
+    Resume point of a shard, saved while create_users runs on it.
+    
+    With several requests in flight rows finish out of order, so the checkpoint
+    holds the offset and row number of the first row not finished yet, the row
+    numbers finished after it, and the run report of every finished row. A
+    resumed run starts reading at the offset, leaves out the finished rows and
+    adds its report to the saved one.
+    
+    Usage:
+        checkpoint = ShardCheckpoint(path).load()
+        for record in reader.records(checkpoint.offset, checkpoint.row_num):
+            checkpoint.start(record.row_num, record.offset, record.end)
+            ...
+            checkpoint.finish(record.row_num)
+            checkpoint.save(report)
+    """
+    
+    def __init__(self, path: str, interval: float = SHARD_CHECKPOINT_INTERVAL, first_row: int = 2):
+        """
+        Args:
+            path: Checkpoint file
+            interval: Minimum seconds between writes, unless a save is forced
+            first_row: Row number of the first record of the shard in the source file
+        """
+        self.path = path
+        self.interval = interval
+        # Resume point loaded from the file; offset is None when starting from the beginning
+        self.offset: Optional[int] = None
+        self.row_num = first_row
+        self.done: Set[int] = set()
+        self.report = RunReport()
+        # Rows read but not finished by this run, by row number, and where reading continues
+        self._outstanding: "OrderedDict[int, int]" = OrderedDict()
+        self._finished: Set[int] = set()
+        self._next: Optional[Tuple[int, int]] = None
+        self._last_save = time.monotonic()
+    
+    @property
+    def resuming(self) -> bool:
+        """
+        True if a previous run of the shard left a checkpoint.
+        """
+        return self.offset is not None
+    
+    def load(self) -> "ShardCheckpoint":
+        """
+        Reads the checkpoint file, if there is one.
+        
+        Returns:
+            The checkpoint itself
+        """
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.offset, self.row_num = data["offset"], data["row_num"]
+            self.done = set(data.get("done", []))
+            self.report = RunReport.from_dict(data.get("report", {}))
+            # Rows left unfinished are sent again by the resumed run
+            self.report.unfinished = 0
+            self.report.error_classes.pop(ERROR_UNFINISHED, None)
+            self.report.interrupted = False
+        return self
+    
+    def start(self, row_num: int, offset: int, end: int) -> None:
+        """
+        Notes that a row was read and is not finished yet.
+        """
+        self._outstanding[row_num] = offset
+        self._next = (end, row_num + 1)
+    
+    def finish(self, row_num: int) -> None:
+        """
+        Notes that a row was skipped or its request completed.
+        """
+        self._outstanding.pop(row_num, None)
+        self._finished.add(row_num)
+    
+    @property
+    def due(self) -> bool:
+        """
+        True once interval seconds have passed since the last save.
+        """
+        return time.monotonic() - self._last_save >= self.interval
+    
+    def combined(self, report: RunReport) -> RunReport:
+        """
+        Returns the report of the previous runs plus the report of this run.
+        """
+        total = RunReport()
+        total.merge(self.report)
+        total.merge(report)
+        total.elapsed = self.report.elapsed + report.elapsed
+        return total
+    
+    def save(self, report: RunReport, force: bool = False) -> None:
+        """
+        Writes the current resume point, at most once per interval unless forced.
+        
+        Args:
+            report: Report of this run so far
+            force: Write even if the interval has not passed
+        """
+        if not force and not self.due:
+            return
+        if self._outstanding:
+            row_num, offset = next(iter(self._outstanding.items()))
+        elif self._next is not None:
+            offset, row_num = self._next
+        elif self.offset is not None:
+            offset, row_num = self.offset, self.row_num
+        else:
+            return
+        self._finished = {finished for finished in self._finished if finished > row_num}
+        done = sorted(self._finished | {row for row in self.done if row > row_num})
+        _write_json(self.path, {
+            "offset": offset, "row_num": row_num, "done": done,
+            "report": self.combined(report).to_dict(include_histogram=True)
+        })
+        self._last_save = time.monotonic()
+    
+    def remove(self) -> None:
+        """
+        Deletes the checkpoint file once the shard is finished.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+    
+    def prune_rejects(self, rejects_path: str) -> None:
+        """
+        Drops the rejects of rows a resumed run processes again from a rejects file.
+        """
+        if not self.resuming or not os.path.exists(rejects_path):
+            return
+        with open(rejects_path, newline="") as f:
+            rows = list(csv.reader(f))
+        kept = rows[:1] + [
+            row for row in rows[1:]
+            if row and row[0].isdigit() and (int(row[0]) < self.row_num or int(row[0]) in self.done)
+        ]
+        with open(rejects_path, "w", newline="") as f:
+            csv.writer(f).writerows(kept)
+
+# ============================================================================
+# Workers
+# ============================================================================
+
+def _pid_alive(pid: int) -> bool:
+    """
+    Returns True if a process with this pid exists on this host.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def lock_is_stale(lock_path: str, lock_timeout: float = SHARD_LOCK_TIMEOUT) -> bool:
+    """
+    Checks whether a shard lock was left behind by a worker that is gone.
+    
+    Workers refresh the modification time of their lock while they run, so a
+    lock older than lock_timeout is stale. A lock taken on this host is also
+    stale as soon as the process that took it no longer exists.
+    
+    Args:
+        lock_path: The shard's lock file
+        lock_timeout: Seconds without a refresh after which the lock is stale
+    
+    Returns:
+        True if the lock can be reclaimed
+    """
+    try:
+        age = time.time() - os.path.getmtime(lock_path)
+        with open(lock_path) as f:
+            host, _, pid = f.read().strip().partition(":")
+    except FileNotFoundError:
+        return False
+    if host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid)):
+        return True
+    return age > lock_timeout
+
+def _break_stale_lock(lock_path: str, lock_timeout: float) -> None:
+    """
+    Removes a stale lock so it can be claimed again.
+    
+    The lock is renamed before it is removed, so when several workers find
+    the same stale lock only one of them removes it; a lock that was claimed
+    afresh in the meantime is put back.
+    """
+    if not lock_is_stale(lock_path, lock_timeout):
+        return
+    broken_path = f"{lock_path}.stale{os.getpid()}"
+    try:
+        os.rename(lock_path, broken_path)
+    except FileNotFoundError:
+        return
+    if not lock_is_stale(broken_path, lock_timeout):
+        try:
+            os.link(broken_path, lock_path)
+        except FileExistsError:
+            pass
+    else:
+        with open(broken_path) as f:
+            logging.warning(f"Reclaiming stale lock {lock_path} of {f.read().strip() or 'an unknown worker'}")
+    os.remove(broken_path)
+
+def claim_shard(shard_dir: str, lock_timeout: float = SHARD_LOCK_TIMEOUT) -> Optional[int]:
+    """
+    Claims the next shard that is neither finished nor owned by a live worker.
+    
+    Ownership is taken by creating the shard's lock file with O_EXCL, which is
+    atomic on local filesystems and on NFS v3 and later. Stale locks, see
+    lock_is_stale, are reclaimed.
+    
+    Args:
+        shard_dir: Shared shard directory
+        lock_timeout: Seconds without a refresh after which a lock is stale
+    
+    Returns:
+        The claimed shard index, or None if there is nothing left to do
+    """
+    for shard in load_manifest(shard_dir)["shards"]:
+        index = shard["index"]
+        status_path = shard_path(shard_dir, index, ".status.json")
+        if os.path.exists(status_path):
+            with open(status_path) as f:
+                if json.load(f).get("state") == "done":
+                    continue
+        lock_path = shard_path(shard_dir, index, ".lock")
+        if os.path.exists(lock_path):
+            _break_stale_lock(lock_path, lock_timeout)
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{socket.gethostname()}:{os.getpid()}\n")
+        return index
+    return None
+
+def _refresh_lock(lock_path: str, interval: float, stop: threading.Event) -> None:
+    """
+    Touches a lock file every interval seconds until stop is set.
+    """
+    while not stop.wait(interval):
+        try:
+            os.utime(lock_path)
+        except OSError as e:
+            logging.warning(f"Could not refresh shard lock {lock_path}: {e}")
+
+def run_worker(shard_dir: str, process_shard: Callable[[str, str, ShardCheckpoint], RunReport],
+               should_stop: Callable[[], bool] = lambda: False,
+               lock_timeout: float = SHARD_LOCK_TIMEOUT) -> List[int]:
+    """
+    Claims and processes shards until none are left or should_stop returns True.
+    
+    A shard whose run was interrupted has its lock released so another worker
+    can pick it up again, from its checkpoint; a finished shard keeps its lock
+    and status file. The lock is refreshed while the shard is processed.
+    
+    Args:
+        shard_dir: Shared shard directory
+        process_shard: Called with the shard CSV path, its rejects path and its
+            checkpoint, returns the RunReport of the rows it processed
+        should_stop: Checked before claiming each shard
+        lock_timeout: Seconds without a refresh after which a lock is stale
+    
+    Returns:
+        Indexes of the shards this worker finished
+    """
+    finished = []
+    # Byte-split shards number their rows as in the source file
+    first_rows = {shard["index"]: shard.get("first_row", 2) for shard in load_manifest(shard_dir)["shards"]}
+    while not should_stop():
+        index = claim_shard(shard_dir, lock_timeout)
+        if index is None:
+            break
+        lock_path = shard_path(shard_dir, index, ".lock")
+        rejects_path = shard_path(shard_dir, index, ".rejects.csv")
+        checkpoint = ShardCheckpoint(shard_path(shard_dir, index, ".checkpoint.json"),
+                                     first_row=first_rows.get(index, 2)).load()
+        if checkpoint.resuming:
+            logging.info(f"Worker {os.getpid()} resuming shard {index} at row {checkpoint.row_num}")
+            checkpoint.prune_rejects(rejects_path)
+        else:
+            logging.info(f"Worker {os.getpid()} processing shard {index}")
+        
+        stop_refresh = threading.Event()
+        refresher = threading.Thread(target=_refresh_lock, args=(lock_path, lock_timeout / 4, stop_refresh),
+                                     name=f"shard-{index}-lock", daemon=True)
+        refresher.start()
+        try:
+            report = process_shard(shard_path(shard_dir, index, ".csv"), rejects_path, checkpoint)
+        except BaseException:
+            os.remove(lock_path)
+            raise
+        finally:
+            stop_refresh.set()
+            refresher.join()
+        
+        state = "interrupted" if report.interrupted else "done"
+        # Rows finished by earlier, interrupted runs of the shard are counted too
+        total = checkpoint.combined(report)
+        total.interrupted = report.interrupted
+        # The raw latency histogram is kept so merge_results can combine percentiles
+        status = total.to_dict(include_histogram=True)
+        status.update({"state": state, "pid": os.getpid(), "elapsed": total.elapsed})
+        _write_json(shard_path(shard_dir, index, ".status.json"), status)
+        if state == "done":
+            checkpoint.remove()
+            finished.append(index)
+        else:
+            os.remove(lock_path)
+    return finished
+
+def run_local_workers(shard_dir: str, processes: int, target: Callable[..., Any], args: Tuple = ()) -> List[int]:
+    """
+    Starts worker processes on this machine and waits for them to exit.
+    
+    Args:
+        shard_dir: Shared shard directory, passed as the first argument of target
+        processes: Number of worker processes
+        target: Worker entry point, typically a function that calls run_worker
+        args: Extra arguments passed to target
+    
+    Returns:
+        Exit codes of the worker processes
+    """
+    workers = [
+        multiprocessing.Process(target=target, args=(shard_dir,) + tuple(args), name=f"shard-worker-{number}")
+        for number in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return [worker.exitcode for worker in workers]
+
+# ============================================================================
+# Merging
+# ============================================================================
+
+def merge_results(shard_dir: str, rejects_file: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Combines the status and reject files of every shard.
+    
+    Args:
+        shard_dir: Shared shard directory
+        rejects_file: Optional CSV file the rejects of all shards are concatenated into,
+                      with a leading shard column
+    
+    Returns:
+        Dictionary with report (the merged RunReport of all shards, interrupted
+        if any shard is not finished), shards (total) and completed (finished shards)
+    """
+    shards = load_manifest(shard_dir)["shards"]
+    merged = RunReport()
+    completed = 0
+    
+    for shard in shards:
+        status_path = shard_path(shard_dir, shard["index"], ".status.json")
+        if not os.path.exists(status_path):
+            continue
+        with open(status_path) as f:
+            status = json.load(f)
+        merged.merge(RunReport.from_dict(status))
+        if status.get("state") == "done":
+            completed += 1
+    
+    merged.interrupted = completed < len(shards)
+    
+    if rejects_file:
+        with open(rejects_file, "w", newline="") as out:
+            writer = csv.writer(out)
+            header_written = False
+            for shard in shards:
+                path = shard_path(shard_dir, shard["index"], ".rejects.csv")
+                if not os.path.exists(path):
+                    continue
+                with open(path, newline="") as f:
+                    reader = csv.reader(f)
+                    header = next(reader, None)
+                    if header is None:
+                        continue
+                    if not header_written:
+                        writer.writerow(["shard"] + header)
+                        header_written = True
+                    for row in reader:
+                        writer.writerow([shard["index"]] + row)
+    
+    return {"report": merged, "shards": len(shards), "completed": completed}
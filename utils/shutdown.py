@@ -0,0 +1,175 @@
+"""
+Graceful shutdown on SIGINT/SIGTERM.
+
+The first signal only asks the import to stop reading new rows; requests that
+are already in flight get until a deadline to finish so the summary stays
+accurate. A second signal falls back to raising KeyboardInterrupt.
+
+Waits on in-flight requests are done in short slices so a signal is noticed
+while the main thread is blocked on them, and a process that abandoned
+requests at the deadline exits without waiting for them.
+"""
+
+import os
+import sys
+import signal
+import logging
+import threading
+from concurrent.futures import Future, wait, ALL_COMPLETED, FIRST_COMPLETED
+from typing import Optional, Iterable, Set, Tuple, Dict, Any
+
+from config import SHUTDOWN_TIMEOUT
+
+# Seconds between checks for a shutdown request while waiting on requests
+_POLL_INTERVAL = 0.1
+
+class ShutdownCoordinator:
+    """
+    Coordinates a graceful stop of an import when a termination signal arrives.
+    """
+    
+    def __init__(self, drain_timeout: float = SHUTDOWN_TIMEOUT):
+        """
+        Args:
+            drain_timeout: Seconds in-flight requests are given to finish after a signal
+        """
+        self.drain_timeout = drain_timeout
+        self.signum: Optional[int] = None
+        self._event = threading.Event()
+        self._previous_handlers: Dict[int, Any] = {}
+    
+    @property
+    def requested(self) -> bool:
+        """
+        True once a shutdown has been requested.
+        """
+        return self._event.is_set()
+    
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until a shutdown is requested or the timeout passes.
+        
+        Args:
+            timeout: Seconds to wait, or None to wait indefinitely
+        
+        Returns:
+            True if a shutdown has been requested
+        """
+        return self._event.wait(timeout)
+    
+    def install(self, signals: Iterable[int] = (signal.SIGINT, signal.SIGTERM)) -> "ShutdownCoordinator":
+        """
+        Installs the signal handlers. Must be called from the main thread.
+        
+        Args:
+            signals: Signals that trigger a graceful shutdown
+        
+        Returns:
+            The coordinator itself
+        """
+        for signum in signals:
+            self._previous_handlers[signum] = signal.signal(signum, self._handle_signal)
+        return self
+    
+    def restore(self) -> None:
+        """
+        Restores the signal handlers that were active before install().
+        """
+        for signum, handler in self._previous_handlers.items():
+            signal.signal(signum, handler)
+        self._previous_handlers = {}
+    
+    def __enter__(self) -> "ShutdownCoordinator":
+        return self.install()
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.restore()
+    
+    def request(self, signum: Optional[int] = None) -> None:
+        """
+        Requests a graceful shutdown.
+        
+        Args:
+            signum: The signal that caused the request, if any
+        """
+        if self.signum is None:
+            self.signum = signum
+        self._event.set()
+    
+    def _handle_signal(self, signum: int, frame) -> None:
+        """
+        Signal handler: the first signal requests a graceful shutdown, the second forces one.
+        """
+        if self.requested:
+            logging.warning("Second termination signal received, stopping immediately")
+            raise KeyboardInterrupt
+        logging.warning(f"Received {signal.Signals(signum).name}, finishing in-flight requests "
+                        f"(up to {self.drain_timeout:g}s) before stopping")
+        self.request(signum)
+    
+    def wait_for(self, pending: Iterable[Future], return_when: str = ALL_COMPLETED) -> Tuple[Set[Future], Set[Future]]:
+        """
+        Waits for requests like concurrent.futures.wait, but returns early once a
+        shutdown is requested.
+        
+        Args:
+            pending: Futures of requests in flight
+            return_when: ALL_COMPLETED or FIRST_COMPLETED
+        
+        Returns:
+            Tuple containing (done, not_done) futures
+        """
+        pending = set(pending)
+        while True:
+            done, not_done = wait(pending, timeout=_POLL_INTERVAL, return_when=return_when)
+            if not not_done or (done and return_when == FIRST_COMPLETED) or self.requested:
+                return done, not_done
+    
+    def drain(self, pending: Set[Future]) -> Tuple[Set[Future], Set[Future]]:
+        """
+        Waits up to drain_timeout for the pending requests to finish.
+        
+        Args:
+            pending: Futures of requests still in flight
+        
+        Returns:
+            Tuple containing (done, not_done) futures
+        """
+        done, not_done = wait(pending, timeout=self.drain_timeout)
+        for future in not_done:
+            future.cancel()
+        return done, not_done
+    
+    def exit_code(self) -> int:
+        """
+        Returns the conventional exit code for the signal that stopped the run.
+        """
+        return 128 + (self.signum or signal.SIGINT)
+    
+    @staticmethod
+    def flush_logs() -> None:
+        """
+        Flushes every handler of the root logger.
+        """
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+
+def exit_process(code: int) -> None:
+    """
+    Exits the process with an exit code.
+    
+    concurrent.futures joins its worker threads at interpreter exit, so a
+    request abandoned at the drain deadline would keep the process alive until
+    it finished on its own. If any such thread is still running, logging is
+    shut down and the standard streams are flushed before exiting immediately.
+    
+    Args:
+        code: Exit code of the process
+    """
+    main_thread = threading.main_thread()
+    if any(thread is not main_thread and not thread.daemon and thread.is_alive() for thread in threading.enumerate()):
+        logging.shutdown()
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+    sys.exit(code)
@@ -1,8 +1,36 @@
-from typing import Dict, Tuple, Any, Optional
-from email_validator import validate_email, EmailNotValidError
-from config import REQUIRED_FIELDS
+import re
+from array import array
+from typing import Dict, Tuple, Any, Optional, List, Mapping, Sequence, Callable
+from email_validator import validate_email, EmailNotValidError, SPECIAL_USE_DOMAIN_NAMES
+from config import REQUIRED_FIELDS, VALIDATION_RULES
+from .profiling import timed
 
-# We can use this as a validation chain if needed.
+# ============================================================================
+# Batch Validation Status Codes
+# ============================================================================
+
+# Per-row status codes returned by the batch validators
+STATUS_VALID = 0
+STATUS_MISSING_FIELD = 1
+STATUS_INVALID_EMAIL = 2
+
+# Short human-readable reason for each status code
+STATUS_MESSAGES = {
+    STATUS_VALID: "valid",
+    STATUS_MISSING_FIELD: "missing required field",
+    STATUS_INVALID_EMAIL: "invalid email",
+}
+
+# Conservative pattern for plain ASCII addresses that email_validator would
+# accept unchanged apart from lowercasing the domain. Anything that does not
+# match is not necessarily invalid, it just takes the full validation path.
+_FAST_EMAIL_RE = re.compile(
+    r"[A-Za-z0-9_%+-]+(?:\.[A-Za-z0-9_%+-]+)*"
+    r"@((?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63})"
+)
+_SPECIAL_USE_SUFFIXES = frozenset(SPECIAL_USE_DOMAIN_NAMES)
+
+@timed()
 def validate_user_data(user_data: Dict[str, Any]) -> Tuple[bool, str]:
     """
     Validates if the user data contains all required fields.
@@ -31,6 +59,7 @@ def validate_user_data(user_data: Dict[str, Any]) -> Tuple[bool, str]:
     return True, ""
 
 # Email validation is separated from user data validation for better modularity.
+@timed()
 def validate_email_address(email: str) -> Tuple[Optional[str], Optional[str]]:
     """
     Validates an email address and returns the normalized version if valid.
@@ -51,3 +80,198 @@ def validate_email_address(email: str) -> Tuple[Optional[str], Optional[str]]:
     except EmailNotValidError as e:
         # Return None for the email and the error message
         return None, str(e)
+
+def _fast_normalize_email(email: str) -> Optional[str]:
+    """
+    Returns the normalized form of a plain ASCII email address without calling
+    email_validator, or None if the address needs full validation.
+    
+    Args:
+        email: The email address to check
+        
+    Returns:
+        The normalized email address, or None if the fast path does not apply
+    """
+    if len(email) > 254:
+        return None
+    match = _FAST_EMAIL_RE.fullmatch(email)
+    if match is None:
+        return None
+    domain = match.group(1).lower()
+    # Hyphens in the third and fourth position of a label are reserved (not just xn-- punycode)
+    if "--" in domain and any(label[2:4] == "--" for label in domain.split(".")):
+        return None
+    if domain.rsplit(".", 1)[-1] in _SPECIAL_USE_SUFFIXES:
+        return None
+    local_length = match.start(1) - 1
+    if local_length > 64:
+        return None
+    return email[:local_length + 1] + domain
+
+@timed()
+def validate_email_batch(emails: Sequence[Any]) -> Tuple[array, List[Optional[str]]]:
+    """
+    Validates a chunk of email addresses in one pass.
+    
+    Plain ASCII addresses matching a conservative pre-filter are normalized
+    directly; only suspicious or non-ASCII addresses go through the full
+    email_validator normalization.
+    
+    Args:
+        emails: Sequence of email addresses (empty values are treated as missing)
+        
+    Returns:
+        Tuple containing (statuses, normalized_emails)
+        statuses is an array of status codes, one per address
+        normalized_emails holds the normalized address, or None if not valid
+    """
+    count = len(emails)
+    statuses = array('B', bytes(count))
+    normalized: List[Optional[str]] = [None] * count
+    fast_normalize = _fast_normalize_email
+    
+    for index, email in enumerate(emails):
+        if not email:
+            statuses[index] = STATUS_MISSING_FIELD
+            continue
+        valid_email = fast_normalize(email) if email.isascii() else None
+        if valid_email is None:
+            valid_email, _ = validate_email_address(email)
+            if valid_email is None:
+                statuses[index] = STATUS_INVALID_EMAIL
+                continue
+        normalized[index] = valid_email
+    
+    return statuses, normalized
+
+@timed()
+def validate_user_batch(
+    columns: Mapping[str, Sequence[Any]],
+    required_fields: Sequence[str] = REQUIRED_FIELDS
+) -> Tuple[array, List[Optional[str]]]:
+    """
+    Validates a column-oriented chunk of user rows.
+    
+    Required fields are checked column by column across the whole chunk, then
+    the email column of the remaining rows is validated with validate_email_batch.
+    
+    Args:
+        columns: Mapping of field name to the values of that field for every row
+        required_fields: Fields that must be present and non-empty
+        
+    Returns:
+        Tuple containing (statuses, normalized_emails)
+        statuses is an array of status codes, one per row
+        normalized_emails holds the normalized email for valid rows, or None
+    """
+    count = max((len(values) for values in columns.values()), default=0)
+    statuses = array('B', bytes(count))
+    
+    # Check required fields one column at a time
+    for field in required_fields:
+        values = columns.get(field)
+        if values is None:
+            statuses = array('B', [STATUS_MISSING_FIELD]) * count
+            break
+        for index, value in enumerate(values):
+            if not value:
+                statuses[index] = STATUS_MISSING_FIELD
+    
+    emails = columns.get('email')
+    if emails is None:
+        return statuses, [None] * count
+    
+    # Only send rows that passed the required field checks to email validation
+    pending = [index for index in range(count) if statuses[index] == STATUS_VALID and emails[index]]
+    email_statuses, valid_emails = validate_email_batch([emails[index] for index in pending])
+    normalized: List[Optional[str]] = [None] * count
+    for position, index in enumerate(pending):
+        if email_statuses[position] == STATUS_VALID:
+            normalized[index] = valid_emails[position]
+        else:
+            statuses[index] = email_statuses[position]
+    
+    return statuses, normalized
+
+# ============================================================================
+# Compiled Validation Rules
+# ============================================================================
+
+# Rule names understood by compile_validator
+RULE_TYPES = ("choices", "min_length", "max_length", "pattern", "unique")
+
+def _compile_field_rules(field: str, field_rules: Mapping[str, Any], slot: int,
+                         namespace: Dict[str, Any], lines: List[str], seen_lines: List[str]) -> None:
+    """
+    Appends the generated source checking one field to lines.
+    
+    Constants used by the checks are stored in namespace under names derived
+    from slot, so the generated code only does local and global lookups.
+    """
+    unknown = set(field_rules) - set(RULE_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown validation rule(s) for field {field}: {', '.join(sorted(unknown))}")
+    
+    value = f"v{slot}"
+    namespace[f"f{slot}"] = field
+    lines.append(f"    {value} = row.get(f{slot})")
+    lines.append(f"    if {value}:")
+    body_start = len(lines)
+    
+    if "choices" in field_rules:
+        namespace[f"c{slot}"] = frozenset(field_rules["choices"])
+        lines.append(f"        if {value} not in c{slot}:")
+        lines.append(f"            return 'Invalid value for field ' + f{slot} + ': ' + {value}")
+    if "min_length" in field_rules:
+        minimum = int(field_rules["min_length"])
+        lines.append(f"        if len({value}) < {minimum}:")
+        lines.append(f"            return 'Field ' + f{slot} + ' is shorter than {minimum} characters'")
+    if "max_length" in field_rules:
+        maximum = int(field_rules["max_length"])
+        lines.append(f"        if len({value}) > {maximum}:")
+        lines.append(f"            return 'Field ' + f{slot} + ' is longer than {maximum} characters'")
+    if "pattern" in field_rules:
+        namespace[f"p{slot}"] = re.compile(field_rules["pattern"]).fullmatch
+        lines.append(f"        if p{slot}({value}) is None:")
+        lines.append(f"            return 'Field ' + f{slot} + ' does not match the required pattern'")
+    if field_rules.get("unique"):
+        namespace[f"s{slot}"] = set()
+        lines.append(f"        if {value} in s{slot}:")
+        lines.append(f"            return 'Duplicate value for field ' + f{slot} + ': ' + {value}")
+        # Values are only recorded once the whole row has passed
+        seen_lines.append(f"    if {value}:")
+        seen_lines.append(f"        s{slot}.add({value})")
+    
+    if len(lines) == body_start:
+        lines.append("        pass")
+
+def compile_validator(rules: Mapping[str, Mapping[str, Any]] = VALIDATION_RULES) -> Callable[[Dict[str, Any]], Optional[str]]:
+    """
+    Compiles per-field validation rules into a single flat validator function.
+    
+    The rules are turned into straight-line Python source once, so checking a
+    row costs one function call plus the comparisons themselves, and the first
+    failing rule returns immediately. Each compiled validator keeps its own
+    state for unique rules, so compile a fresh one for every run.
+    
+    Args:
+        rules: Mapping of field name to a mapping of rule name to rule argument
+        
+    Returns:
+        Function taking a row and returning an error message, or None if the row is valid
+        
+    Raises:
+        ValueError: If a rule name is not one of RULE_TYPES
+    """
+    namespace: Dict[str, Any] = {}
+    lines = ["def validator(row):"]
+    seen_lines: List[str] = []
+    
+    for slot, (field, field_rules) in enumerate(rules.items()):
+        _compile_field_rules(field, field_rules, slot, namespace, lines, seen_lines)
+    
+    lines.extend(seen_lines)
+    lines.append("    return None")
+    
+    exec(compile("\n".join(lines), "<validation rules>", "exec"), namespace)
+    return timed("utils.validation.compiled_rules")(namespace["validator"])